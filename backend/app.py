@@ -3,15 +3,48 @@
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from audit import AuditLog
+from cache import ResponseCache
 from config import Config
 from routes import routes
-from models import DatabaseManager
+from events import event_hub
+from instrumentation import install_request_metrics
+from ratelimit import create_rate_limiter
+from scheduler import TaskReleaseScheduler
+from serialization import create_encoder
+from settings_cache import split_setting_key
+from storage import create_storage
+
+def publish_setting_changes(db_manager):
+    """
+    Forward settings changes (from this or another worker) to SSE clients
+    """
+    def on_change(key):
+        event_id, name = split_setting_key(key)
+        if name == 'reveal_status' and event_id:
+            event_hub.publish('reveal_toggled', {
+                "event_id": event_id,
+                "revealed": db_manager.get_reveal_status(event_id)
+            })
+        elif name == TaskReleaseScheduler.SETTING_KEY and event_id:
+            release = db_manager.get_setting(key) or {}
+            event_hub.publish('tasks_released', {
+                "event_id": event_id,
+                "count": release.get('count', 0),
+                "assigned_to": release.get('assigned_to', [])
+            })
+
+    db_manager.settings_cache.add_listener(on_change)
 
 def create_app():
     app = Flask(__name__)
     
     # Configuration
     app.config.from_object(Config)
+    if Config.PROXY_FIX_X_FOR:
+        # Client addresses (rate limits, audit log) from the trusted proxies' X-Forwarded-For
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.PROXY_FIX_X_FOR)
     
     # CORS
     CORS(app) if Config.CORS_ENABLED else None
@@ -19,8 +52,59 @@ def create_app():
     # JWT
     jwt = JWTManager(app)
     
-    # Database
-    db_manager = DatabaseManager(Config)
+    # Storage (one backend, and so one connection pool, per app; STORAGE_BACKEND picks it)
+    db_manager = create_storage(Config)
+    db_manager.ensure_indexes()
+    if not db_manager.has_dashboards():
+        # Backfill dashboards for data created before they were maintained
+        db_manager.rebuild_dashboards()
+    if Config.INDEX_AUDIT_ON_START:
+        collscans = db_manager.audit_indexes()
+        if collscans:
+            raise RuntimeError("Queries without index support: " + ", ".join(
+                finding['query'] for finding in collscans
+            ))
+    app.extensions['db_manager'] = db_manager
+
+    # List responses: encoded by JSON_ENCODER, revalidated by ETag against collection versions
+    app.extensions['json_encoder'] = create_encoder(Config.JSON_ENCODER)
+    app.extensions['response_cache'] = ResponseCache(Config.RESPONSE_CACHE_MAX_BYTES, Config.RESPONSE_CACHE_TTL)
+
+    # Logins, completions, re-pairings and reveal toggles, written in the background
+    audit_log = AuditLog(
+        db_manager,
+        max_queue=Config.AUDIT_LOG_QUEUE_SIZE,
+        batch_size=Config.AUDIT_LOG_BATCH_SIZE,
+        flush_interval=Config.AUDIT_LOG_FLUSH_INTERVAL,
+        block_timeout=Config.AUDIT_LOG_BLOCK_TIMEOUT,
+        enabled=Config.AUDIT_LOG_ENABLED
+    )
+    audit_log.start()
+    app.extensions['audit_log'] = audit_log
+
+    # Token buckets for the auth and admin routes, and the one-pairing-run-per-event gate
+    app.extensions['rate_limiter'] = create_rate_limiter(Config, db_manager)
+
+    # Per-route latency and Mongo command metrics at /metrics
+    if Config.METRICS_ENABLED:
+        install_request_metrics(app, db_manager, slow_request_ms=Config.SLOW_REQUEST_MS)
+    
+    # Event fanout for Server-Sent Events
+    event_hub.max_queue = Config.SSE_QUEUE_SIZE
+    event_hub.start()
+    publish_setting_changes(db_manager)
+    db_manager.settings_cache.start()
+
+    # Releases tasks on their scheduled date (one lease-holding worker at a time)
+    task_scheduler = TaskReleaseScheduler(
+        db_manager,
+        batch_size=Config.TASK_RELEASE_BATCH_SIZE,
+        refresh_interval=Config.TASK_RELEASE_REFRESH_INTERVAL,
+        lease_ttl=Config.TASK_RELEASE_LEASE_TTL
+    )
+    if Config.TASK_RELEASE_ENABLED and not db_manager.releases_on_read:
+        task_scheduler.start()
+    app.extensions['task_scheduler'] = task_scheduler
     
     # Register Routes
     app.register_blueprint(routes, url_prefix='/api')
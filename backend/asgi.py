@@ -0,0 +1,286 @@
+# backend/asgi.py
+#
+# Async serving mode. Login and the hot read /api routes are served by
+# native async handlers on Motor; every other route falls through to the
+# Flask app via a WSGI bridge, so the full API is available either way.
+# The native handlers are MongoDB-only: with STORAGE_BACKEND=sqlite every
+# route is served by Flask, so both entry points read the same storage.
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+import asyncio
+import math
+from datetime import datetime
+
+import jwt
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import create_access_token
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.security import check_password_hash
+
+from app import create_app
+from async_models import AsyncDatabaseManager
+from config import Config
+from routes import TASK_LIST_PROJECTION
+from security import PasswordQueueFull
+from serialization import format_task, format_user_task
+from storage import STORAGE_ERRORS
+from utils import decode_cursor, encode_cursor
+
+flask_app = create_app()
+async_db = AsyncDatabaseManager(Config) if Config.STORAGE_BACKEND == 'mongo' else None
+
+db_manager = flask_app.extensions['db_manager']
+json_encoder = flask_app.extensions['json_encoder']
+audit_log = flask_app.extensions['audit_log']
+rate_limiter = flask_app.extensions['rate_limiter']
+response_cache = flask_app.extensions['response_cache']
+if async_db:
+    # Reuse the sync manager's settings watcher so writes made through Flask
+    # or by other workers also invalidate the async settings cache
+    db_manager.settings_cache.add_listener(async_db.invalidate_setting)
+db_manager.settings_cache.start()
+
+class AuthError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+def get_claims(request, optional=False):
+    """
+    Validate the access token (header or ?jwt=) the way flask_jwt_extended does.
+    With `optional`, a missing, expired or malformed token gives {} (see
+    routes.optional_jwt_claims)
+    """
+    try:
+        return _decode_claims(request)
+    except AuthError:
+        if optional:
+            return {}
+        raise
+
+def _decode_claims(request):
+    header = request.headers.get('Authorization', '')
+    token = header[7:] if header.startswith('Bearer ') else request.query_params.get('jwt')
+    if not token:
+        raise AuthError("Missing Authorization Header", 401)
+    try:
+        claims = jwt.decode(token, flask_app.config['SECRET_KEY'], algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        raise AuthError("Token has expired", 401)
+    except jwt.InvalidTokenError as e:
+        raise AuthError(str(e), 422)
+    if claims.get('type') != 'access':
+        raise AuthError("Only non-refresh tokens are allowed", 422)
+    return claims
+
+def event_id_for(request, claims):
+    """
+    Same event resolution as routes.current_event_id
+    """
+    if not claims or claims.get('role') == 'admin':
+        return (request.query_params.get('event_id') or request.headers.get('x-event-id') or
+                Config.DEFAULT_EVENT_ID)
+    return claims.get('event_id') or Config.DEFAULT_EVENT_ID
+
+def jwt_required(handler=None, optional=False):
+    def decorate(handler):
+        async def wrapper(request):
+            try:
+                claims = get_claims(request, optional=optional)
+            except AuthError as e:
+                return JSONResponse({"msg": str(e)}, status_code=e.status)
+            request.state.identity = claims.get('sub')
+            request.state.event_id = event_id_for(request, claims)
+            return await handler(request)
+        return wrapper
+    return decorate(handler) if handler else decorate
+
+async def cached_json(request, key, version, build):
+    """
+    Same as routes.cached_json, sharing its ResponseCache: the stored bytes
+    and strong ETag for `key` at `version`, or a bodyless 304 when
+    If-None-Match carries that ETag. `build` is awaited only on a miss
+    """
+    entry = response_cache.get(key, version)
+    if entry is None:
+        entry = response_cache.set(key, version, json_encoder.dumps(await build()))
+    etag, body = entry
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+    if_none_match = request.headers.get('if-none-match', '')
+    if if_none_match.strip() == '*' or f'"{etag}"' in [tag.strip().removeprefix('W/')
+                                                       for tag in if_none_match.split(',')]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+async def login(request):
+    """
+    Handle user login; password checks run in the bounded hashing pool
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return JSONResponse({"error": "Request body must be a JSON object"}, status_code=400)
+    email = data.get('email')
+    password = data.get('password')
+    event_id = data.get('event_id') or Config.DEFAULT_EVENT_ID
+    client_ip = request.client.host if request.client else None
+
+    if Config.RATE_LIMIT_ENABLED:
+        # Same buckets, in the same order, as the Flask route (see routes.login_client);
+        # run off the loop for the Mongo backend
+        for route, client in (('login_address', client_ip), ('login', f'{client_ip}:{str(email or "").lower()}')):
+            if not Config.RATE_LIMITS.get(route):
+                continue
+            retry_after = await run_in_threadpool(rate_limiter.hit, route, client, *Config.RATE_LIMITS[route])
+            if retry_after:
+                return JSONResponse({"error": "Too many requests, please retry later"}, status_code=429,
+                                    headers={'Retry-After': str(math.ceil(retry_after))})
+
+    if not email or not password:
+        return JSONResponse({"error": "Email and password are required"}, status_code=400)
+
+    hasher = db_manager.password_hasher
+    user = await async_db.get_user_by_email(email, event_id)
+    try:
+        valid = user and await asyncio.wrap_future(
+            hasher.submit(check_password_hash, user['password_hash'], password)
+        )
+    except PasswordQueueFull:
+        return JSONResponse({"error": "Too many logins in progress, please retry"},
+                            status_code=503, headers={'Retry-After': '1'})
+    if not valid:
+        audit_log.record('login_failed', event_id=event_id, email=email, ip=client_ip)
+        return JSONResponse({"error": "Invalid email or password"}, status_code=401)
+    audit_log.record('login', event_id=user.get('event_id') or event_id, actor=user['_id'],
+                     role=user['role'], ip=client_ip)
+
+    if hasher.needs_rehash(user['password_hash']):
+        await async_db.update_password_hash(
+            user['_id'], await asyncio.wrap_future(hasher.submit(hasher.generate, password))
+        )
+
+    with flask_app.app_context():
+        access_token = create_access_token(identity=user['_id'], additional_claims={
+            "role": user['role'],
+            "event_id": user.get('event_id')
+        })
+
+    return JSONResponse({
+        "access_token": access_token,
+        "role": user['role'],
+        "user_id": user['_id'],
+        "event_id": user.get('event_id') or event_id
+    })
+
+@jwt_required(optional=True)
+async def check_pairings_revealed(request):
+    event_id = request.state.event_id
+    revealed = await async_db.get_reveal_status(event_id)
+    async def build():
+        return {"revealed": revealed}
+    return await cached_json(request, ('pairings/revealed', event_id), revealed, build)
+
+@jwt_required
+async def get_my_santa(request):
+    if not await async_db.get_reveal_status(request.state.event_id):
+        return JSONResponse({"error": "Secret Santa identities haven't been revealed yet!"}, status_code=403)
+
+    santa = await async_db.get_user_santa(request.state.identity, request.state.event_id)
+    if santa:
+        return JSONResponse({"santa_name": santa['full_name']})
+    return JSONResponse({"error": "No Secret Santa found"}, status_code=404)
+
+@jwt_required
+async def get_paired_info(request):
+    user = await async_db.get_user_with_pairing(request.state.identity)
+
+    if not user or not user.get('paired_with'):
+        return JSONResponse({"error": "Not paired yet"}, status_code=404)
+
+    paired_user = user['paired_user']
+    return JSONResponse({"paired_name": paired_user['full_name'] if paired_user else None})
+
+@jwt_required
+async def check_password_status(request):
+    user = await async_db.get_user_by_id(request.state.identity)
+
+    if not user:
+        return JSONResponse({"error": "User not found"}, status_code=404)
+
+    return JSONResponse({"needs_password_change": not user.get('initial_password_set', True)})
+
+@jwt_required(optional=True)
+async def get_all_tasks(request):
+    limit = request.query_params.get('limit')
+    after = None
+    try:
+        limit = min(int(limit), Config.MAX_PAGE_SIZE) if limit else None
+        if limit is not None and limit < 1:
+            raise ValueError
+    except ValueError:
+        return JSONResponse({"error": "limit must be a positive integer"}, status_code=400)
+    if request.query_params.get('cursor'):
+        try:
+            scheduled_date, task_id = decode_cursor(request.query_params['cursor'])
+            after = (datetime.fromisoformat(scheduled_date), task_id)
+        except (TypeError, ValueError):
+            return JSONResponse({"error": "Invalid cursor"}, status_code=400)
+
+    event_id = request.state.event_id
+    try:
+        if (request.query_params.get('format') == 'ndjson' or
+                request.headers.get('accept') == 'application/x-ndjson'):
+            cursor = async_db.find_tasks(TASK_LIST_PROJECTION, after=after, limit=limit, event_id=event_id)
+            async def generate():
+                async for task in cursor:
+                    yield json_encoder.dumps(format_task(task)) + b'\n'
+            return StreamingResponse(generate(), media_type='application/x-ndjson')
+
+        async def build():
+            tasks = await async_db.find_tasks(TASK_LIST_PROJECTION, after=after, limit=limit,
+                                              event_id=event_id).to_list(length=None)
+            response = {"tasks": [format_task(task) for task in tasks]}
+            if limit:
+                last = tasks[-1] if len(tasks) == limit else None
+                response["next_cursor"] = encode_cursor(
+                    [last['scheduled_date'].isoformat(), last['_id']]
+                ) if last else None
+            return response
+
+        return await cached_json(request, ('tasks/all', event_id, limit, request.query_params.get('cursor')),
+                                 await async_db.get_collection_version('tasks', event_id), build)
+    except STORAGE_ERRORS as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@jwt_required
+async def get_user_tasks(request):
+    tasks = await async_db.get_user_tasks(request.state.identity, request.state.event_id)
+    return Response(json_encoder.dumps({"tasks": [format_user_task(task) for task in tasks]}),
+                    media_type='application/json')
+
+native_routes = [
+    Route('/api/login', login, methods=['POST']),
+    Route('/api/pairings/revealed', check_pairings_revealed, methods=['GET']),
+    Route('/api/user/my-santa', get_my_santa, methods=['GET']),
+    Route('/api/user/paired-info', get_paired_info, methods=['GET']),
+    Route('/api/user/check-password-status', check_password_status, methods=['GET']),
+    Route('/api/tasks/all', get_all_tasks, methods=['GET']),
+    Route('/api/tasks/user', get_user_tasks, methods=['GET'])
+] if async_db else []
+
+app = Starlette(
+    routes=native_routes + [
+        # Everything else (admin routes, SSE, streaming) is served by Flask
+        Mount('/', app=WsgiToAsgi(flask_app))
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'])] if Config.CORS_ENABLED else [],
+    on_shutdown=[audit_log.stop] + ([async_db.client.close] if async_db else [])
+)
@@ -0,0 +1,147 @@
+# backend/async_models.py
+
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models import mongo_client_options
+from settings_cache import event_setting_key
+from storage import collection_version_key
+
+class AsyncDatabaseManager:
+    """
+    Motor-backed counterpart of DatabaseManager for the ASGI entry point.
+    Covers the read-heavy and per-click paths; admin bulk operations stay on
+    the synchronous manager
+    """
+    def __init__(self, config):
+        self.config = config
+        self.client = AsyncIOMotorClient(config.MONGODB_URI, **mongo_client_options(config))
+        self.db = self.client[config.DATABASE_NAME]
+
+        # Collections
+        self.users_collection = self.db['users']
+        self.tasks_collection = self.db['tasks']
+        self.pairings_collection = self.db['pairings']
+
+        self._settings = {}  # key -> (expires_at, document)
+
+    def resolve_event(self, event_id):
+        return event_id or self.config.DEFAULT_EVENT_ID
+
+    async def get_user_by_email(self, email, event_id=None):
+        """
+        A participant of the event, or an admin, with this email
+        """
+        return await self.users_collection.find_one({
+            'event_id': {'$in': [self.resolve_event(event_id), None]},
+            'email': email
+        })
+
+    async def update_password_hash(self, user_id, password_hash):
+        return await self.users_collection.update_one(
+            {'_id': user_id},
+            {'$set': {'password_hash': password_hash}}
+        )
+
+    async def get_user_by_id(self, user_id):
+        """
+        Get user by ID
+        """
+        return await self.users_collection.find_one({'_id': user_id})
+
+    async def get_setting(self, key):
+        """
+        Read a settings document, cached for SETTINGS_CACHE_TTL seconds
+        """
+        entry = self._settings.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        document = await self.db.settings.find_one({'_id': key})
+        self._settings[key] = (time.monotonic() + self.config.SETTINGS_CACHE_TTL, document)
+        return document
+
+    def invalidate_setting(self, key):
+        self._settings.pop(key, None)
+
+    async def get_reveal_status(self, event_id=None):
+        """
+        Check if an event's Secret Santa identities have been revealed
+        """
+        settings = await self.get_setting(event_setting_key(self.resolve_event(event_id), 'reveal_status'))
+        return settings.get('revealed', False) if settings else False
+
+    async def get_collection_version(self, collection, event_id=None):
+        """
+        Same version token as Storage.get_collection_version, so the ASGI
+        handlers share response cache entries with the Flask routes
+        """
+        settings = await self.get_setting(collection_version_key(collection, self.resolve_event(event_id)))
+        return settings.get('value') if settings else None
+
+    async def get_user_santa(self, user_id, event_id=None):
+        """
+        Get the Secret Santa for a user
+        """
+        pairings = await self.pairings_collection.aggregate([
+            {'$match': {'event_id': self.resolve_event(event_id), 'chris_child_id': user_id}},
+            {'$limit': 1},
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'chris_mom_id',
+                'foreignField': '_id',
+                'as': 'santa'
+            }},
+            {'$unwind': '$santa'},
+            {'$replaceRoot': {'newRoot': '$santa'}}
+        ]).to_list(length=1)
+        return pairings[0] if pairings else None
+
+    async def get_user_with_pairing(self, user_id):
+        """
+        Get a user together with the user they are paired with (as 'paired_user')
+        """
+        users = await self.users_collection.aggregate([
+            {'$match': {'_id': user_id}},
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'paired_with',
+                'foreignField': '_id',
+                'as': 'paired_users'
+            }},
+            {'$project': {'password_hash': 0, 'paired_users.password_hash': 0}}
+        ]).to_list(length=1)
+        if not users:
+            return None
+        user = users[0]
+        paired_users = user.pop('paired_users', [])
+        user['paired_user'] = paired_users[0] if paired_users else None
+        return user
+
+    def find_tasks(self, projection=None, after=None, limit=None, event_id=None):
+        """
+        Async cursor over an event's tasks ordered by (scheduled_date, _id)
+        """
+        query = {'event_id': self.resolve_event(event_id)}
+        if after:
+            scheduled_date, task_id = after
+            query['$or'] = [
+                {'scheduled_date': {'$gt': scheduled_date}},
+                {'scheduled_date': scheduled_date, '_id': {'$gt': task_id}}
+            ]
+
+        cursor = self.tasks_collection.find(query, projection).sort([('scheduled_date', 1), ('_id', 1)])
+        return cursor.limit(limit) if limit else cursor
+
+    async def get_user_tasks(self, user_id, event_id=None):
+        """
+        Get a user's tasks that are released or due. The scheduled date is
+        checked too, so tasks show up on time when the release scheduler is
+        off or has not run yet, and tasks from before the released flag count
+        """
+        return await self.tasks_collection.find({
+            'event_id': self.resolve_event(event_id),
+            'assigned_to': user_id,
+            '$or': [{'released': True}, {'scheduled_date': {'$lte': datetime.utcnow()}}]
+        }).sort('scheduled_date', -1).to_list(length=None)
@@ -0,0 +1,170 @@
+# backend/audit.py
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class AuditLog:
+    """
+    Write-behind activity log (logins, task completions, re-pairings, reveal
+    toggles). Request threads only append to a bounded in-memory queue; a
+    writer thread drains it and hands batches to the storage backend's
+    write_audit_events once `batch_size` records are waiting or the oldest
+    has waited `flush_interval` seconds.
+
+    When the queue is full, record() waits up to `block_timeout` seconds for
+    room (backpressure) and then drops the record; both are counted. stop()
+    flushes everything still queued, and start() registers it to run at exit
+    """
+    def __init__(self, storage, max_queue=10000, batch_size=500, flush_interval=1.0, block_timeout=0.0,
+                 enabled=True):
+        self.storage = storage
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.enabled = enabled
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.counters = {
+            'recorded': 0,  # Accepted into the queue
+            'written': 0,
+            'dropped': 0,  # Queue still full after block_timeout
+            'blocked': 0,  # record() calls that had to wait for room
+            'failed': 0,  # Records in batches the backend rejected
+            'flushes': 0
+        }
+
+    def start(self):
+        """
+        Start the writer thread (idempotent)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-log', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        """
+        Flush what is queued and stop the writer thread
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        else:
+            self._write(self._drain(self._queue.qsize())[0])
+
+    def record(self, action, event_id=None, actor=None, **details):
+        """
+        Queue one record without touching storage
+        """
+        if not self.enabled:
+            return
+        entry = {
+            'event_id': event_id,
+            'action': action,
+            'actor': actor,
+            'at': datetime.utcnow(),
+            'details': details
+        }
+        try:
+            self._queue.put_nowait(entry)
+            counter = 'recorded'
+        except queue.Full:
+            counter = 'dropped'
+            if self.block_timeout > 0:
+                self._count('blocked')
+                try:
+                    self._queue.put(entry, timeout=self.block_timeout)
+                    counter = 'recorded'
+                except queue.Full:
+                    pass
+        self._count(counter)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, 'queued': self._queue.qsize()}
+
+    def render(self):
+        """
+        Prometheus text-format lines for /metrics
+        """
+        stats = self.stats()
+        lines = ['# TYPE santa_audit_log_queued gauge', f"santa_audit_log_queued {stats.pop('queued')}"]
+        for key, value in stats.items():
+            name = f'santa_audit_log_{key}_total'
+            lines += [f'# TYPE {name} counter', f'{name} {value}']
+        return lines
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def _drain(self, limit):
+        """
+        Up to `limit` queued records without waiting, and whether stop() was seen
+        """
+        batch = []
+        while len(batch) < limit:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        batch = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = None
+            if entry is _STOP:
+                stopping = True
+            elif entry is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(entry)
+                more, stopping = self._drain(self.batch_size - len(batch))
+                batch += more
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+
+        # Shutting down: write whatever arrived after the stop request too
+        while True:
+            batch = self._drain(self.batch_size)[0]
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            self.storage.write_audit_events(batch)
+            self._count('written', len(batch))
+        except Exception:
+            logger.exception("Dropping %d audit records that could not be written", len(batch))
+            self._count('failed', len(batch))
+        self._count('flushes')
@@ -0,0 +1,113 @@
+# backend/benchmarks/encode_tasks.py
+#
+# Micro-benchmark of the /tasks/all response path: formatting projected task
+# documents and encoding the response. Compares the previous path (strftime
+# per task, then Flask's jsonify) with serialization.py's formatters on each
+# available JSON_ENCODER, and checks they all decode to the same payload.
+#
+#   python benchmarks/encode_tasks.py
+#   python benchmarks/encode_tasks.py --tasks 50000 --repeat 20
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+from loadgen import percentile
+from serialization import JsonEncoder, OrjsonEncoder, format_task, orjson
+
+def legacy_format_task(task):
+    """
+    The task formatter as it was before serialization.py
+    """
+    return {
+        "id": str(task['_id']),
+        "title": task['title'],
+        "description": task.get('description', ''),
+        "penalty": task.get('penalty', ''),
+        "status": task.get('status', 'pending'),
+        "assigned_to_name": task.get('assigned_to_name'),
+        "completed": task.get('completed', False),
+        "scheduled_date": task.get('scheduled_date').strftime('%Y-%m-%d') if task.get('scheduled_date') else None
+    }
+
+def make_tasks(count):
+    """
+    Documents shaped like a TASK_LIST_PROJECTION read
+    """
+    start = datetime(2024, 12, 1)
+    return [{
+        '_id': str(uuid.uuid4()),
+        'title': f'Task {i}',
+        'description': 'Leave a small surprise on their desk before lunch',
+        'penalty': 'Sing a carol' if i % 3 == 0 else '',
+        'status': 'completed' if i % 4 == 0 else 'pending',
+        'assigned_to_name': f'Participant {i % 500}',
+        'completed': i % 4 == 0,
+        'scheduled_date': start + timedelta(days=i % 30)
+    } for i in range(count)]
+
+def measure(tasks, formatter, encode, repeat):
+    """
+    Time formatting and encoding separately; returns millisecond stats and the body
+    """
+    format_ms, encode_ms = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = {"tasks": [formatter(task) for task in tasks]}
+        formatted = time.perf_counter()
+        body = encode(payload)
+        finished = time.perf_counter()
+        format_ms.append((formatted - started) * 1000)
+        encode_ms.append((finished - formatted) * 1000)
+    total_ms = [f + e for f, e in zip(format_ms, encode_ms)]
+    return {
+        'format_p50_ms': round(percentile(format_ms, 50), 2),
+        'encode_p50_ms': round(percentile(encode_ms, 50), 2),
+        'total_p50_ms': round(percentile(total_ms, 50), 2),
+        'total_min_ms': round(min(total_ms), 2),
+        'bytes': len(body)
+    }, body
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark task list formatting and JSON encoding')
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.tasks)
+    app = Flask(__name__)
+    paths = {'jsonify': (legacy_format_task, lambda payload: jsonify(payload).get_data())}
+    paths['json'] = (format_task, JsonEncoder().dumps)
+    if orjson:
+        paths['orjson'] = (format_task, OrjsonEncoder().dumps)
+
+    results, payloads = {}, {}
+    with app.app_context():
+        for name, (formatter, encode) in paths.items():
+            results[name], body = measure(tasks, formatter, encode, args.repeat)
+            payloads[name] = json.loads(body)
+
+    baseline = results['jsonify']['total_p50_ms']
+    for name, result in results.items():
+        result['speedup'] = round(baseline / result['total_p50_ms'], 2) if result['total_p50_ms'] else None
+        result['same_payload'] = payloads[name] == payloads['jsonify']
+        print(f"{name:8} format {result['format_p50_ms']:>8} ms  encode {result['encode_p50_ms']:>8} ms  "
+              f"total {result['total_p50_ms']:>8} ms  x{result['speedup']}", file=sys.stderr)
+
+    print(json.dumps({
+        'meta': {'tasks': args.tasks, 'repeat': args.repeat, 'python': platform.python_version(),
+                 'orjson': orjson.__version__ if orjson else None},
+        'paths': results
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# backend/benchmarks/loadgen.py
+#
+# Small asyncio HTTP load-generation helpers shared by the load-test scripts.
+
+import asyncio
+import math
+import time
+from collections import defaultdict
+
+from config import Config
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+class Recorder:
+    """
+    Collect (timestamp, name, latency, ok) samples for every request made
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.samples = []
+
+    async def request(self, client, method, url, name=None, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code in expect
+        except Exception:
+            response, ok = None, False
+        self.samples.append((started - self.started, name or url, time.perf_counter() - started, ok))
+        return response
+
+    def summary(self, samples=None):
+        """
+        Per-endpoint and overall count, error rate, throughput and latency percentiles (ms)
+        """
+        samples = self.samples if samples is None else samples
+        if not samples:
+            return {}
+        elapsed = max(at + latency for at, _, latency, _ in samples) - min(at for at, _, _, _ in samples)
+        groups = defaultdict(list)
+        for sample in samples:
+            groups[sample[1]].append(sample)
+            groups['all'].append(sample)
+
+        return {name: {
+            'requests': len(group),
+            'error_rate': round(sum(1 for sample in group if not sample[3]) / len(group), 4),
+            'rps': round(len(group) / elapsed, 1) if elapsed else None,
+            'p50_ms': round(percentile([sample[2] for sample in group], 50) * 1000, 2),
+            'p99_ms': round(percentile([sample[2] for sample in group], 99) * 1000, 2)
+        } for name, group in groups.items()}
+
+    def timeline(self, bucket_seconds=1.0):
+        """
+        Summaries over consecutive time buckets, to see how latency moves during a spike
+        """
+        buckets = defaultdict(list)
+        for sample in self.samples:
+            buckets[int(sample[0] // bucket_seconds)].append(sample)
+        return [
+            {'second': round(bucket * bucket_seconds, 2), **self.summary(buckets[bucket])['all']}
+            for bucket in sorted(buckets)
+        ]
+
+async def run_for(duration, concurrency, worker):
+    """
+    Run `worker(index)` in a loop from `concurrency` tasks until `duration` seconds pass
+    """
+    deadline = time.perf_counter() + duration
+
+    async def loop(index):
+        while time.perf_counter() < deadline:
+            await worker(index)
+
+    await asyncio.gather(*(loop(index) for index in range(concurrency)))
+
+async def gather_limited(concurrency, coroutines):
+    """
+    Await coroutines with at most `concurrency` in flight
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(limited(coroutine) for coroutine in coroutines))
+
+async def login(client, email, password=None, retries=3):
+    """
+    Log in and return the access token, or None if the server refuses. A
+    429 or 503 is retried after its Retry-After, up to `retries` times
+    """
+    for attempt in range(retries + 1):
+        response = await client.post('/api/login', json={'email': email, 'password': password or email})
+        if response.status_code == 200:
+            return response.json()['access_token']
+        if response.status_code not in (429, 503) or attempt == retries:
+            return None
+        await asyncio.sleep(float(response.headers.get('Retry-After', 1)))
+
+async def seed(client, participants, reveal=True):
+    """
+    Register benchmark participants, pair them and set the reveal status;
+    returns their emails and admin headers
+    """
+    emails = [f'loadtest{i}@bench.local' for i in range(participants)]
+    await client.get('/api/init-admin')
+    token = await login(client, Config.ADMIN_EMAIL, Config.ADMIN_PASSWORD)
+    if token is None:
+        raise RuntimeError("Admin login failed; check ADMIN_EMAIL/ADMIN_PASSWORD and the login rate limit")
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Already-registered rows come back as per-row errors, which is fine
+    await client.post('/api/admin/register-users', headers=headers, json={
+        'users': [{'full_name': f'Load Test {i}', 'email': email} for i, email in enumerate(emails)]
+    })
+    await client.post('/api/admin/create-pairings', headers=headers)
+    revealed = await client.get('/api/pairings/revealed')
+    if revealed.json().get('revealed') != reveal:
+        await client.post('/api/admin/toggle-reveal', headers=headers)
+    return emails, headers
+
+async def login_all(client, emails, concurrency):
+    """
+    Tokens for `emails` in order, None for logins the server refused
+    """
+    return await gather_limited(concurrency, [login(client, email) for email in emails])
@@ -0,0 +1,112 @@
+# backend/benchmarks/pairing_commit.py
+#
+# Compare the legacy per-pair create_pairing loop with the batched
+# replace_pairings path. Needs a running mongod; uses a scratch database.
+#
+#   python benchmarks/pairing_commit.py --uri mongodb://localhost:3002/ --sizes 100 1000 10000
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import monitoring
+from config import Config
+
+class CommandCounter(monitoring.CommandListener):
+    """
+    Count commands sent to the server (one per round trip)
+    """
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def seed_participants(db_manager, size):
+    db_manager.users_collection.delete_many({})
+    db_manager.pairings_collection.delete_many({})
+    db_manager.users_collection.insert_many([{
+        '_id': str(uuid.uuid4()),
+        'event_id': Config.DEFAULT_EVENT_ID,
+        'full_name': f'Participant {i}',
+        'email': f'participant{i}@bench.local',
+        'password_hash': '',
+        'role': 'participant',
+        'is_paired': False,
+        'paired_with': None,
+        'created_at': datetime.utcnow(),
+        'initial_password_set': False
+    } for i in range(size)])
+    ids = [user['_id'] for user in db_manager.users_collection.find({'role': 'participant'}, {'_id': 1})]
+    random.shuffle(ids)
+    return [(ids[i], ids[(i + 1) % len(ids)]) for i in range(len(ids))]
+
+def legacy_commit(db_manager, pairs):
+    db_manager.clear_pairings()
+    for santa_id, recipient_id in pairs:
+        db_manager.create_pairing(santa_id, recipient_id)
+
+def batched_commit(db_manager, pairs):
+    db_manager.replace_pairings(pairs)
+
+def measure(counter, fn, *args):
+    counter.count = 0
+    started = time.perf_counter()
+    fn(*args)
+    return {
+        'round_trips': counter.count,
+        'wall_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pairing commits')
+    parser.add_argument('--uri', default=Config.MONGODB_URI)
+    parser.add_argument('--database', default='chris_mom_game_bench')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--skip-legacy-above', type=int, default=10000,
+                        help='Skip the slow per-pair loop for larger sizes')
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    # Imported after registering the listener so the client picks it up
+    from models import DatabaseManager
+
+    class BenchConfig(Config):
+        MONGODB_URI = args.uri
+        DATABASE_NAME = args.database
+
+    db_manager = DatabaseManager(BenchConfig)
+    db_manager.ensure_indexes()
+    results = []
+    try:
+        for size in args.sizes:
+            pairs = seed_participants(db_manager, size)
+            result = {'participants': size}
+            if size <= args.skip_legacy_above:
+                result['legacy'] = measure(counter, legacy_commit, db_manager, pairs)
+            result['batched'] = measure(counter, batched_commit, db_manager, pairs)
+            result['transactional'] = db_manager.supports_transactions()
+            results.append(result)
+            print(json.dumps(result), file=sys.stderr)
+    finally:
+        db_manager.client.drop_database(args.database)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
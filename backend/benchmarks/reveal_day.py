@@ -0,0 +1,202 @@
+# backend/benchmarks/reveal_day.py
+#
+# Reveal-day load generator. Logs in K synthetic participants and replays the
+# two traffic spikes an event sees:
+#
+#   login-burst  everyone arrives within --login-window seconds in the morning,
+#                logs in and loads their dashboard and tasks
+#   reveal       participants idle on the dashboard polling /pairings/revealed;
+#                the admin hits /admin/toggle-reveal and within --spike-window
+#                seconds every participant calls /pairings/revealed followed by
+#                /user/my-santa
+#
+# Reports latency percentiles and error rates per endpoint and per time bucket
+# as JSON. Point it at a running server, or let it start create_app() itself:
+#
+#   python app.py
+#   python benchmarks/reveal_day.py --users 500 --url http://localhost:5000
+#   python benchmarks/reveal_day.py --serve --mongomock --users 100   # no mongod needed
+#
+# With --serve the server shares the process (and GIL) with the load
+# generator, so use a separately started server for capacity numbers.
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadgen import Recorder, login_all, seed
+
+SCENARIOS = ('login-burst', 'reveal')
+
+def serve(port, use_mongomock):
+    """
+    Start create_app() on a background werkzeug server; returns the server
+    """
+    from werkzeug.serving import make_server
+    from config import Config
+
+    Config.SETTINGS_CHANGE_STREAMS = False
+    Config.RATE_LIMIT_ENABLED = False  # Every simulated participant logs in from 127.0.0.1
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # No per-request access log
+    if use_mongomock:
+        import mongomock
+        import models
+        client = mongomock.MongoClient()
+        models.MongoClient = lambda *args, **kwargs: client
+
+    from app import create_app
+    server = make_server('127.0.0.1', port, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, name='reveal-day-server', daemon=True).start()
+    return server
+
+def arrivals(count, window, rng):
+    """
+    Offsets (seconds) at which `count` users show up within `window`,
+    front-loaded the way people open the app as they get to their desks
+    """
+    return sorted(window * rng.betavariate(1.5, 4) for _ in range(count))
+
+async def login_burst(client, emails, args, rng):
+    """
+    Every participant logs in within the login window, then loads their
+    dashboard and tasks. Returns the recorder and the tokens obtained
+    """
+    recorder = Recorder()
+    tokens = [None] * len(emails)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+
+    async def arrive(index, offset):
+        await asyncio.sleep(max(0, offset - (time.perf_counter() - started)))
+        async with semaphore:
+            response = await recorder.request(client, 'POST', '/api/login', json={
+                'email': emails[index], 'password': emails[index]
+            })
+            if response is None or response.status_code != 200:
+                return
+            tokens[index] = response.json()['access_token']
+            headers = {'Authorization': f'Bearer {tokens[index]}'}
+            await recorder.request(client, 'GET', '/api/user/dashboard', headers=headers)
+            await recorder.request(client, 'GET', '/api/tasks/user', headers=headers)
+
+    await asyncio.gather(*(
+        arrive(index, offset)
+        for index, offset in zip(rng.sample(range(len(emails)), len(emails)),
+                                 arrivals(len(emails), args.login_window, rng))
+    ))
+    return recorder, tokens
+
+async def reveal_spike(client, tokens, admin_headers, args, rng):
+    """
+    Participants poll the reveal flag; once the admin toggles it, each one
+    re-checks within the spike window and fetches their Santa. Returns the
+    recorder, when the toggle happened and how many stale reads were seen
+    """
+    recorder = Recorder()
+    revealed_at = asyncio.Event()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    stale_reads = 0
+    toggled_at = None
+
+    async def participant(token):
+        nonlocal stale_reads
+        headers = {'Authorization': f'Bearer {token}'}
+        # Background polling before the reveal, like an open dashboard
+        while not revealed_at.is_set():
+            try:
+                await asyncio.wait_for(revealed_at.wait(), args.poll_interval * rng.uniform(0.5, 1.5))
+            except asyncio.TimeoutError:
+                async with semaphore:
+                    await recorder.request(client, 'GET', '/api/pairings/revealed',
+                                           name='/api/pairings/revealed (poll)', headers=headers)
+
+        await asyncio.sleep(args.spike_window * rng.random())
+        async with semaphore:
+            for _ in range(args.max_retries + 1):
+                response = await recorder.request(client, 'GET', '/api/pairings/revealed', headers=headers)
+                if response is not None and response.status_code == 200 and response.json().get('revealed'):
+                    break
+                stale_reads += 1
+                await asyncio.sleep(0.5)
+            else:
+                return
+            await recorder.request(client, 'GET', '/api/user/my-santa', headers=headers)
+
+    async def admin():
+        nonlocal toggled_at
+        await asyncio.sleep(args.pre_reveal)
+        toggled_at = round(time.perf_counter() - recorder.started, 2)
+        response = await recorder.request(client, 'POST', '/api/admin/toggle-reveal', headers=admin_headers)
+        revealed_at.set()
+        return response
+
+    results = await asyncio.gather(admin(), *(participant(token) for token in tokens if token))
+    if results[0] is None or not results[0].json().get('revealed'):
+        print("warning: toggle-reveal did not reveal the pairings", file=sys.stderr)
+    return recorder, toggled_at, stale_reads
+
+def report(recorder, bucket_seconds, **extra):
+    return {**extra, 'endpoints': recorder.summary(), 'timeline': recorder.timeline(bucket_seconds)}
+
+async def main(args):
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        emails, admin_headers = await seed(client, args.users, reveal=False)
+        scenarios = args.scenarios.split(',')
+        results = {}
+
+        if 'login-burst' in scenarios:
+            recorder, tokens = await login_burst(client, emails, args, rng)
+            results['login-burst'] = report(recorder, args.bucket, users=len(emails),
+                                            window_seconds=args.login_window)
+        else:
+            tokens = await login_all(client, emails, args.concurrency)
+
+        if 'reveal' in scenarios:
+            recorder, toggled_at, stale_reads = await reveal_spike(client, tokens, admin_headers, args, rng)
+            results['reveal'] = report(recorder, args.bucket, users=sum(1 for token in tokens if token),
+                                       toggled_at_second=toggled_at, window_seconds=args.spike_window,
+                                       stale_reads=stale_reads)
+
+    for name, result in results.items():
+        overall = result['endpoints'].get('all', {})
+        worst = max(result['timeline'], key=lambda bucket: bucket['p99_ms'], default={})
+        print(f"{name}: {overall.get('requests', 0)} requests, p50 {overall.get('p50_ms')} ms, "
+              f"p99 {overall.get('p99_ms')} ms, errors {overall.get('error_rate', 0):.2%}; "
+              f"worst second {worst.get('second')} (p99 {worst.get('p99_ms')} ms)", file=sys.stderr)
+    print(json.dumps({'url': args.url, 'seed': args.seed, 'scenarios': results}, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate reveal-day traffic spikes')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--serve', action='store_true', help='Start create_app() in-process on --port')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--mongomock', action='store_true', help='With --serve, use mongomock instead of a mongod')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated subset of ' + ', '.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=100, help='Maximum requests in flight')
+    parser.add_argument('--login-window', type=float, default=10, help='Seconds over which users log in')
+    parser.add_argument('--pre-reveal', type=float, default=3, help='Seconds of polling before the toggle')
+    parser.add_argument('--poll-interval', type=float, default=5, help='Seconds between background reveal polls')
+    parser.add_argument('--spike-window', type=float, default=5, help='Seconds after the toggle in which users react')
+    parser.add_argument('--max-retries', type=int, default=5, help='Re-checks of a stale reveal flag per user')
+    parser.add_argument('--bucket', type=float, default=1.0, help='Timeline bucket size in seconds')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.mongomock)
+        args.url = f'http://127.0.0.1:{args.port}'
+    asyncio.run(main(args))
@@ -0,0 +1,67 @@
+# backend/benchmarks/serving_modes.py
+#
+# Compare the sync (Flask/WSGI) and async (ASGI/Motor) serving modes under the
+# same participant read workload. Start both against the same local mongod:
+#
+#   python app.py                                   # sync, :5000
+#   uvicorn asgi:app --port 5001 --workers 1        # async, :5001
+#   python benchmarks/serving_modes.py --participants 200 --concurrency 64 --duration 30
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadgen import Recorder, login_all, run_for, seed
+
+READ_PATHS = [
+    '/api/pairings/revealed',
+    '/api/user/my-santa',
+    '/api/user/paired-info',
+    '/api/user/check-password-status',
+    '/api/tasks/all?limit=50'
+]
+
+async def measure(name, base_url, emails, concurrency, duration):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        tokens = [token for token in await login_all(client, emails, concurrency) if token]
+        if not tokens:
+            raise RuntimeError(f"No participant could log in to {base_url}")
+        recorder = Recorder()
+
+        async def worker(index):
+            token = tokens[index % len(tokens)]
+            path = random.choice(READ_PATHS)
+            await recorder.request(client, 'GET', path, name=path.split('?')[0],
+                                   headers={'Authorization': f'Bearer {token}'})
+
+        await run_for(duration, concurrency, worker)
+    return {'mode': name, 'url': base_url, 'endpoints': recorder.summary()}
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.sync_url, timeout=120) as client:
+        emails, _ = await seed(client, args.participants)
+    results = []
+    for name, url in (('sync', args.sync_url), ('async', args.async_url)):
+        result = await measure(name, url, emails, args.concurrency, args.duration)
+        overall = result['endpoints']['all']
+        print(f"{name}: {overall['rps']} req/s, p50 {overall['p50_ms']} ms, "
+              f"p99 {overall['p99_ms']} ms, errors {overall['error_rate']:.2%}", file=sys.stderr)
+        results.append(result)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare sync and async serving modes')
+    parser.add_argument('--sync-url', default='http://localhost:5000')
+    parser.add_argument('--async-url', default='http://localhost:5001')
+    parser.add_argument('--participants', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=30)
+    asyncio.run(main(parser.parse_args()))
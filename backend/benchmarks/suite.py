@@ -0,0 +1,233 @@
+# backend/benchmarks/suite.py
+#
+# In-process benchmark of the key API flows. Seeds users, pairings and tasks
+# through DatabaseManager, then drives each flow through the Flask test client
+# and reports throughput, latency percentiles and Mongo commands per request
+# as JSON. Save a run and pass it to --compare on a later commit:
+#
+#   python benchmarks/suite.py --uri mongodb://localhost:27017 --output before.json
+#   python benchmarks/suite.py --uri mongodb://localhost:27017 --compare before.json
+#   python benchmarks/suite.py --mongomock --fast-hash        # no mongod needed
+#   python benchmarks/suite.py --storage sqlite --fast-hash   # embedded backend
+#
+# Runs against a scratch database that is dropped first. mongomock emits no
+# command events, so Mongo command counts are only reported against mongod;
+# the SQLite backend counts its statements instead.
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from loadgen import percentile
+from storage import STORAGE_BACKENDS
+
+FLOWS = ('register-users', 'create-pairings', 'login', 'tasks/all', 'admin/pairings', 'my-santa')
+
+def configure(args):
+    Config.STORAGE_BACKEND = args.storage
+    Config.DATABASE_NAME = args.database
+    Config.SETTINGS_CHANGE_STREAMS = False
+    # Keep background writes out of the numbers
+    Config.TASK_RELEASE_ENABLED = False
+    Config.AUDIT_LOG_ENABLED = False
+    Config.RATE_LIMIT_ENABLED = False  # The flows repeat one admin call far more often than the limits allow
+    Config.SLOW_REQUEST_MS = None
+    if args.fast_hash:
+        # Measure everything but PBKDF2 itself
+        Config.PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+    if args.storage == 'sqlite':
+        Config.SQLITE_PATH = args.sqlite_path
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.sqlite_path + suffix):
+                os.remove(args.sqlite_path + suffix)
+    elif args.mongomock:
+        import mongomock
+        import models
+        client = mongomock.MongoClient()
+        models.MongoClient = lambda *args, **kwargs: client
+    else:
+        Config.MONGODB_URI = args.uri
+
+def seed(db_manager, users, tasks):
+    """
+    Seed participants, a full set of pairings, tasks spread over 30 days and a
+    revealed event, all through DatabaseManager
+    """
+    from pairing import PairingConstraints, solve_pairings
+
+    if Config.STORAGE_BACKEND == 'mongo':
+        db_manager.client.drop_database(Config.DATABASE_NAME)
+        db_manager.ensure_indexes()
+
+    emails = [f'bench{i}@bench.local' for i in range(users)]
+    user_ids = []
+    for start in range(0, users, Config.IMPORT_BATCH_SIZE):
+        batch = [(f'Bench User {i}', emails[i]) for i in range(start, min(start + Config.IMPORT_BATCH_SIZE, users))]
+        inserted_ids, _ = db_manager.create_participant_users(batch)
+        user_ids.extend(inserted_ids[index] for index in sorted(inserted_ids))
+
+    result = solve_pairings(user_ids, PairingConstraints(), engine=Config.PAIRING_ENGINE, seed=1)
+    db_manager.replace_pairings(result['pairs'])
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    db_manager.create_tasks([
+        (user_ids[i % users], f'Bench task {i}', 'Benchmark task', '', today + timedelta(days=i % 30 - 15))
+        for i in range(tasks)
+    ], batch_size=Config.TASK_INSERT_BATCH_SIZE)
+
+    if not db_manager.get_reveal_status():
+        db_manager.toggle_reveal_status()
+    return emails
+
+def login(client, email, password):
+    response = client.post('/api/login', json={'email': email, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def command_count(db_manager):
+    return {command: values[0] for command, values in db_manager.command_metrics.totals.items()}
+
+def run_flow(client, db_manager, iterations, request):
+    """
+    Call `request(i)` `iterations` times; returns throughput, latency and
+    Mongo command stats
+    """
+    before = command_count(db_manager)
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        request_started = time.perf_counter()
+        response = request(i)
+        latencies.append((time.perf_counter() - request_started) * 1000)
+        errors += response.status_code >= 400
+    elapsed = time.perf_counter() - started
+
+    after = command_count(db_manager)
+    commands = {command: after[command] - before.get(command, 0)
+                for command in after if after[command] != before.get(command, 0)}
+    return {
+        'requests': iterations,
+        'errors': errors,
+        'throughput_rps': round(iterations / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'db_ops_per_request': round(sum(commands.values()) / iterations, 2) if commands else None,
+        'db_ops': commands or None
+    }
+
+def build_flows(client, db_manager, emails, args):
+    admin = login(client, Config.ADMIN_EMAIL, Config.ADMIN_PASSWORD)
+    participants = [login(client, email, email) for email in emails[:args.sessions]]
+    rng = random.Random(args.seed)
+    run_id = int(time.time())
+
+    return {
+        'register-users': lambda i: client.post('/api/admin/register-users', headers=admin, json={'users': [
+            {'full_name': f'New User {i}-{j}', 'email': f'new{run_id}-{i}-{j}@bench.local'}
+            for j in range(args.register_batch)
+        ]}),
+        'create-pairings': lambda i: client.post('/api/admin/create-pairings', headers=admin, json={'seed': i}),
+        'login': lambda i: client.post('/api/login', json={
+            'email': (email := rng.choice(emails)), 'password': email
+        }),
+        'tasks/all': lambda i: client.get('/api/tasks/all'),
+        'admin/pairings': lambda i: client.get('/api/admin/pairings', headers=admin),
+        'my-santa': lambda i: client.get('/api/user/my-santa', headers=participants[i % len(participants)])
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous, current):
+    """
+    Print throughput and p99 changes against an earlier run to stderr
+    """
+    for flow, result in current['flows'].items():
+        before = previous.get('flows', {}).get(flow)
+        if not before:
+            continue
+        throughput = result['throughput_rps'] / before['throughput_rps'] - 1 if before['throughput_rps'] else 0
+        p99 = result['p99_ms'] / before['p99_ms'] - 1 if before['p99_ms'] else 0
+        print(f"{flow:16} throughput {throughput:+.1%}  p99 {p99:+.1%}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the key API flows in-process')
+    parser.add_argument('--uri', default=Config.MONGODB_URI)
+    parser.add_argument('--database', default='secret_santa_bench')
+    parser.add_argument('--mongomock', action='store_true', help='Use mongomock instead of a mongod')
+    parser.add_argument('--storage', choices=STORAGE_BACKENDS, default='mongo', help='Storage backend to benchmark')
+    parser.add_argument('--sqlite-path', default=os.path.join(tempfile.gettempdir(), 'secret_santa_bench.db'),
+                        help='Scratch database file for --storage sqlite (deleted first)')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--iterations', type=int, default=200, help='Requests per flow')
+    parser.add_argument('--flows', default=','.join(FLOWS), help='Comma-separated subset of ' + ', '.join(FLOWS))
+    parser.add_argument('--register-batch', type=int, default=20, help='Users per register-users request')
+    parser.add_argument('--sessions', type=int, default=50, help='Participants logged in for my-santa')
+    parser.add_argument('--fast-hash', action='store_true', help='Cheap PBKDF2 rounds so hashing does not dominate')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Also write the JSON report here')
+    parser.add_argument('--compare', help='Earlier JSON report to compare against')
+    args = parser.parse_args()
+
+    configure(args)
+    from app import create_app
+
+    app = create_app()
+    db_manager = app.extensions['db_manager']
+    client = app.test_client()
+
+    seed_started = time.perf_counter()
+    emails = seed(db_manager, args.users, args.tasks)
+    client.get('/api/init-admin')
+    seed_seconds = time.perf_counter() - seed_started
+
+    flows = build_flows(client, db_manager, emails, args)
+    results = {}
+    for flow in args.flows.split(','):
+        if flow not in flows:
+            parser.error(f"Unknown flow '{flow}'")
+        iterations = min(args.iterations, 20) if flow == 'create-pairings' else args.iterations
+        results[flow] = run_flow(client, db_manager, iterations, flows[flow])
+        print(f"{flow:16} {results[flow]['throughput_rps']:>9} req/s  p50 {results[flow]['p50_ms']} ms  "
+              f"p99 {results[flow]['p99_ms']} ms", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'backend': args.storage if args.storage != 'mongo' else 'mongomock' if args.mongomock else 'mongod',
+            'users': args.users,
+            'tasks': args.tasks,
+            'password_hash_method': Config.PASSWORD_HASH_METHOD,
+            'python': platform.python_version(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'seed_seconds': round(seed_seconds, 2)
+        },
+        'flows': results
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
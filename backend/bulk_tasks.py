@@ -0,0 +1,129 @@
+# backend/bulk_tasks.py
+#
+# Expands a task template over a date range and an assignment strategy into
+# individual task specs for DatabaseManager.create_tasks:
+#
+#   everyone     every participant gets the task on every date
+#   round-robin  each date goes to the next participant in turn
+#   per-pair     every Santa gets the task on every date, with their
+#                recipient's name available to the template
+
+import re
+from datetime import datetime, timedelta
+
+ASSIGNMENT_STRATEGIES = ('everyone', 'round-robin', 'per-pair')
+TEMPLATE_FIELDS = ('assignee', 'recipient', 'date')
+PLACEHOLDER = re.compile(r'\{\{|\}\}|\{([^{}]*)\}')
+
+class BulkTaskError(Exception):
+    pass
+
+def parse_date_range(start, end, max_days=None):
+    """
+    List every date from `start` to `end` inclusive ('%Y-%m-%d' strings),
+    refusing ranges longer than `max_days` before building the list
+    """
+    try:
+        start_date = datetime.strptime(start, '%Y-%m-%d')
+        end_date = datetime.strptime(end or start, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise BulkTaskError("start_date and end_date must be YYYY-MM-DD dates")
+    if end_date < start_date:
+        raise BulkTaskError("end_date is before start_date")
+    days = (end_date - start_date).days + 1
+    if max_days and days > max_days:
+        raise BulkTaskError(f"The date range spans {days} days; the limit is {max_days}")
+    return [start_date + timedelta(days=offset) for offset in range(days)]
+
+def parse_offset(value):
+    """
+    The round-robin starting position: a non-negative integer
+    """
+    try:
+        offset = int(value or 0)
+    except (TypeError, ValueError):
+        raise BulkTaskError("offset must be an integer")
+    if offset < 0:
+        raise BulkTaskError("offset must not be negative")
+    return offset
+
+def render(text, **values):
+    """
+    Fill {assignee}, {recipient} and {date} placeholders in a template field.
+    Only those names are substituted (no attribute or index lookups); {{ and
+    }} are literal braces
+    """
+    if not isinstance(text, str):
+        raise BulkTaskError("Task template fields must be strings")
+
+    def substitute(match):
+        if match.group(0) in ('{{', '}}'):
+            return match.group(0)[0]
+        name = match.group(1)
+        if name not in values:
+            raise BulkTaskError(f"Bad placeholder in task template: {match.group(0)}; "
+                                f"use {', '.join('{' + field + '}' for field in TEMPLATE_FIELDS)}")
+        return values[name]
+
+    return PLACEHOLDER.sub(substitute, text)
+
+def assignee_pairs(participants, pairs):
+    """
+    The (santa_id, recipient_id) pairs whose Santa is one of `participants`
+    """
+    assignee_ids = {user_id for user_id, _ in participants}
+    return [(santa_id, recipient_id) for santa_id, recipient_id in pairs or [] if santa_id in assignee_ids]
+
+def count_tasks(days, strategy, participants, pairs=None):
+    """
+    How many tasks plan_tasks will produce over `days` dates, worked out
+    without expanding them, so oversized requests are refused up front
+    """
+    if strategy not in ASSIGNMENT_STRATEGIES:
+        raise BulkTaskError(f"Unknown strategy '{strategy}', expected one of {', '.join(ASSIGNMENT_STRATEGIES)}")
+    if not participants:
+        raise BulkTaskError("No participants to assign tasks to")
+    if strategy == 'everyone':
+        return days * len(participants)
+    if strategy == 'round-robin':
+        return days
+    pairs = assignee_pairs(participants, pairs)
+    if not pairs:
+        raise BulkTaskError("per-pair assignment needs pairings; create pairings first")
+    return days * len(pairs)
+
+def plan_tasks(template, dates, strategy, participants, pairs=None, offset=0, names=None):
+    """
+    Yield (assignee_id, title, description, penalty, scheduled_date) for
+    every task the strategy produces. `participants` is an ordered list of
+    (user_id, full_name) to assign to; `pairs` is a list of (santa_id,
+    recipient_id); `names` maps every participant's id to their name, for
+    recipients outside `participants`
+    """
+    count_tasks(len(dates), strategy, participants, pairs)
+
+    name_of = {**(names or {}), **dict(participants)}
+    if strategy == 'everyone':
+        assignments = [[(user_id, None) for user_id, _ in participants]] * len(dates)
+    elif strategy == 'round-robin':
+        assignments = [
+            [(participants[(offset + day) % len(participants)][0], None)]
+            for day in range(len(dates))
+        ]
+    else:
+        assignments = [assignee_pairs(participants, pairs)] * len(dates)
+
+    for scheduled_date, day_assignments in zip(dates, assignments):
+        for assignee_id, recipient_id in day_assignments:
+            values = {
+                'assignee': name_of[assignee_id],
+                'recipient': name_of.get(recipient_id, ''),
+                'date': scheduled_date.strftime('%Y-%m-%d')
+            }
+            yield (
+                assignee_id,
+                render(template['title'], **values),
+                render(template.get('description', ''), **values),
+                render(template.get('penalty', ''), **values),
+                scheduled_date
+            )
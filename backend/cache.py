@@ -0,0 +1,109 @@
+# backend/cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Thread-safe cache whose entries expire `ttl` seconds after being set.
+    Holds at most `max_entries`, evicting the least recently used
+    """
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class ResponseCache:
+    """
+    Encoded response bodies keyed on (route, arguments), each stored with the
+    data version it was built from and a strong ETag of its bytes. Entries
+    expire after `ttl` seconds; the least recently used are evicted to keep
+    the bodies within `max_bytes`
+    """
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, version, etag, body)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """
+        (etag, body) cached for `key` at `version`, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != version or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def set(self, key, version, body):
+        """
+        Store an encoded body; returns its (etag, body). Bodies larger than
+        the whole budget are not kept
+        """
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        if len(body) > self.max_bytes:
+            return etag, body
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._bytes -= len(previous[3])
+            self._entries[key] = (time.monotonic() + self.ttl, version, etag, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[3])
+                self.evictions += 1
+        return etag, body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
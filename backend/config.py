@@ -1,16 +1,34 @@
 # backend/config.py
 
+import os
 import secrets
 
 # Configuration settings for the Chris Mom and Child Game application
 class Config:
+    # Storage backend: 'mongo' (MongoDB) or 'sqlite' (embedded, single node; see storage.py)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+    SQLITE_PATH = os.environ.get('SQLITE_PATH', 'chris_mom_game.db')  # ':memory:' for throwaway runs
+    SQLITE_BUSY_TIMEOUT_MS = 5000  # How long a writer waits for the write lock
+    SQLITE_CACHED_STATEMENTS = 256  # Prepared statements kept per connection
+
     # MongoDB Configuration
-    MONGODB_URI = 'mongodb://localhost:3002/'
-    DATABASE_NAME = 'chris_mom_game'
+    MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:3002/')
+    DATABASE_NAME = os.environ.get('DATABASE_NAME', 'chris_mom_game')
+
+    # MongoDB Connection Pool (one pool per worker process)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 300000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 10000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_WRITE_CONCERN = os.environ.get('MONGO_WRITE_CONCERN', '1')  # e.g. '1' or 'majority'
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')  # e.g. 'primaryPreferred'
 
     # JWT Configuration
-    SECRET_KEY = secrets.token_hex(32)  # Generates a secure random 32-byte hex key
+    # Set SECRET_KEY in the environment when running several workers so they share it
+    SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(32)  # Generates a secure random 32-byte hex key
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour token expiration
+    JWT_TOKEN_LOCATION = ['headers', 'query_string']  # Query string for EventSource (/api/events?jwt=)
 
     # Application Settings
     DEBUG = True
@@ -20,3 +38,99 @@ class Config:
     ADMIN_EMAIL = "admin@christmom.com"
     ADMIN_PASSWORD = "Admin@123"  # You should change this to a secure password
 
+    # Refuse to start if any known query shape is answered by a collection scan
+    INDEX_AUDIT_ON_START = os.environ.get('INDEX_AUDIT_ON_START', '').lower() in ('1', 'true', 'yes')
+
+    # Bulk Import Settings
+    IMPORT_BATCH_SIZE = 1000  # Rows per insert_many batch
+    IMPORT_HASH_WORKERS = None  # Process pool size for password hashing (None = CPU count)
+    IMPORT_PARALLEL_THRESHOLD = 64  # Smaller batches are hashed in-process
+
+    # Events (each office group's game is isolated by event_id)
+    DEFAULT_EVENT_ID = os.environ.get('DEFAULT_EVENT_ID', 'default')  # Used when a request names no event
+
+    # Bulk Task Settings
+    TASK_INSERT_BATCH_SIZE = 1000  # Tasks per insert_many in bulk task creation
+    BULK_TASK_LIMIT = 100000  # Largest number of tasks one bulk request may create
+    BULK_TASK_MAX_DAYS = 366  # Longest date range one bulk request may span
+
+    # Event Export / Restore (see snapshots.py)
+    EXPORT_BATCH_SIZE = 1000  # Documents per cursor batch while streaming an export
+    EXPORT_COMPRESSION_LEVEL = 6  # gzip level, 1 (fastest) to 9 (smallest)
+    RESTORE_BATCH_SIZE = 1000  # Documents per insert_many while restoring
+    # Restores and bulk task creation share one gate per event; a restore only
+    # clears a failed load while it still holds the gate
+    BULK_WRITE_GATE_TTL = 900  # Seconds before a crashed worker's claim on an event's restore or bulk run lapses
+
+    # Pairing Settings
+    PAIRING_ENGINE = 'derangement'  # 'derangement' (honours exclusions) or 'cycle'
+    PAIRING_GATE_WAIT = 0.0  # Seconds a create-pairings call waits for the event's running one (0 = 409 at once)
+    PAIRING_GATE_TTL = 120  # Seconds before a crashed worker's claim on an event's pairing run lapses
+
+    # Rate Limiting (token bucket per client and route; see ratelimit.py)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')  # 'memory' (per worker) or 'mongo' (shared)
+    RATE_LIMITS = {  # route: (burst, tokens refilled per minute), or None for no limit
+        'login': (10, 10),  # Per address and email
+        # Per address across all emails, checked first. Off by default: an office behind NAT or a proxy
+        # shares one address, so only set it (e.g. (300, 120)) where PROXY_FIX_X_FOR exposes real clients
+        'login_address': None,
+        'init_admin': (5, 5),  # Per address
+        'create_pairings': (5, 5)  # Per admin
+    }
+    RATE_LIMIT_MAX_BUCKETS = 100000  # In-memory buckets kept before the least recently used are dropped
+    # Reverse proxies in front of the app whose X-Forwarded-For hop to trust for the client address
+    # (0 = use the socket address). uvicorn takes --proxy-headers --forwarded-allow-ips instead
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', '0'))
+
+    # List Endpoint Settings
+    MAX_PAGE_SIZE = 1000  # Upper bound for ?limit= on paginated list endpoints
+
+    # Task Batch Writes
+    TASK_BATCH_MAX_OPERATIONS = 500  # Operations accepted per /tasks/batch call
+    IDEMPOTENCY_KEY_TTL = 24 * 60 * 60  # Seconds an Idempotency-Key's response is replayed
+
+    # Settings Cache
+    SETTINGS_CACHE_TTL = 5.0  # Seconds a cached settings document (e.g. reveal status) is trusted
+    SETTINGS_POLL_INTERVAL = 1.0  # How often other workers' settings changes are picked up
+    SETTINGS_CHANGE_STREAMS = True  # Prefer change streams over polling on replica sets
+
+    # Response Encoding
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')  # 'auto', 'orjson' or 'json'; see serialization.py
+
+    # Response Cache (ETag / If-None-Match on the polled list endpoints)
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # 0 disables storage
+    RESPONSE_CACHE_TTL = 300  # Seconds an encoded body is kept while its data version is unchanged
+
+    # Server-Sent Events
+    SSE_QUEUE_SIZE = 100  # Events buffered per client before it is told to resync
+    SSE_HEARTBEAT_INTERVAL = 15  # Seconds between keep-alive comments
+    SSE_RETRY_MS = 5000  # Client reconnect delay
+
+    # Task Release Scheduler
+    TASK_RELEASE_ENABLED = os.environ.get('TASK_RELEASE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    TASK_RELEASE_BATCH_SIZE = 500  # Tasks flipped to released per update_many
+    TASK_RELEASE_REFRESH_INTERVAL = 30  # Seconds between rescans for tasks created by other workers
+    TASK_RELEASE_LEASE_TTL = 30  # Seconds before a dead worker's lease can be taken over
+
+    # Audit Log (write-behind; see audit.py)
+    AUDIT_LOG_ENABLED = os.environ.get('AUDIT_LOG_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    AUDIT_LOG_QUEUE_SIZE = 10000  # Records buffered before record() applies backpressure
+    AUDIT_LOG_BATCH_SIZE = 500  # Records per insert
+    AUDIT_LOG_FLUSH_INTERVAL = 1.0  # Seconds the oldest buffered record waits at most
+    AUDIT_LOG_BLOCK_TIMEOUT = 0.0  # Seconds record() waits on a full queue before dropping (0 drops at once)
+    AUDIT_LOG_TTL_DAYS = 90  # Records are deleted after this many days
+
+    # Instrumentation
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')  # Prometheus /metrics
+    SLOW_REQUEST_MS = float(os.environ['SLOW_REQUEST_MS']) if os.environ.get('SLOW_REQUEST_MS') else None
+
+    # Password Hashing
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:260000'  # Stored hashes with other params are upgraded on login
+    PASSWORD_SALT_LENGTH = 16
+    PASSWORD_WORKERS = 4  # Threads doing hash/verify work per process
+    PASSWORD_QUEUE_LIMIT = 64  # Extra operations allowed to wait before logins get a 503
+
+    # User Cache
+    USER_CACHE_TTL = 30  # Seconds a user document looked up by JWT identity is reused
+    USER_CACHE_SIZE = 10000
@@ -0,0 +1,92 @@
+# backend/events.py
+
+import json
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """
+    One connected client's bounded event queue
+    """
+    def __init__(self, max_queue):
+        self.queue = queue.Queue(maxsize=max_queue)
+
+    def get(self, timeout=None):
+        """
+        Next (event, data) tuple, or None if nothing arrived within `timeout`
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Slow client: throw away its backlog and tell it to refetch
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            self.queue.put_nowait(('resync', {}))
+
+class EventHub:
+    """
+    In-process pub/sub fanout. Request threads publish without blocking; a
+    dispatcher thread copies each event to every subscriber's queue. Events
+    only reach clients connected to this worker
+    """
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._inbox = queue.Queue()
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+
+    def start(self):
+        """
+        Start the dispatcher thread (idempotent)
+        """
+        with self._lock:
+            if self._dispatcher:
+                return
+            self._dispatcher = threading.Thread(target=self._dispatch, name='event-hub', daemon=True)
+        self._dispatcher.start()
+
+    def subscribe(self):
+        subscription = Subscription(self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event, data=None):
+        self._inbox.put((event, data or {}))
+
+    def _dispatch(self):
+        while True:
+            event = self._inbox.get()
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscription in subscribers:
+                try:
+                    subscription.offer(event)
+                except Exception:
+                    logger.exception("Failed to deliver %s", event[0])
+
+def format_sse(event, data):
+    """
+    Encode an event in the text/event-stream wire format
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+event_hub = EventHub()
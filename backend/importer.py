@@ -0,0 +1,105 @@
+# backend/importer.py
+
+import csv
+import io
+import json
+from itertools import islice
+
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv')
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+def iter_csv_rows(stream):
+    """
+    Lazily yield user rows from a CSV upload with full_name and email columns
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield row
+
+def iter_ndjson_rows(stream):
+    """
+    Lazily yield user rows from a newline-delimited JSON upload; a line
+    that is not valid JSON is yielded as None
+    """
+    for line in io.TextIOWrapper(stream, encoding='utf-8'):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+def iter_request_rows(request):
+    """
+    Pick a row reader based on the upload's content type. CSV and NDJSON
+    bodies are streamed; anything else is read as a JSON {"users": [...]} body
+    """
+    if request.mimetype in CSV_CONTENT_TYPES:
+        return iter_csv_rows(request.stream)
+    if request.mimetype in NDJSON_CONTENT_TYPES:
+        return iter_ndjson_rows(request.stream)
+    body = request.get_json(silent=True)
+    users = body.get('users', []) if isinstance(body, dict) else []
+    return iter(users if isinstance(users, list) else [users])
+
+def chunked(iterable, size):
+    """
+    Yield lists of at most `size` items from an iterable
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def import_participants(db_manager, rows, batch_size=1000, event_id=None):
+    """
+    Validate user rows and create them in insert_many batches. Returns the
+    registered users and a list of per-row error messages. Storage errors
+    other than per-row write errors propagate
+    """
+    registered_users = []
+    errors = []
+
+    numbered_rows = enumerate(rows, start=1)
+    for batch in chunked(numbered_rows, batch_size):
+        valid_rows = []
+        for row_number, user in batch:
+            if not isinstance(user, dict):
+                errors.append(f"Row {row_number}: Expected an object with full_name and email")
+                continue
+            full_name = user.get('full_name') or ''
+            email = user.get('email') or ''
+            if not isinstance(full_name, str) or not isinstance(email, str):
+                errors.append(f"Row {row_number}: Full name and email must be strings")
+                continue
+            full_name, email = full_name.strip(), email.strip()
+
+            # Validate data
+            if not full_name or not email:
+                errors.append(f"Row {row_number}: Full name and email are required")
+                continue
+            valid_rows.append((row_number, full_name, email))
+
+        if not valid_rows:
+            continue
+
+        inserted_ids, write_errors = db_manager.create_participant_users(
+            [(full_name, email) for _, full_name, email in valid_rows],
+            event_id=event_id
+        )
+
+        for index, (row_number, full_name, email) in enumerate(valid_rows):
+            if index in write_errors:
+                errors.append(f"Row {row_number}: {write_errors[index]}")
+                continue
+            registered_users.append({
+                'id': inserted_ids[index],
+                'full_name': full_name,
+                'email': email,
+                'note': 'Initial password is the email address'
+            })
+
+    return registered_users, errors
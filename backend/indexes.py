@@ -0,0 +1,153 @@
+# backend/indexes.py
+#
+# Managed index set and query-plan audit. Every query shape issued by
+# models.py / routes.py is listed in QUERY_SHAPES; the audit explains each one
+# and fails if any is answered by a collection scan.
+#
+#   python indexes.py --audit            # create indexes, then audit plans
+
+import argparse
+import sys
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+from pymongo.errors import OperationFailure
+
+from config import Config
+
+# Everything event-scoped is prefixed with event_id so one event's reads,
+# re-pairings and clears are index ranges that never touch another event
+INDEXES = {
+    'users': [
+        IndexModel([('event_id', ASCENDING), ('email', ASCENDING)], unique=True, name='event_id_1_email_1'),
+        IndexModel([('event_id', ASCENDING), ('role', ASCENDING), ('_id', ASCENDING)], name='event_id_1_role_1__id_1')
+    ],
+    'tasks': [
+        IndexModel([('event_id', ASCENDING), ('assigned_to', ASCENDING), ('scheduled_date', DESCENDING)],
+                   name='event_id_1_assigned_to_1_scheduled_date_-1'),
+        IndexModel([('event_id', ASCENDING), ('scheduled_date', ASCENDING), ('_id', ASCENDING)],
+                   name='event_id_1_scheduled_date_1__id_1'),
+        # The release scheduler works across all events by date
+        IndexModel([('released', ASCENDING), ('scheduled_date', ASCENDING)], name='released_1_scheduled_date_1')
+    ],
+    'pairings': [
+        IndexModel([('event_id', ASCENDING), ('chris_child_id', ASCENDING)], name='event_id_1_chris_child_id_1'),
+        IndexModel([('event_id', ASCENDING), ('chris_mom_id', ASCENDING)], name='event_id_1_chris_mom_id_1')
+    ],
+    'dashboards': [
+        IndexModel([('event_id', ASCENDING)], name='event_id_1')
+    ],
+    'idempotency_keys': [
+        IndexModel([('created_at', ASCENDING)], expireAfterSeconds=Config.IDEMPOTENCY_KEY_TTL, name='created_at_1')
+    ],
+    'rate_limits': [
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0, name='expires_at_1')
+    ],
+    'audit_log': [
+        IndexModel([('event_id', ASCENDING), ('at', ASCENDING)], name='event_id_1_at_1'),
+        IndexModel([('at', ASCENDING)], expireAfterSeconds=Config.AUDIT_LOG_TTL_DAYS * 24 * 60 * 60, name='at_1')
+    ]
+}
+
+# Indexes replaced by a managed one; dropped so writes stop maintaining them
+RETIRED_INDEXES = {
+    'users': ['email_1', 'role_1__id_1'],
+    'tasks': ['assigned_to_1', 'assigned_to_1_scheduled_date_-1', 'scheduled_date_1__id_1'],
+    'pairings': ['chris_child_id_1', 'chris_mom_id_1']
+}
+
+# (collection, description, filter, sort) for every selective query the app runs
+QUERY_SHAPES = [
+    ('users', 'verify_user: user by event and email',
+     {'event_id': {'$in': ['audit', None]}, 'email': 'audit@example.com'}, None),
+    ('users', 'find_participants: participants by _id page',
+     {'event_id': 'audit', 'role': 'participant', '_id': {'$gt': ''}}, [('_id', ASCENDING)]),
+    ('tasks', 'get_user_tasks: released or due tasks for a user',
+     {'event_id': 'audit', 'assigned_to': 'audit',
+      '$or': [{'released': True}, {'scheduled_date': {'$lte': datetime.utcnow()}}]}, [('scheduled_date', DESCENDING)]),
+    ('tasks', 'dashboard: next pending task for a user',
+     {'event_id': 'audit', 'assigned_to': 'audit', 'completed': False}, [('scheduled_date', ASCENDING)]),
+    ('tasks', 'TaskReleaseScheduler: due unreleased tasks',
+     {'released': False, 'scheduled_date': {'$lte': datetime.utcnow()}}, [('scheduled_date', ASCENDING)]),
+    ('tasks', 'find_tasks: task list keyset page',
+     {'event_id': 'audit', '$or': [
+         {'scheduled_date': {'$gt': datetime.utcnow()}},
+         {'scheduled_date': datetime.utcnow(), '_id': {'$gt': ''}}
+     ]}, [('scheduled_date', ASCENDING), ('_id', ASCENDING)]),
+    ('tasks', 'clear_event: tasks of one event', {'event_id': 'audit'}, None),
+    ('pairings', 'get_user_santa: pairing by child', {'event_id': 'audit', 'chris_child_id': 'audit'}, None),
+    ('pairings', 'replace_pairings: pairings of one event', {'event_id': 'audit'}, None),
+    ('dashboards', 'clear_pairings: dashboards of one event', {'event_id': 'audit'}, None)
+]
+
+def ensure_indexes(db):
+    """
+    Create the managed indexes and drop retired ones
+    """
+    for collection_name, models in INDEXES.items():
+        db[collection_name].create_indexes(models)
+
+    for collection_name, names in RETIRED_INDEXES.items():
+        existing = db[collection_name].index_information()
+        for name in names:
+            if name in existing:
+                db[collection_name].drop_index(name)
+
+def plan_stages(plan):
+    """
+    Yield every stage name in an explain() plan tree
+    """
+    if not isinstance(plan, dict):
+        return
+    if 'stage' in plan:
+        yield plan['stage']
+    for key in ('inputStage', 'queryPlan', 'winningPlan'):
+        yield from plan_stages(plan.get(key))
+    for child in plan.get('inputStages', []):
+        yield from plan_stages(child)
+
+def audit_query_plans(db):
+    """
+    Explain every query shape and return one finding per shape
+    """
+    findings = []
+    for collection_name, description, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explanation = cursor.explain()
+        except OperationFailure as e:
+            findings.append({'query': description, 'error': str(e), 'collscan': False})
+            continue
+
+        stages = list(plan_stages(explanation.get('queryPlanner', {}).get('winningPlan')))
+        findings.append({
+            'query': description,
+            'stages': stages,
+            'collscan': 'COLLSCAN' in stages
+        })
+    return findings
+
+def main():
+    parser = argparse.ArgumentParser(description='Create managed indexes and audit query plans')
+    parser.add_argument('--uri', default=Config.MONGODB_URI)
+    parser.add_argument('--database', default=Config.DATABASE_NAME)
+    parser.add_argument('--audit', action='store_true', help='Explain every query shape')
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[args.database]
+    ensure_indexes(db)
+    if not args.audit:
+        return 0
+
+    failed = False
+    for finding in audit_query_plans(db):
+        status = 'COLLSCAN' if finding['collscan'] else 'ok'
+        detail = finding.get('error') or ' > '.join(finding['stages'])
+        print(f"{status:8} {finding['query']}: {detail}")
+        failed = failed or finding['collscan']
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
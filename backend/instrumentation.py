@@ -0,0 +1,325 @@
+# backend/instrumentation.py
+
+import bisect
+import logging
+import threading
+import time
+
+from flask import Response, g, request
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters for sizing workers: connections open and checked
+    out, plus how long requests wait to check a connection out
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = threading.local()  # Check-out start time on the requesting thread
+        self.connections_open = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.pool_clears = 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'connections_open': self.connections_open,
+                'checked_out': self.checked_out,
+                'max_checked_out': self.max_checked_out,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'wait_ms_total': round(self.wait_seconds_total * 1000, 2),
+                'wait_ms_avg': round(self.wait_seconds_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_ms_max': round(self.wait_seconds_max * 1000, 2),
+                'pool_clears': self.pool_clears
+            }
+
+    def _waited(self):
+        started = getattr(self._pending, 'started', None)
+        self._pending.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._pending.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def connection_check_out_failed(self, event):
+        self._waited()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+# Request latency buckets in seconds (Prometheus histogram `le` bounds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Mongo commands per request
+COMMAND_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{format_labels({**labels, "le": le})} {cumulative}')
+        lines.append(f'{name}_sum{format_labels(labels)} {self.sum}')
+        lines.append(f'{name}_count{format_labels(labels)} {self.count}')
+        return lines
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+class RequestTrace:
+    """
+    Mongo commands issued while serving one request
+    """
+    def __init__(self):
+        self.commands = 0
+        self.seconds = 0.0
+        self.breakdown = {}  # (command, collection) -> [count, seconds]
+        self.pending = {}    # request_id -> (command, collection)
+
+    def summary(self):
+        return ', '.join(
+            f"{command} {collection or '-'} x{count} ({seconds * 1000:.1f} ms)"
+            for (command, collection), (count, seconds) in sorted(
+                self.breakdown.items(), key=lambda item: -item[1][1]
+            )
+        )
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Per-command-name totals for the process, plus a per-request trace for
+    commands issued on a thread that is serving a request. PyMongo calls
+    these hooks on the thread running the operation
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.totals = {}  # command -> [count, seconds, failures]
+
+    def begin_request(self):
+        self._local.trace = RequestTrace()
+
+    def end_request(self):
+        trace = getattr(self._local, 'trace', None)
+        self._local.trace = None
+        return trace
+
+    def started(self, event):
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            collection = event.command.get(event.command_name)
+            if not isinstance(collection, str):
+                collection = event.command.get('collection', '')  # getMore
+            trace.pending[event.request_id] = (event.command_name, collection)
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _record(self, event, failed):
+        seconds = event.duration_micros / 1e6
+        with self._lock:
+            totals = self.totals.setdefault(event.command_name, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += failed
+
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            key = trace.pending.pop(event.request_id, (event.command_name, ''))
+            trace.commands += 1
+            trace.seconds += seconds
+            entry = trace.breakdown.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def render(self):
+        with self._lock:
+            totals = {command: list(values) for command, values in self.totals.items()}
+        lines = [
+            '# HELP santa_mongo_commands_total MongoDB commands sent by this process',
+            '# TYPE santa_mongo_commands_total counter'
+        ]
+        lines.extend(f'santa_mongo_commands_total{format_labels({"command": command})} {count}'
+                     for command, (count, _, _) in sorted(totals.items()))
+        lines += [
+            '# HELP santa_mongo_command_seconds_total Time spent waiting on MongoDB commands',
+            '# TYPE santa_mongo_command_seconds_total counter'
+        ]
+        lines.extend(f'santa_mongo_command_seconds_total{format_labels({"command": command})} {seconds}'
+                     for command, (_, seconds, _) in sorted(totals.items()))
+        lines += [
+            '# HELP santa_mongo_command_failures_total MongoDB commands that failed',
+            '# TYPE santa_mongo_command_failures_total counter'
+        ]
+        lines.extend(f'santa_mongo_command_failures_total{format_labels({"command": command})} {failures}'
+                     for command, (_, _, failures) in sorted(totals.items()))
+        return lines
+
+class RequestMetrics:
+    """
+    Per-route request counts, latency histograms and the Mongo commands and
+    time spent serving them. Routes are labelled by their URL rule so label
+    cardinality stays bounded. Streaming responses are timed to the first byte
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}     # (method, route, status) -> count
+        self.latency = {}      # (method, route) -> Histogram
+        self.db_commands = {}  # (method, route) -> Histogram of commands per request
+        self.db_seconds = {}   # (method, route) -> total seconds
+
+    def record(self, method, route, status, seconds, trace):
+        with self._lock:
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            self.latency.setdefault((method, route), Histogram()).observe(seconds)
+            if trace is not None:
+                self.db_commands.setdefault((method, route), Histogram(COMMAND_BUCKETS)).observe(trace.commands)
+                self.db_seconds[(method, route)] = self.db_seconds.get((method, route), 0.0) + trace.seconds
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP santa_http_requests_total Requests served, by route and status',
+                '# TYPE santa_http_requests_total counter'
+            ]
+            lines.extend(
+                f'santa_http_requests_total{format_labels({"method": method, "route": route, "status": status})} {count}'
+                for (method, route, status), count in sorted(self.requests.items())
+            )
+            lines += [
+                '# HELP santa_http_request_duration_seconds Request latency',
+                '# TYPE santa_http_request_duration_seconds histogram'
+            ]
+            for (method, route), histogram in sorted(self.latency.items()):
+                lines.extend(histogram.render('santa_http_request_duration_seconds', {'method': method, 'route': route}))
+            lines += [
+                '# HELP santa_http_request_db_commands MongoDB commands issued per request',
+                '# TYPE santa_http_request_db_commands histogram'
+            ]
+            for (method, route), histogram in sorted(self.db_commands.items()):
+                lines.extend(histogram.render('santa_http_request_db_commands', {'method': method, 'route': route}))
+            lines += [
+                '# HELP santa_http_request_db_seconds_total Time requests spent waiting on MongoDB',
+                '# TYPE santa_http_request_db_seconds_total counter'
+            ]
+            lines.extend(
+                f'santa_http_request_db_seconds_total{format_labels({"method": method, "route": route})} {seconds}'
+                for (method, route), seconds in sorted(self.db_seconds.items())
+            )
+        return lines
+
+def render_pool_metrics(pool_metrics):
+    lines = []
+    for key, value in pool_metrics.snapshot().items():
+        name = f'santa_mongo_pool_{key}'
+        lines += [f'# TYPE {name} gauge', f'{name} {value}']
+    return lines
+
+def install_request_metrics(app, db_manager, slow_request_ms=None):
+    """
+    Time every request and attribute the Mongo commands it issues, then serve
+    everything in Prometheus text format at /metrics. Metrics are per process;
+    scrape each worker. Requests slower than `slow_request_ms` are logged with
+    their command breakdown
+    """
+    request_metrics = RequestMetrics()
+    command_metrics = db_manager.command_metrics
+    app.extensions['request_metrics'] = request_metrics
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        command_metrics.begin_request()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        trace = command_metrics.end_request()
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_metrics.record(request.method, route, response.status_code, elapsed, trace)
+        if slow_request_ms is not None and elapsed * 1000 >= slow_request_ms:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d Mongo commands (%.1f ms): %s",
+                request.method, route, elapsed * 1000,
+                trace.commands if trace else 0,
+                trace.seconds * 1000 if trace else 0.0,
+                trace.summary() if trace else ''
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        lines = (request_metrics.render() + command_metrics.render() +
+                 render_pool_metrics(db_manager.pool_metrics))
+        if 'audit_log' in app.extensions:
+            lines += app.extensions['audit_log'].render()
+        if 'rate_limiter' in app.extensions:
+            lines += app.extensions['rate_limiter'].render()
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+    return request_metrics
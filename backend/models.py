@@ -1,24 +1,184 @@
 # backend/models.py
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 from bson.objectid import ObjectId
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from cache import TTLCache
+from indexes import audit_query_plans, ensure_indexes
+from instrumentation import CommandMetrics, PoolMetrics
+from security import PasswordHasher
+from settings_cache import SettingsCache, event_setting_key, split_setting_key
+from storage import DASHBOARD_DEFAULTS, VERSIONED_COLLECTIONS, Storage, collection_version_key, plan_task_operations
+from utils import hash_passwords
+import re
 import uuid
 
-class DatabaseManager:
+def mongo_client_options(config):
+    """
+    Pool, timeout, write concern and read preference keyword arguments from
+    the MONGO_* settings; shared by the PyMongo and Motor clients
+    """
+    write_concern = config.MONGO_WRITE_CONCERN
+    return {
+        'maxPoolSize': config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': config.MONGO_MIN_POOL_SIZE,
+        'maxIdleTimeMS': config.MONGO_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'w': int(write_concern) if write_concern.isdigit() else write_concern,
+        'readPreference': config.MONGO_READ_PREFERENCE
+    }
+
+class DatabaseManager(Storage):
+    """
+    MongoDB storage backend
+    """
     def __init__(self, config):
-        self.client = MongoClient(config.MONGODB_URI)
+        self.config = config
+        self.pool_metrics = PoolMetrics()
+        self.command_metrics = CommandMetrics()
+        self.client = MongoClient(
+            config.MONGODB_URI,
+            event_listeners=[self.pool_metrics, self.command_metrics],
+            **mongo_client_options(config)
+        )
         self.db = self.client[config.DATABASE_NAME]
         
         # Collections
         self.users_collection = self.db['users']
         self.tasks_collection = self.db['tasks']
         self.pairings_collection = self.db['pairings']
-        
-        # Create indexes
-        self.users_collection.create_index('email', unique=True)
-        self.tasks_collection.create_index('assigned_to')
+        # Per-user dashboard summaries keyed on user _id, maintained on write
+        self.dashboards_collection = self.db['dashboards']
+        self.events_collection = self.db['events']
+        # Stored responses for Idempotency-Key retries, expired by a TTL index
+        self.idempotency_collection = self.db['idempotency_keys']
+        # Write-behind activity records (see audit.py), expired by a TTL index
+        self.audit_collection = self.db['audit_log']
+
+        self._supports_transactions = None
+        self._pairings_cache = {}  # event_id -> (generation, pairings with names)
+
+        self.settings_cache = SettingsCache(
+            self.db['settings'],
+            ttl=config.SETTINGS_CACHE_TTL,
+            poll_interval=config.SETTINGS_POLL_INTERVAL,
+            use_change_stream=config.SETTINGS_CHANGE_STREAMS
+        )
+        self.settings_cache.add_listener(self._on_setting_change)
+
+        self.password_hasher = PasswordHasher(
+            config.PASSWORD_HASH_METHOD,
+            config.PASSWORD_SALT_LENGTH,
+            workers=config.PASSWORD_WORKERS,
+            queue_limit=config.PASSWORD_QUEUE_LIMIT
+        )
+        # Short-lived user documents keyed on (lookup, user_id) for JWT identities
+        self.user_cache = TTLCache(config.USER_CACHE_TTL, config.USER_CACHE_SIZE)
+
+    def ensure_indexes(self):
+        """
+        Create the managed index set (see indexes.py); called once at app start-up
+        """
+        self.migrate_to_events()
+        ensure_indexes(self.db)
+
+    def migrate_to_events(self):
+        """
+        Move data from before events existed into the default event. Cheap
+        once done: every query matches nothing
+        """
+        default = self.config.DEFAULT_EVENT_ID
+        self.events_collection.update_one(
+            {'_id': default},
+            {'$setOnInsert': {'name': 'Default event', 'created_at': datetime.utcnow()}},
+            upsert=True
+        )
+        self.users_collection.update_many(
+            {'event_id': {'$exists': False}, 'role': 'admin'},
+            {'$set': {'event_id': None}}
+        )
+        for collection in (self.users_collection, self.tasks_collection,
+                           self.pairings_collection, self.dashboards_collection):
+            collection.update_many({'event_id': {'$exists': False}}, {'$set': {'event_id': default}})
+
+        for key in ('reveal_status', 'pairings_generation'):
+            legacy = self.db.settings.find_one({'_id': key})
+            if legacy:
+                legacy['_id'] = event_setting_key(default, key)
+                self.db.settings.replace_one({'_id': legacy['_id']}, legacy, upsert=True)
+                self.db.settings.delete_one({'_id': key})
+
+    def create_event(self, name, event_id=None):
+        """
+        Register a new event (game); returns its id
+        """
+        event = {
+            '_id': event_id or str(uuid.uuid4()),
+            'name': name,
+            'created_at': datetime.utcnow()
+        }
+        self.events_collection.insert_one(event)
+        return event['_id']
+
+    def get_event(self, event_id):
+        return self.events_collection.find_one({'_id': event_id})
+
+    def list_events(self):
+        return list(self.events_collection.find().sort('created_at', 1))
+
+    def clear_event(self, event_id):
+        """
+        Delete one event's participants, tasks, pairings, dashboards and
+        settings. Every delete is an event_id-prefixed index range, so other
+        events are neither scanned nor touched
+        """
+        event_id = self.resolve_event(event_id)
+        for collection in (self.users_collection, self.tasks_collection,
+                           self.pairings_collection, self.dashboards_collection):
+            collection.delete_many({'event_id': event_id})
+        self.db.settings.delete_many({'_id': {'$regex': '^' + re.escape(event_setting_key(event_id, ''))}})
+        for key in ('reveal_status', 'pairings_generation'):
+            self.settings_cache.invalidate(event_setting_key(event_id, key))
+        self._pairings_cache.pop(event_id, None)
+        self.bump_users_generation()
+        for collection in VERSIONED_COLLECTIONS:
+            self.bump_collection_version(collection, event_id)
+
+    def audit_indexes(self):
+        """
+        Explain every known query shape; returns the ones doing a COLLSCAN
+        """
+        return [finding for finding in audit_query_plans(self.db) if finding['collscan']]
+
+    def get_pool_stats(self):
+        """
+        Connection pool usage alongside the configured limits
+        """
+        return {
+            'max_pool_size': self.config.MONGO_MAX_POOL_SIZE,
+            'min_pool_size': self.config.MONGO_MIN_POOL_SIZE,
+            **self.pool_metrics.snapshot()
+        }
+
+    def ensure_admin_user(self, full_name, email, password):
+        """
+        Create the admin account with the given password unless it exists;
+        returns whether it was created
+        """
+        if self.users_collection.find_one({'event_id': None, 'email': email}, {'_id': 1}):
+            return False
+        self.users_collection.insert_one({
+            '_id': str(uuid.uuid4()),
+            'event_id': None,  # Admins manage every event
+            'full_name': full_name,
+            'email': email,
+            'password_hash': self.password_hasher.hash(password),
+            'role': 'admin',
+            'created_at': datetime.utcnow()
+        })
+        return True
 
     def create_admin_user(self, full_name, email):
         """
@@ -32,8 +192,9 @@ class DatabaseManager:
             '_id': str(uuid.uuid4()),
             'full_name': full_name,
             'email': email,
-            'password_hash': generate_password_hash(password),
+            'password_hash': self.password_hasher.hash(password),
             'role': 'admin',
+            'event_id': None,  # Admins manage every event
             'created_at': datetime.utcnow(),
             'initial_password_set': False
         }
@@ -41,15 +202,16 @@ class DatabaseManager:
         user_id = self.users_collection.insert_one(user_data).inserted_id
         return user_id, password
 
-    def create_participant_user(self, full_name, email):
+    def create_participant_user(self, full_name, email, event_id=None):
         """
         Create participant user with email as initial password
         """
         user_data = {
             '_id': str(uuid.uuid4()),
+            'event_id': self.resolve_event(event_id),
             'full_name': full_name,
             'email': email,
-            'password_hash': generate_password_hash(email),  # Using email as initial password
+            'password_hash': self.password_hasher.hash(email),  # Using email as initial password
             'role': 'participant',
             'is_paired': False,
             'paired_with': None,
@@ -58,26 +220,89 @@ class DatabaseManager:
         }
         
         user_id = self.users_collection.insert_one(user_data).inserted_id
+        self.bump_collection_version('users', user_data['event_id'])
         return user_id
 
-    def verify_user(self, email, password):
+    def create_participant_users(self, users, event_id=None):
         """
-        Verify user credentials
+        Bulk create participant users from (full_name, email) tuples with a
+        single unordered insert_many. Returns the inserted ids by batch index
+        and a {batch index: error message} map for the rows that failed
         """
-        user = self.users_collection.find_one({'email': email})
-        if user and check_password_hash(user['password_hash'], password):
-            return user
-        return None
+        event_id = self.resolve_event(event_id)
+        password_hashes = hash_passwords(
+            [email for _, email in users],
+            workers=self.config.IMPORT_HASH_WORKERS,
+            parallel_threshold=self.config.IMPORT_PARALLEL_THRESHOLD,
+            method=self.config.PASSWORD_HASH_METHOD,
+            salt_length=self.config.PASSWORD_SALT_LENGTH
+        )
+        created_at = datetime.utcnow()
+        documents = [{
+            '_id': str(uuid.uuid4()),
+            'event_id': event_id,
+            'full_name': full_name,
+            'email': email,
+            'password_hash': password_hash,  # Using email as initial password
+            'role': 'participant',
+            'is_paired': False,
+            'paired_with': None,
+            'created_at': created_at,
+            'initial_password_set': False
+        } for (full_name, email), password_hash in zip(users, password_hashes)]
 
-    def create_pairing(self, santa_id, recipient_id):
+        errors = {}
+        try:
+            self.users_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                index = write_error['index']
+                if write_error.get('code') == 11000:
+                    errors[index] = f"A user with email {documents[index]['email']} already exists"
+                else:
+                    errors[index] = write_error.get('errmsg', 'Write failed')
+
+        inserted_ids = {
+            index: document['_id']
+            for index, document in enumerate(documents)
+            if index not in errors
+        }
+        if inserted_ids:
+            self.bump_collection_version('users', event_id)
+        return inserted_ids, errors
+
+    def verify_user(self, email, password, event_id=None):
+        """
+        Verify user credentials for an event (admins sign in to any event),
+        upgrading the stored hash if the configured hashing parameters have
+        changed since it was made
+        """
+        user = self.users_collection.find_one({
+            'event_id': {'$in': [self.resolve_event(event_id), None]},
+            'email': email
+        })
+        if not user or not self.password_hasher.verify(user['password_hash'], password):
+            return None
+
+        if self.password_hasher.needs_rehash(user['password_hash']):
+            user['password_hash'] = self.password_hasher.hash(password)
+            self.users_collection.update_one(
+                {'_id': user['_id']},
+                {'$set': {'password_hash': user['password_hash']}}
+            )
+        return user
+
+    def create_pairing(self, santa_id, recipient_id, event_id=None):
         """
         Create a one-to-one Secret Santa pairing
         """
         if santa_id == recipient_id:
             raise Exception("Cannot pair user with themselves")
 
+        event_id = self.resolve_event(event_id)
         pairing_data = {
             '_id': str(uuid.uuid4()),
+            'event_id': event_id,
             'chris_mom_id': santa_id,
             'chris_child_id': recipient_id,
             'created_at': datetime.utcnow()
@@ -99,117 +324,750 @@ class DatabaseManager:
                 'paired_with': santa_id
             }}
         )
-        
-        return self.pairings_collection.insert_one(pairing_data)
 
-    def create_task(self, title, description, penalty='', assign_to=None, scheduled_date=None):
+        names = self._full_names([santa_id, recipient_id])
+        self.dashboards_collection.bulk_write([
+            self._dashboard_upsert(santa_id, event_id, {'$set': {'paired_name': names.get(recipient_id)}}),
+            self._dashboard_upsert(recipient_id, event_id, {'$set': {
+                'paired_name': names.get(santa_id),
+                'santa_name': names.get(santa_id)
+            }})
+        ])
+
+        result = self.pairings_collection.insert_one(pairing_data)
+        self.bump_collection_version('pairings', event_id)
+        return result
+
+    def supports_transactions(self):
+        """
+        Check (once) whether the server is a replica set member or mongos
+        """
+        if self._supports_transactions is None:
+            try:
+                hello = self.client.admin.command('ismaster')
+                self._supports_transactions = bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+            except (PyMongoError, NotImplementedError):  # mongomock has no admin commands
+                self._supports_transactions = False
+        return self._supports_transactions
+
+    def replace_pairings(self, pairs, event_id=None):
+        """
+        Replace an event's pairings with the given (santa_id, recipient_id)
+        pairs using one delete_many, one insert_many and one bulk_write for
+        the user flags. Runs in a transaction when the deployment supports them
+        """
+        for santa_id, recipient_id in pairs:
+            if santa_id == recipient_id:
+                raise Exception("Cannot pair user with themselves")
+
+        event_id = self.resolve_event(event_id)
+        created_at = datetime.utcnow()
+        pairing_documents = [{
+            '_id': str(uuid.uuid4()),
+            'event_id': event_id,
+            'chris_mom_id': santa_id,
+            'chris_child_id': recipient_id,
+            'created_at': created_at
+        } for santa_id, recipient_id in pairs]
+
+        # Reset everyone, then point each Santa at their recipient
+        user_updates = [UpdateMany(
+            {'event_id': event_id, 'role': 'participant'},
+            {'$set': {'is_paired': False, 'paired_with': None}}
+        )]
+        user_updates.extend(UpdateOne(
+            {'_id': santa_id},
+            {'$set': {'is_paired': True, 'paired_with': recipient_id}}
+        ) for santa_id, recipient_id in pairs)
+        recipient_ids = [recipient_id for _, recipient_id in pairs]
+        user_updates.append(UpdateMany(
+            {'_id': {'$in': recipient_ids}, 'is_paired': False},
+            {'$set': {'is_paired': True}}
+        ))
+
+        names = self._full_names([user_id for pair in pairs for user_id in pair])
+        dashboard_updates = [UpdateMany(
+            {'event_id': event_id},
+            {'$set': {'paired_name': None, 'santa_name': None}}
+        )]
+        for santa_id, recipient_id in pairs:
+            dashboard_updates.append(self._dashboard_upsert(
+                santa_id, event_id, {'$set': {'paired_name': names.get(recipient_id)}}
+            ))
+            dashboard_updates.append(self._dashboard_upsert(
+                recipient_id, event_id, {'$set': {'santa_name': names.get(santa_id)}}
+            ))
+
+        def write_pairings(session=None):
+            self.pairings_collection.delete_many({'event_id': event_id}, session=session)
+            if pairing_documents:
+                self.pairings_collection.insert_many(pairing_documents, session=session)
+            self.users_collection.bulk_write(user_updates, ordered=True, session=session)
+            self.dashboards_collection.bulk_write(dashboard_updates, ordered=True, session=session)
+            self.bump_pairings_generation(event_id, session=session)
+
+        if self.supports_transactions():
+            with self.client.start_session() as session:
+                session.with_transaction(write_pairings)
+            # Drop anything read between the in-transaction bump and the commit
+            generation_key = event_setting_key(event_id, 'pairings_generation')
+            self.settings_cache.invalidate(generation_key)
+            self._on_setting_change(generation_key)
+        else:
+            try:
+                write_pairings()
+            except PyMongoError:
+                # No transactions on a standalone server, so fall back to clearing
+                self.clear_pairings(event_id)
+                raise
+
+        self.bump_collection_version('pairings', event_id)
+        return pairing_documents
+
+    def clear_pairings(self, event_id=None):
+        """
+        Remove an event's pairings and reset its participants' pairing status
+        """
+        event_id = self.resolve_event(event_id)
+        self.pairings_collection.delete_many({'event_id': event_id})
+        self.users_collection.update_many(
+            {'event_id': event_id, 'role': 'participant'},
+            {'$set': {
+                'is_paired': False,
+                'paired_with': None
+            }}
+        )
+        self.dashboards_collection.update_many(
+            {'event_id': event_id},
+            {'$set': {'paired_name': None, 'santa_name': None}}
+        )
+        self.bump_pairings_generation(event_id)
+        self.bump_collection_version('pairings', event_id)
+
+    def get_pairs(self, event_id=None):
+        """
+        An event's pairings as (santa_id, recipient_id) tuples
+        """
+        return [
+            (pairing['chris_mom_id'], pairing['chris_child_id'])
+            for pairing in self.pairings_collection.find(
+                {'event_id': self.resolve_event(event_id)}, {'chris_mom_id': 1, 'chris_child_id': 1}
+            )
+        ]
+
+    def get_setting(self, key):
+        """
+        Read a settings document through the in-process settings cache
+        """
+        self.settings_cache.start()
+        return self.settings_cache.get(key)
+
+    def bump_generation(self, key, session=None):
+        """
+        Bump a settings counter that invalidates cached reads in every worker
+        """
+        self.db.settings.update_one(
+            {'_id': key},
+            {'$inc': {'value': 1, 'version': 1}},
+            upsert=True,
+            session=session
+        )
+        self.settings_cache.invalidate(key)
+        self._on_setting_change(key)
+
+    def bump_collection_version(self, collection, event_id=None):
+        key = collection_version_key(collection, self.resolve_event(event_id))
+        self.db.settings.update_one(
+            {'_id': key},
+            {'$set': {'value': uuid.uuid4().hex}, '$inc': {'version': 1}},
+            upsert=True
+        )
+        self.settings_cache.invalidate(key)
+
+    def bump_pairings_generation(self, event_id=None, session=None):
+        """
+        Bump the counter that invalidates an event's cached pairing reads
+        """
+        self.bump_generation(event_setting_key(self.resolve_event(event_id), 'pairings_generation'), session=session)
+
+    def bump_users_generation(self):
+        """
+        Bump the counter that invalidates cached user documents
+        """
+        self.bump_generation('users_generation')
+
+    def _on_setting_change(self, key):
+        if split_setting_key(key)[1] in ('users_generation', 'pairings_generation'):
+            self.user_cache.clear()
+
+    def get_pairings_generation(self, event_id=None):
+        settings = self.get_setting(event_setting_key(self.resolve_event(event_id), 'pairings_generation'))
+        return settings.get('value', 0) if settings else 0
+
+    def get_pairings_with_names(self, event_id=None):
+        """
+        An event's pairings with Santa and recipient names, joined with $lookup
+        in one aggregation and cached until its pairings generation changes
+        """
+        event_id = self.resolve_event(event_id)
+        generation = self.get_pairings_generation(event_id)
+        cached = self._pairings_cache.get(event_id)
+        if cached and cached[0] == generation:
+            return cached[1]
+
+        pairings = list(self.pairings_collection.aggregate([
+            {'$match': {'event_id': event_id}},
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'chris_mom_id',
+                'foreignField': '_id',
+                'as': 'santa'
+            }},
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'chris_child_id',
+                'foreignField': '_id',
+                'as': 'recipient'
+            }},
+            # Drops pairings whose users no longer exist
+            {'$unwind': '$santa'},
+            {'$unwind': '$recipient'},
+            {'$project': {
+                '_id': 0,
+                'santa_name': '$santa.full_name',
+                'recipient_name': '$recipient.full_name'
+            }}
+        ]))
+        self._pairings_cache[event_id] = (generation, pairings)
+        return pairings
+
+    def get_user_with_pairing(self, user_id):
+        """
+        Get a user together with the user they are paired with (as 'paired_user')
+        in a single aggregation, cached briefly per user
+        """
+        user = self.user_cache.get(('pairing', user_id))
+        if user is not None:
+            return user
+
+        users = list(self.users_collection.aggregate([
+            {'$match': {'_id': user_id}},
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'paired_with',
+                'foreignField': '_id',
+                'as': 'paired_users'
+            }},
+            {'$project': {'password_hash': 0, 'paired_users.password_hash': 0}}
+        ]))
+        if not users:
+            return None
+        user = users[0]
+        paired_users = user.pop('paired_users', [])
+        user['paired_user'] = paired_users[0] if paired_users else None
+        self.user_cache.set(('pairing', user_id), user)
+        return user
+
+    def create_task(self, title, description, penalty='', assign_to=None, scheduled_date=None, event_id=None):
         """
         Create a new task with scheduled date
         """
-        assigned_user = self.users_collection.find_one({'_id': assign_to}) if assign_to else None
+        event_id = self.resolve_event(event_id)
+        assigned_user = self.users_collection.find_one(
+            {'_id': assign_to, 'event_id': event_id}, {'full_name': 1}
+        ) if assign_to else None
+        if assign_to and not assigned_user:
+            raise Exception("Assignee is not part of this event")
         
-        task_data = {
+        task_data = self._task_document(
+            event_id, title, description, penalty, assign_to,
+            assigned_user['full_name'] if assigned_user else None,
+            scheduled_date, datetime.utcnow()
+        )
+
+        result = self.tasks_collection.insert_one(task_data)
+        if assign_to:
+            self.dashboards_collection.bulk_write(self._dashboard_task_updates(assign_to, 1, task_data))
+        self.bump_collection_version('tasks', event_id)
+        return result
+
+    def create_tasks(self, specs, assignee_names=None, batch_size=1000, event_id=None):
+        """
+        Bulk create tasks from (assign_to, title, description, penalty,
+        scheduled_date) tuples with chunked insert_many. Assignee names come
+        from `assignee_names` or one batched lookup. Returns the number of
+        tasks created and the earliest unreleased scheduled date
+        """
+        event_id = self.resolve_event(event_id)
+        specs = list(specs)
+        if assignee_names is None:
+            assignee_names = self._full_names([spec[0] for spec in specs if spec[0]])
+
+        now = datetime.utcnow()
+        created = 0
+        next_release = None
+        pending = {}  # assignee -> (count, earliest task)
+        for start in range(0, len(specs), batch_size):
+            documents = [
+                self._task_document(event_id, title, description, penalty, assign_to,
+                                    assignee_names.get(assign_to), scheduled_date, now)
+                for assign_to, title, description, penalty, scheduled_date in specs[start:start + batch_size]
+            ]
+            self.tasks_collection.insert_many(documents, ordered=False)
+            created += len(documents)
+
+            for document in documents:
+                if not document['released'] and (next_release is None or document['scheduled_date'] < next_release):
+                    next_release = document['scheduled_date']
+                assign_to = document['assigned_to']
+                if not assign_to:
+                    continue
+                count, earliest = pending.get(assign_to, (0, document))
+                if document['scheduled_date'] < earliest['scheduled_date']:
+                    earliest = document
+                pending[assign_to] = (count + 1, earliest)
+
+        dashboard_updates = []
+        for assign_to, (count, earliest) in pending.items():
+            dashboard_updates.extend(self._dashboard_task_updates(assign_to, count, earliest))
+        if dashboard_updates:
+            self.dashboards_collection.bulk_write(dashboard_updates, ordered=True)
+        if created:
+            self.bump_collection_version('tasks', event_id)
+        return created, next_release
+
+    @staticmethod
+    def _task_document(event_id, title, description, penalty, assign_to, assigned_to_name, scheduled_date, now):
+        scheduled_date = scheduled_date or now
+        released = scheduled_date <= now
+        return {
             '_id': str(uuid.uuid4()),
+            'event_id': event_id,
             'title': title,
             'description': description,
             'penalty': penalty,  # Renamed from Holiday Forfeit
             'assigned_to': assign_to,
-            'assigned_to_name': assigned_user['full_name'] if assigned_user else None,
+            'assigned_to_name': assigned_to_name,
             'status': 'pending',
-            'scheduled_date': scheduled_date or datetime.utcnow(),
+            'scheduled_date': scheduled_date,
+            # Future tasks are released by the TaskReleaseScheduler when due
+            'released': released,
+            'released_at': now if released else None,
             'completed': False,
             'completed_at': None,
-            'created_at': datetime.utcnow()
+            'created_at': now
         }
-        
-        return self.tasks_collection.insert_one(task_data)
 
-    def get_all_tasks(self):
+    def _dashboard_task_updates(self, user_id, count, earliest_task):
+        """
+        Dashboard writes for `count` new pending tasks, the earliest of which
+        becomes the next task if it is due before the current one
+        """
+        return [
+            self._dashboard_upsert(user_id, earliest_task['event_id'], {'$inc': {'pending_tasks': count}}),
+            UpdateOne(
+                {'_id': user_id, '$or': [
+                    {'next_task': None},
+                    {'next_task.scheduled_date': {'$gt': earliest_task['scheduled_date']}}
+                ]},
+                {'$set': {'next_task': self._task_summary(earliest_task)}}
+            )
+        ]
+
+    def get_all_tasks(self, event_id=None):
         """
-        Retrieve all tasks
+        Retrieve all of an event's tasks
         """
-        return list(self.tasks_collection.find())
+        return list(self.tasks_collection.find({'event_id': self.resolve_event(event_id)}))
 
-    def assign_task(self, task_id, user_id):
+    def find_tasks(self, projection=None, after=None, limit=None, event_id=None):
         """
-        Assign a task to a user
+        Cursor over an event's tasks ordered by (scheduled_date, _id). Pass the
+        (scheduled_date, _id) of the last task seen as `after` to resume from it
         """
-        return self.tasks_collection.update_one(
-            {'_id': task_id},
+        query = {'event_id': self.resolve_event(event_id)}
+        if after:
+            scheduled_date, task_id = after
+            query['$or'] = [
+                {'scheduled_date': {'$gt': scheduled_date}},
+                {'scheduled_date': scheduled_date, '_id': {'$gt': task_id}}
+            ]
+
+        cursor = self.tasks_collection.find(query, projection).sort([('scheduled_date', 1), ('_id', 1)])
+        return cursor.limit(limit) if limit else cursor
+
+    def find_participants(self, projection=None, after=None, limit=None, event_id=None, user_ids=None):
+        """
+        Cursor over an event's participants (optionally only `user_ids`)
+        ordered by _id, resuming after the given _id
+        """
+        query = {'event_id': self.resolve_event(event_id), 'role': 'participant'}
+        if after or user_ids is not None:
+            query['_id'] = {}
+            if after:
+                query['_id']['$gt'] = after
+            if user_ids is not None:
+                query['_id']['$in'] = list(user_ids)
+
+        cursor = self.users_collection.find(query, projection).sort('_id', 1)
+        return cursor.limit(limit) if limit else cursor
+
+    def assign_task(self, task_id, user_id, event_id=None):
+        """
+        Assign one of an event's tasks to a user
+        """
+        event_id = self.resolve_event(event_id)
+        previous = self.tasks_collection.find_one_and_update(
+            {'_id': task_id, 'event_id': event_id},
             {'$set': {
                 'assigned_to': user_id, 
                 'status': 'in-progress',
                 'assigned_at': datetime.utcnow()
-            }}
+            }},
+            projection={'assigned_to': 1, 'completed': 1}
         )
+        if previous:
+            self.bump_collection_version('tasks', event_id)
+        if previous and previous.get('assigned_to') != user_id:
+            counter = 'completed_tasks' if previous.get('completed') else 'pending_tasks'
+            if previous.get('assigned_to'):
+                self.dashboards_collection.update_one(
+                    {'_id': previous['assigned_to']},
+                    {'$inc': {counter: -1}}
+                )
+                self._refresh_next_task(previous['assigned_to'], event_id)
+            self.dashboards_collection.bulk_write([
+                self._dashboard_upsert(user_id, event_id, {'$inc': {counter: 1}})
+            ])
+            self._refresh_next_task(user_id, event_id)
+        return previous
 
-    def update_password(self, user_id, new_password):
+    def update_password(self, user_id, new_password, event_id=None):
         """
         Update user's password and mark initial password as set
         """
-        return self.users_collection.update_one(
+        result = self.users_collection.update_one(
             {'_id': user_id},
             {
                 '$set': {
-                    'password_hash': generate_password_hash(new_password),
+                    'password_hash': self.password_hasher.hash(new_password),
                     'initial_password_set': True
                 }
             }
         )
+        self.dashboards_collection.bulk_write([
+            self._dashboard_upsert(user_id, event_id, {'$set': {'initial_password_set': True}})
+        ])
+        self.bump_users_generation()
+        return result
 
     def get_user_by_id(self, user_id):
         """
-        Get user by ID
+        Get user by ID (cached briefly, since every authenticated call does this)
         """
-        return self.users_collection.find_one({'_id': user_id})
+        user = self.user_cache.get(('user', user_id))
+        if user is None:
+            user = self.users_collection.find_one({'_id': user_id})
+            if user:
+                self.user_cache.set(('user', user_id), user)
+        return user
 
-    def get_reveal_status(self):
+    def get_reveal_status(self, event_id=None):
         """
-        Check if Secret Santa identities have been revealed
+        Check if an event's Secret Santa identities have been revealed
         """
-        settings = self.db.settings.find_one({"_id": "reveal_status"})
+        settings = self.get_setting(event_setting_key(self.resolve_event(event_id), "reveal_status"))
         return settings.get("revealed", False) if settings else False
 
-    def toggle_reveal_status(self):
+    def toggle_reveal_status(self, event_id=None):
         """
-        Toggle the reveal status
+        Atomically toggle an event's reveal status
         """
-        current_status = self.get_reveal_status()
-        new_status = not current_status
-        self.db.settings.update_one(
-            {"_id": "reveal_status"},
-            {"$set": {"revealed": new_status}},
-            upsert=True
+        key = event_setting_key(self.resolve_event(event_id), "reveal_status")
+        settings = self.db.settings.find_one_and_update(
+            {"_id": key},
+            [{"$set": {
+                "revealed": {"$eq": [{"$ifNull": ["$revealed", False]}, False]},
+                "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
-        return new_status
+        self.settings_cache.put(key, settings)
+        return settings["revealed"]
 
-    def get_user_santa(self, user_id):
+    def get_user_santa(self, user_id, event_id=None):
         """
         Get the Secret Santa for a user
         """
-        pairing = self.pairings_collection.find_one({"chris_child_id": user_id})
-        if pairing:
-            return self.users_collection.find_one({"_id": pairing["chris_mom_id"]})
-        return None
+        pairings = list(self.pairings_collection.aggregate([
+            {'$match': {'event_id': self.resolve_event(event_id), 'chris_child_id': user_id}},
+            {'$limit': 1},
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'chris_mom_id',
+                'foreignField': '_id',
+                'as': 'santa'
+            }},
+            {'$unwind': '$santa'},
+            {'$replaceRoot': {'newRoot': '$santa'}}
+        ]))
+        return pairings[0] if pairings else None
 
-    def get_user_tasks(self, user_id):
+    def get_user_tasks(self, user_id, event_id=None):
         """
-        Get tasks for a specific user
+        Get a user's tasks that are released or due. The scheduled date is
+        checked too, so tasks show up on time when the release scheduler is
+        off or has not run yet, and tasks from before the released flag count
         """
         return list(self.tasks_collection.find({
+            'event_id': self.resolve_event(event_id),
             'assigned_to': user_id,
-            'scheduled_date': {'$lte': datetime.utcnow()}
+            '$or': [{'released': True}, {'scheduled_date': {'$lte': datetime.utcnow()}}]
         }).sort('scheduled_date', -1))
 
-    def mark_task_completed(self, task_id, user_id):
+    def mark_task_completed(self, task_id, user_id, event_id=None):
         """
         Mark a task as completed
         """
-        return self.tasks_collection.update_one(
-            {'_id': task_id, 'assigned_to': user_id},
+        event_id = self.resolve_event(event_id)
+        result = self.tasks_collection.update_one(
+            {'_id': task_id, 'event_id': event_id, 'assigned_to': user_id, 'completed': {'$ne': True}},
             {'$set': {
                 'completed': True,
                 'completed_at': datetime.utcnow(),
                 'status': 'completed'
             }}
+        )
+        if result.modified_count:
+            self.bump_collection_version('tasks', event_id)
+            dashboard = self.dashboards_collection.find_one_and_update(
+                {'_id': user_id},
+                {'$inc': {'pending_tasks': -1, 'completed_tasks': 1},
+                 '$setOnInsert': {'event_id': event_id}},
+                projection={'next_task': 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            if (dashboard.get('next_task') or {}).get('_id') == task_id:
+                self._refresh_next_task(user_id, event_id)
+        return result
+
+    def apply_task_operations(self, operations, user_id, event_id=None):
+        """
+        Complete or assign many tasks for a user with one find and one ordered
+        bulk_write (nothing is written when every operation is already done).
+        Each update is conditioned on the state it was planned from and tags
+        the task with this call's write id, so operations that lost a race
+        with another writer are found and reported unmodified
+        """
+        event_id = self.resolve_event(event_id)
+        tasks = {task['_id']: task for task in self.tasks_collection.find(
+            {'_id': {'$in': list({task_id for _, task_id in operations})}, 'event_id': event_id},
+            {'assigned_to': 1, 'completed': 1}
+        )}
+        results, writes = plan_task_operations(operations, tasks, user_id)
+        if not writes:
+            return results
+
+        write_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        assignee_name = None
+        if any(action == 'assign' for _, action, _, _, _ in writes):
+            assignee_name = (self.get_user_by_id(user_id) or {}).get('full_name')
+        updates = []
+        for _, action, task_id, previous_assignee, _ in writes:
+            if action == 'complete':
+                updates.append(UpdateOne(
+                    {'_id': task_id, 'event_id': event_id, 'assigned_to': user_id, 'completed': {'$ne': True}},
+                    {'$set': {'completed': True, 'completed_at': now, 'status': 'completed', 'write_id': write_id}}
+                ))
+            else:
+                updates.append(UpdateOne(
+                    {'_id': task_id, 'event_id': event_id, 'assigned_to': previous_assignee},
+                    {'$set': {'assigned_to': user_id, 'assigned_to_name': assignee_name,
+                              'status': 'in-progress', 'assigned_at': now, 'write_id': write_id}}
+                ))
+        if self.tasks_collection.bulk_write(updates, ordered=True).modified_count != len(updates):
+            # Another writer got to some of these tasks first
+            written = {task['_id'] for task in self.tasks_collection.find(
+                {'_id': {'$in': [task_id for _, _, task_id, _, _ in writes]}, 'write_id': write_id}, {'_id': 1}
+            )}
+            for index, _, task_id, _, _ in writes:
+                results[index]['modified'] = task_id in written
+            writes = [write for write in writes if write[2] in written]
+
+        counters = {}  # user_id -> {counter: change}
+        for _, action, _, previous_assignee, completed in writes:
+            if action == 'complete':
+                changes = counters.setdefault(user_id, {})
+                changes['pending_tasks'] = changes.get('pending_tasks', 0) - 1
+                changes['completed_tasks'] = changes.get('completed_tasks', 0) + 1
+                continue
+            counter = 'completed_tasks' if completed else 'pending_tasks'
+            if previous_assignee:
+                changes = counters.setdefault(previous_assignee, {})
+                changes[counter] = changes.get(counter, 0) - 1
+            changes = counters.setdefault(user_id, {})
+            changes[counter] = changes.get(counter, 0) + 1
+        if counters:
+            self.dashboards_collection.bulk_write([
+                self._dashboard_upsert(assignee, event_id, {'$inc': changes})
+                for assignee, changes in counters.items()
+            ], ordered=False)
+            for assignee in counters:
+                self._refresh_next_task(assignee, event_id)
+            self.bump_collection_version('tasks', event_id)
+        return results
+
+    def reserve_idempotency_key(self, key, fingerprint):
+        try:
+            self.idempotency_collection.insert_one({
+                '_id': key,
+                'fingerprint': fingerprint,
+                'status': None,
+                'body': None,
+                'created_at': datetime.utcnow()
+            })
+            return None
+        except DuplicateKeyError:
+            return self.idempotency_collection.find_one({'_id': key})
+
+    def complete_idempotency_key(self, key, status, body):
+        self.idempotency_collection.update_one({'_id': key}, {'$set': {'status': status, 'body': body}})
+
+    def release_idempotency_key(self, key):
+        self.idempotency_collection.delete_one({'_id': key, 'status': None})
+
+    def write_audit_events(self, events):
+        self.audit_collection.insert_many(events, ordered=False)
+
+    def iter_event_documents(self, collection, event_id=None, batch_size=1000):
+        """
+        Cursor over an event's exported documents; the driver holds one
+        `batch_size` batch at a time
+        """
+        query = {'event_id': self.resolve_event(event_id)}
+        projection = {'event_id': 0}
+        if collection == 'users':
+            query['role'] = 'participant'
+            projection['password_hash'] = 0
+        return self.db[collection].find(query, projection).batch_size(batch_size)
+
+    def restore_event_documents(self, collection, documents, event_id=None):
+        """
+        Insert one batch of exported documents with an unordered insert_many
+        """
+        event_id = self.resolve_event(event_id)
+        if collection == 'users':
+            password_hashes = hash_passwords(
+                [document['email'] for document in documents],
+                workers=self.config.IMPORT_HASH_WORKERS,
+                parallel_threshold=self.config.IMPORT_PARALLEL_THRESHOLD,
+                method=self.config.PASSWORD_HASH_METHOD,
+                salt_length=self.config.PASSWORD_SALT_LENGTH
+            )
+            for document, password_hash in zip(documents, password_hashes):
+                document.update(role='participant', password_hash=password_hash, initial_password_set=False)
+        for document in documents:
+            document['event_id'] = event_id
+
+        try:
+            self.db[collection].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            duplicates = [error for error in e.details.get('writeErrors', []) if error.get('code') == 11000]
+            if duplicates:
+                raise DuplicateKeyError(f"{len(duplicates)} {collection} in this batch already exist", 11000)
+            raise
+
+        if collection == 'users':
+            self.bump_users_generation()
+        elif collection == 'pairings':
+            self.bump_pairings_generation(event_id)
+        return len(documents)
+
+    def get_dashboard(self, user_id):
+        """
+        Precomputed dashboard summary for a user (a single _id lookup)
+        """
+        dashboard = self.dashboards_collection.find_one({'_id': user_id}) or {}
+        return {**DASHBOARD_DEFAULTS, **dashboard}
+
+    def has_dashboards(self):
+        return self.dashboards_collection.estimated_document_count() > 0
+
+    def rebuild_dashboards(self, event_id=None):
+        """
+        Recompute the dashboard documents of one event, or of every event,
+        from users, pairings and tasks. Only needed to backfill and after a
+        restore; the write paths keep them current after that
+        """
+        scope = {'event_id': event_id} if event_id else {}
+        users = {user['_id']: user for user in self.users_collection.find(
+            scope, {'event_id': 1, 'full_name': 1, 'paired_with': 1, 'initial_password_set': 1}
+        )}
+        dashboards = {user_id: {
+            **DASHBOARD_DEFAULTS,
+            '_id': user_id,
+            'event_id': user.get('event_id'),
+            'paired_name': users[user['paired_with']]['full_name'] if user.get('paired_with') in users else None,
+            'initial_password_set': user.get('initial_password_set', False)
+        } for user_id, user in users.items()}
+
+        for pairing in self.pairings_collection.find(scope, {'chris_mom_id': 1, 'chris_child_id': 1}):
+            dashboard = dashboards.get(pairing['chris_child_id'])
+            if dashboard and pairing['chris_mom_id'] in users:
+                dashboard['santa_name'] = users[pairing['chris_mom_id']]['full_name']
+
+        for task in self.tasks_collection.find(
+            {**scope, 'assigned_to': {'$ne': None}},
+            {'assigned_to': 1, 'title': 1, 'scheduled_date': 1, 'completed': 1}
+        ).sort('scheduled_date', 1):
+            dashboard = dashboards.get(task['assigned_to'])
+            if not dashboard:
+                continue
+            if task.get('completed'):
+                dashboard['completed_tasks'] += 1
+            else:
+                dashboard['pending_tasks'] += 1
+                if dashboard['next_task'] is None:
+                    dashboard['next_task'] = self._task_summary(task)
+
+        self.dashboards_collection.delete_many(scope)
+        if dashboards:
+            self.dashboards_collection.insert_many(list(dashboards.values()))
+        return len(dashboards)
+
+    def _full_names(self, user_ids):
+        return {user['_id']: user['full_name'] for user in self.users_collection.find(
+            {'_id': {'$in': list(set(user_ids))}}, {'full_name': 1}
+        )}
+
+    @staticmethod
+    def _task_summary(task):
+        return {
+            '_id': task['_id'],
+            'title': task['title'],
+            'scheduled_date': task['scheduled_date']
+        }
+
+    def _dashboard_upsert(self, user_id, event_id, update):
+        """
+        UpdateOne for a user's dashboard, creating it (tagged with the event)
+        if needed
+        """
+        return UpdateOne({'_id': user_id}, {**update, '$setOnInsert': {'event_id': event_id}}, upsert=True)
+
+    def _refresh_next_task(self, user_id, event_id):
+        """
+        Point a user's dashboard at their earliest pending task
+        """
+        task = self.tasks_collection.find_one(
+            {'event_id': event_id, 'assigned_to': user_id, 'completed': False},
+            {'title': 1, 'scheduled_date': 1},
+            sort=[('scheduled_date', 1)]
+        )
+        self.dashboards_collection.update_one(
+            {'_id': user_id},
+            {'$set': {'next_task': self._task_summary(task) if task else None}}
         )
\ No newline at end of file
@@ -0,0 +1,188 @@
+# backend/pairing.py
+
+import random
+import time
+from collections import deque
+
+class PairingError(Exception):
+    pass
+
+class PairingConstraints:
+    """
+    Exclusion rules for Secret Santa pairings
+    """
+    def __init__(self):
+        self.excluded_pairs = set()   # Symmetric, e.g. spouses
+        self.excluded_edges = set()   # Directed, e.g. last year's Santa -> recipient
+        self.group_of = {}            # Members of the same group never pair
+        self.group_count = 0
+
+    def exclude_pair(self, first_id, second_id):
+        self.excluded_pairs.add(frozenset((first_id, second_id)))
+
+    def exclude_edge(self, santa_id, recipient_id):
+        self.excluded_edges.add((santa_id, recipient_id))
+
+    def add_group(self, member_ids):
+        self.group_count += 1
+        for member_id in member_ids:
+            self.group_of[member_id] = self.group_count
+
+    def allows(self, santa_id, recipient_id):
+        if santa_id == recipient_id:
+            return False
+        if (santa_id, recipient_id) in self.excluded_edges:
+            return False
+        if frozenset((santa_id, recipient_id)) in self.excluded_pairs:
+            return False
+        group = self.group_of.get(santa_id)
+        return group is None or group != self.group_of.get(recipient_id)
+
+def count_violations(pairs, constraints):
+    return sum(1 for santa_id, recipient_id in pairs if not constraints.allows(santa_id, recipient_id))
+
+def solve_cycle(participant_ids, constraints, rng):
+    """
+    Single shuffled cycle; ignores exclusions (the original behaviour)
+    """
+    order = list(participant_ids)
+    rng.shuffle(order)
+    return [(order[i], order[(i + 1) % len(order)]) for i in range(len(order))]
+
+def solve_derangement(participant_ids, constraints, rng, swap_attempts=64):
+    """
+    Start from a shuffled cycle, repair violations with random swaps, then
+    resolve anything left over with augmenting paths (bipartite matching),
+    which also proves infeasibility when no valid assignment exists
+    """
+    santas = list(participant_ids)
+    rng.shuffle(santas)
+    n = len(santas)
+    recipient_of = [santas[(i + 1) % n] for i in range(n)]
+
+    def allowed(i, recipient_id):
+        return constraints.allows(santas[i], recipient_id)
+
+    # Randomized repair: swap recipients between a violating Santa and a random other
+    for i in range(n):
+        if allowed(i, recipient_of[i]):
+            continue
+        for _ in range(swap_attempts):
+            j = rng.randrange(n)
+            if allowed(i, recipient_of[j]) and allowed(j, recipient_of[i]):
+                recipient_of[i], recipient_of[j] = recipient_of[j], recipient_of[i]
+                break
+
+    # Matching: free whoever is still violating and augment them back in
+    santa_index_of = {}
+    free_recipients = []
+    free_santas = []
+    for i in range(n):
+        if allowed(i, recipient_of[i]):
+            santa_index_of[recipient_of[i]] = i
+        else:
+            free_recipients.append(recipient_of[i])
+            free_santas.append(i)
+            recipient_of[i] = None
+
+    candidates = list(santas)
+    for start in free_santas:
+        rng.shuffle(candidates)
+        parent = {start: None}
+        queue = deque([start])
+        found = None
+        while queue and found is None:
+            i = queue.popleft()
+            for recipient_id in free_recipients:
+                if allowed(i, recipient_id):
+                    found = (i, recipient_id)
+                    break
+            if found:
+                break
+            for recipient_id in candidates:
+                j = santa_index_of.get(recipient_id)
+                if j is None or j in parent or not allowed(i, recipient_id):
+                    continue
+                parent[j] = (i, recipient_id)
+                queue.append(j)
+
+        if found is None:
+            raise PairingError("No valid pairing satisfies the exclusion constraints")
+
+        # Flip the augmenting path
+        i, recipient_id = found
+        free_recipients.remove(recipient_id)
+        while i is not None:
+            previous_recipient = recipient_of[i]
+            recipient_of[i] = recipient_id
+            santa_index_of[recipient_id] = i
+            step = parent[i]
+            if step is None:
+                break
+            i, recipient_id = step[0], previous_recipient
+
+    return [(santas[i], recipient_of[i]) for i in range(n)]
+
+PAIRING_ENGINES = {
+    'cycle': solve_cycle,
+    'derangement': solve_derangement
+}
+
+def solve_pairings(participant_ids, constraints=None, engine='derangement', seed=None):
+    """
+    Run a pairing engine and report the pairs with solve statistics
+    """
+    if engine not in PAIRING_ENGINES:
+        raise PairingError(f"Unknown pairing engine: {engine}")
+    if len(participant_ids) < 2:
+        raise PairingError("Need at least 2 participants to create pairs")
+
+    constraints = constraints or PairingConstraints()
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+
+    # Sort first so the same seed gives the same pairs regardless of query order
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    pairs = PAIRING_ENGINES[engine](sorted(participant_ids), constraints, rng)
+    solve_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        'pairs': pairs,
+        'stats': {
+            'engine': engine,
+            'seed': seed,
+            'solve_ms': round(solve_ms, 2),
+            'violations': count_violations(pairs, constraints)
+        }
+    }
+
+def build_constraints(options, participants, previous_pairs=()):
+    """
+    Build constraints from a create-pairings request body. Participants may be
+    referenced by id or email:
+      exclusions: [[a, b], ...]   never pair a and b, in either direction
+      groups: [[a, b, c], ...]    no one pairs within their group (teams, households)
+      exclude_previous: true      no one gets the same recipient as last time
+    """
+    id_of = {}
+    for participant in participants:
+        id_of[participant['_id']] = participant['_id']
+        id_of[participant['email']] = participant['_id']
+
+    def resolve(reference):
+        if reference not in id_of:
+            raise PairingError(f"Unknown participant in constraints: {reference}")
+        return id_of[reference]
+
+    constraints = PairingConstraints()
+    for exclusion in options.get('exclusions') or []:
+        if len(exclusion) != 2:
+            raise PairingError("Each exclusion must name exactly two participants")
+        constraints.exclude_pair(resolve(exclusion[0]), resolve(exclusion[1]))
+    for group in options.get('groups') or []:
+        constraints.add_group([resolve(member) for member in group])
+    if options.get('exclude_previous'):
+        for santa_id, recipient_id in previous_pairs:
+            constraints.exclude_edge(santa_id, recipient_id)
+    return constraints
@@ -0,0 +1,249 @@
+# backend/ratelimit.py
+#
+# Admission control for the auth and admin routes. Token buckets cap how
+# often one client may call a route (RATE_LIMITS), and gates let only one
+# call of a route run at a time per key, e.g. create-pairings per event.
+# RATE_LIMIT_BACKEND picks where that state lives:
+#
+#   memory  in this worker process; N workers admit up to N times the limit
+#   mongo   shared by every worker (rate_limits and leases collections)
+#
+# Limiter failures let requests through rather than take the routes down.
+
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from instrumentation import format_labels
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKENDS = ('memory', 'mongo')
+
+class RateLimiter(ABC):
+    """
+    Token buckets and gates over a backend's _take, _claim and _release
+    """
+    gate_poll_interval = 0.05  # Seconds between claims while waiting on a gate
+
+    def __init__(self):
+        self._counters_lock = threading.Lock()
+        self.counters = {}  # (route, outcome) -> count
+
+    def hit(self, route, client, capacity, per_minute):
+        """
+        Take a token from `client`'s bucket for `route`, which holds up to
+        `capacity` and refills `per_minute`. Returns 0 when the call may go
+        ahead, otherwise the seconds until the next token
+        """
+        try:
+            retry_after = self._take(f'{route}:{client}', capacity, per_minute / 60)
+        except PyMongoError:
+            logger.exception("Rate limiter unavailable, admitting %s", route)
+            retry_after = 0.0
+        self._count(route, 'limited' if retry_after else 'allowed')
+        return retry_after
+
+    def acquire(self, route, scope, ttl, wait=0.0):
+        """
+        Claim the `route` gate for `scope` for at most `ttl` seconds (in case
+        the holder dies), waiting up to `wait` seconds for the current holder.
+        Returns a token for release(), or None if the gate is still held
+        """
+        key = f'{route}:{scope}'
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        waited = False
+        while True:
+            try:
+                claimed = self._claim(key, token, ttl)
+            except PyMongoError:
+                logger.exception("Rate limiter unavailable, admitting %s", route)
+                claimed = True
+            if claimed:
+                self._count(route, 'admitted_after_wait' if waited else 'admitted')
+                return token
+            if time.monotonic() + self.gate_poll_interval > deadline:
+                self._count(route, 'rejected')
+                return None
+            waited = True
+            time.sleep(self.gate_poll_interval)
+
+    def release(self, route, scope, token):
+        try:
+            self._release(f'{route}:{scope}', token)
+        except PyMongoError:
+            logger.exception("Could not release the %s gate; it expires on its own", route)
+
+    def holds(self, route, scope, token):
+        """
+        Whether `token` still holds the `route` gate for `scope`, i.e. it was
+        not released and has not lapsed (and been claimed by someone else)
+        """
+        try:
+            return self._holds(f'{route}:{scope}', token)
+        except PyMongoError:
+            logger.exception("Rate limiter unavailable, assuming the %s gate is held", route)
+            return True
+
+    def render(self):
+        """
+        Prometheus text-format lines for /metrics
+        """
+        with self._counters_lock:
+            counters = sorted(self.counters.items())
+        lines = [
+            '# HELP santa_admission_total Rate limit and gate decisions, by route',
+            '# TYPE santa_admission_total counter'
+        ]
+        lines.extend(f'santa_admission_total{format_labels({"route": route, "outcome": outcome})} {count}'
+                     for (route, outcome), count in counters)
+        return lines
+
+    def _count(self, route, outcome):
+        with self._counters_lock:
+            self.counters[(route, outcome)] = self.counters.get((route, outcome), 0) + 1
+
+    @abstractmethod
+    def _take(self, key, capacity, rate):
+        """
+        Refill the bucket `key` at `rate` tokens per second up to `capacity`
+        and take one; returns 0 or the seconds until a token is available
+        """
+
+    @abstractmethod
+    def _claim(self, key, token, ttl):
+        """
+        Make `token` the holder of gate `key` for `ttl` seconds unless a live
+        holder exists; returns whether it was claimed
+        """
+
+    @abstractmethod
+    def _release(self, key, token):
+        """
+        Drop gate `key` if `token` still holds it
+        """
+
+    @abstractmethod
+    def _holds(self, key, token):
+        """
+        Whether `token` holds gate `key` and its claim has not lapsed
+        """
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Per-process buckets; the least recently used are dropped past `max_buckets`
+    """
+    def __init__(self, max_buckets=100000):
+        super().__init__()
+        self.max_buckets = max_buckets
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, monotonic time of last update)
+        self._gates = {}  # key -> (token, monotonic expiry)
+
+    def _take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def _claim(self, key, token, ttl):
+        now = time.monotonic()
+        with self._lock:
+            holder = self._gates.get(key)
+            if holder and holder[1] > now:
+                return False
+            self._gates[key] = (token, now + ttl)
+            return True
+
+    def _release(self, key, token):
+        with self._lock:
+            if self._gates.get(key, (None,))[0] == token:
+                del self._gates[key]
+
+    def _holds(self, key, token):
+        with self._lock:
+            holder = self._gates.get(key)
+            return bool(holder) and holder[0] == token and holder[1] > time.monotonic()
+
+class MongoRateLimiter(RateLimiter):
+    """
+    Buckets shared by every worker, each refilled and drawn from in one
+    pipeline find_one_and_update; gates are lease documents like the task
+    release lease. Idle buckets are removed by a TTL index once full again
+    """
+    def __init__(self, db):
+        super().__init__()
+        self.buckets = db['rate_limits']
+        self.leases = db['leases']
+
+    def _take(self, key, capacity, rate):
+        now = datetime.utcnow()
+        elapsed = {'$max': [0, {'$divide': [{'$subtract': [now, {'$ifNull': ['$updated_at', now]}]}, 1000]}]}
+        update = [
+            {'$set': {'tokens': {'$min': [capacity, {'$add': [
+                {'$ifNull': ['$tokens', capacity]}, {'$multiply': [elapsed, rate]}
+            ]}]}}},
+            {'$set': {
+                'allowed': {'$gte': ['$tokens', 1]},
+                'tokens': {'$cond': [{'$gte': ['$tokens', 1]}, {'$subtract': ['$tokens', 1]}, '$tokens']},
+                'updated_at': now,
+                'expires_at': now + timedelta(seconds=capacity / rate)
+            }}
+        ]
+        try:
+            bucket = self.buckets.find_one_and_update({'_id': key}, update, upsert=True,
+                                                      return_document=ReturnDocument.AFTER)
+        except DuplicateKeyError:
+            # Another worker created the bucket first; draw from theirs
+            bucket = self.buckets.find_one_and_update({'_id': key}, update, return_document=ReturnDocument.AFTER)
+        return 0.0 if bucket['allowed'] else (1 - bucket['tokens']) / rate
+
+    def _claim(self, key, token, ttl):
+        now = datetime.utcnow()
+        try:
+            self.leases.update_one(
+                {'_id': key, 'expires_at': {'$lte': now}},
+                {'$set': {'owner': token, 'expires_at': now + timedelta(seconds=ttl)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False  # Held: the upsert collided with the holder's document
+        return True
+
+    def _release(self, key, token):
+        self.leases.delete_one({'_id': key, 'owner': token})
+
+    def _holds(self, key, token):
+        return self.leases.count_documents(
+            {'_id': key, 'owner': token, 'expires_at': {'$gt': datetime.utcnow()}}, limit=1
+        ) > 0
+
+def create_rate_limiter(config, storage):
+    """
+    Build the limiter named by RATE_LIMIT_BACKEND
+    """
+    if config.RATE_LIMIT_BACKEND == 'memory':
+        return MemoryRateLimiter(config.RATE_LIMIT_MAX_BUCKETS)
+    if config.RATE_LIMIT_BACKEND == 'mongo':
+        if config.STORAGE_BACKEND != 'mongo':
+            raise ValueError("RATE_LIMIT_BACKEND 'mongo' needs STORAGE_BACKEND 'mongo'")
+        return MongoRateLimiter(storage.db)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{config.RATE_LIMIT_BACKEND}', "
+                     f"expected one of {', '.join(RATE_LIMIT_BACKENDS)}")
@@ -1,46 +1,199 @@
 # backend/routes.py
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from models import DatabaseManager
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from bulk_tasks import BulkTaskError, count_tasks, parse_date_range, parse_offset, plan_tasks
 from config import Config
-import random
-from werkzeug.security import generate_password_hash, check_password_hash
-import uuid
+from events import event_hub, format_sse
+from importer import NDJSON_CONTENT_TYPES, iter_request_rows, import_participants
+from pairing import build_constraints, solve_pairings
+from pymongo.errors import DuplicateKeyError
+from security import PasswordQueueFull
+from serialization import format_participant, format_task, format_user_task
+from snapshots import SnapshotError, export_snapshot, restore_snapshot
+from storage import STORAGE_ERRORS, TASK_ACTIONS
+from utils import decode_cursor, encode_cursor
+from functools import wraps
+import csv
+import hashlib
+import math
+import time
+from werkzeug.local import LocalProxy
+from werkzeug.utils import secure_filename
 from datetime import datetime
 
 routes = Blueprint('routes', __name__)
-db_manager = DatabaseManager(Config)
+
+# The app-scoped storage backend (see storage.py), TaskReleaseScheduler,
+# ResponseCache, JSON encoder (see serialization.py) and AuditLog created in
+# create_app
+db_manager = LocalProxy(lambda: current_app.extensions['db_manager'])
+task_scheduler = LocalProxy(lambda: current_app.extensions['task_scheduler'])
+response_cache = LocalProxy(lambda: current_app.extensions['response_cache'])
+json_encoder = LocalProxy(lambda: current_app.extensions['json_encoder'])
+audit_log = LocalProxy(lambda: current_app.extensions['audit_log'])
+rate_limiter = LocalProxy(lambda: current_app.extensions['rate_limiter'])
+
+def current_event_id(claims=None):
+    """
+    The event a request acts on. Participants are bound to the event in their
+    token; admins and anonymous callers pick one with ?event_id= or an
+    X-Event-Id header, falling back to DEFAULT_EVENT_ID. `claims` defaults to
+    the verified token's
+    """
+    if claims is None:
+        claims = get_jwt()
+    if not claims or claims.get('role') == 'admin':
+        return (request.args.get('event_id') or request.headers.get('X-Event-Id') or
+                Config.DEFAULT_EVENT_ID)
+    return claims.get('event_id') or Config.DEFAULT_EVENT_ID
+
+def optional_jwt_claims():
+    """
+    Claims of the request's token on a route that works without one, or {}
+    when there is none. An expired or malformed token counts as none, so the
+    caller falls back to the header or default event instead of failing
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return {}
+    return get_jwt()
+
+def idempotent(view):
+    """
+    Honour an Idempotency-Key header on a write route (inside jwt_required).
+    The first response for a caller's key is stored for IDEMPOTENCY_KEY_TTL
+    seconds and replayed to retries without running the route again; reusing
+    a key for a different request is a 422, and a retry that arrives while
+    the first request is still running a 409. Server errors are not stored
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({"error": "Idempotency-Key must be at most 255 characters"}), 400
+
+        key = f'{get_jwt_identity()}:{key}'
+        fingerprint = hashlib.sha256(
+            f'{request.method} {request.full_path} {current_event_id()}\n'.encode() + request.get_data()
+        ).hexdigest()
+        record = db_manager.reserve_idempotency_key(key, fingerprint)
+        if record:
+            if record['fingerprint'] != fingerprint:
+                return jsonify({"error": "Idempotency-Key was already used for a different request"}), 422
+            if record['status'] is None:
+                return jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409
+            response = Response(record['body'], status=record['status'], mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            db_manager.release_idempotency_key(key)
+            raise
+        if response.status_code >= 500:
+            db_manager.release_idempotency_key(key)
+        else:
+            db_manager.complete_idempotency_key(key, response.status_code, response.get_data())
+        return response
+    return wrapper
+
+def client_address():
+    return request.remote_addr
+
+def login_client():
+    """
+    Address plus the email being tried, so one office behind a shared address
+    can still sign in at once while retries against one account are limited.
+    When RATE_LIMITS sets login_address, that bucket is drawn from first,
+    which bounds how many emails (and so new buckets) one address can try
+    """
+    email = (request.get_json(silent=True) or {}).get('email')
+    return f'{request.remote_addr}:{str(email or "").lower()}'
+
+def rate_limited(route, client=client_address):
+    """
+    Token-bucket limit from RATE_LIMITS[route] per `client()` (inside
+    jwt_required when the client is the caller's identity); a None limit
+    turns it off. Calls over the limit get a 429 with Retry-After
+    """
+    def decorate(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if Config.RATE_LIMIT_ENABLED and Config.RATE_LIMITS.get(route):
+                capacity, per_minute = Config.RATE_LIMITS[route]
+                retry_after = rate_limiter.hit(route, client(), capacity, per_minute)
+                if retry_after:
+                    return jsonify({"error": "Too many requests, please retry later"}), 429, {
+                        'Retry-After': str(math.ceil(retry_after))
+                    }
+            return view(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def admin_required(view):
+    """
+    Reject callers whose token is not an admin's with a 403 (inside
+    jwt_required)
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if get_jwt().get('role') != 'admin':
+            return jsonify({"error": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def gate_busy(route, event_id):
+    return jsonify({
+        "error": f"{route} is already running for event {event_id}, please retry when it finishes"
+    }), 409, {'Retry-After': '1'}
+
+def one_per_event(route, ttl=None):
+    """
+    Let one call of the route run per event at a time (across workers with a
+    shared RATE_LIMIT_BACKEND). Others wait up to PAIRING_GATE_WAIT seconds
+    for it to finish and then get a 409. Routes naming the same gate exclude
+    each other. The gate lapses after `ttl` (default PAIRING_GATE_TTL) seconds
+    """
+    def decorate(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            event_id = current_event_id()
+            token = rate_limiter.acquire(route, event_id, ttl or Config.PAIRING_GATE_TTL,
+                                         wait=Config.PAIRING_GATE_WAIT)
+            if token is None:
+                return gate_busy(route, event_id)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                rate_limiter.release(route, event_id, token)
+        return wrapper
+    return decorate
 
 @routes.route('/admin/register-users', methods=['POST'])
 @jwt_required()  # Only admin can access
+@admin_required
 def register_users():
     """
-    Admin endpoint to register multiple users
+    Admin endpoint to register multiple users. Accepts a JSON {"users": [...]}
+    body or a streamed CSV / NDJSON upload, and imports rows in batches
     """
-    users_data = request.json.get('users', [])
-    registered_users = []
-    errors = []
-
-    for index, user in enumerate(users_data):
-        full_name = user.get('full_name', '').strip()
-        email = user.get('email', '').strip()
-        
-        # Validate data
-        if not full_name or not email:
-            errors.append(f"Row {index + 1}: Full name and email are required")
-            continue
-            
-        try:
-            user_id = db_manager.create_participant_user(full_name, email)
-            registered_users.append({
-                'id': str(user_id),
-                'full_name': full_name,
-                'email': email,
-                'note': 'Initial password is the email address'
-            })
-        except Exception as e:
-            errors.append(f"Row {index + 1}: {str(e)}")
+    try:
+        rows = iter_request_rows(request)
+        registered_users, errors = import_participants(
+            db_manager, rows, batch_size=Config.IMPORT_BATCH_SIZE, event_id=current_event_id()
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": f"Could not read upload: {str(e)}"}), 400
+    except STORAGE_ERRORS as e:
+        # Batches before the failing one stay registered
+        return jsonify({"error": f"Could not register users: {str(e)}"}), 500
 
     if errors:
         return jsonify({
@@ -56,71 +209,57 @@ def register_users():
 
 @routes.route('/admin/create-pairings', methods=['POST'])
 @jwt_required()
+@admin_required
+@rate_limited('create_pairings', client=get_jwt_identity)
+@one_per_event('create_pairings')
 def create_pairings():
     """
     Create one-to-one Secret Santa pairings, ensuring no self-assignments
-    and each person is both a Santa and a recipient exactly once
+    and each person is both a Santa and a recipient exactly once. The optional
+    JSON body picks the engine and seed and lists exclusion constraints
     """
+    options = request.get_json(silent=True) or {}
+    event_id = current_event_id()
     try:
-        # First, clear all existing pairings and reset user pairing status
-        db_manager.pairings_collection.delete_many({})
-        db_manager.users_collection.update_many(
-            {'role': 'participant'},
-            {'$set': {
-                'is_paired': False,
-                'paired_with': None
-            }}
-        )
-
-        # Get all participants after resetting their status
-        participants = list(db_manager.users_collection.find({
-            'role': 'participant'
-        }))
+        participants = list(db_manager.find_participants({'full_name': 1, 'email': 1}, event_id=event_id))
 
         if len(participants) < 2:
             return jsonify({"error": "Need at least 2 participants to create pairs"}), 400
 
-        # Create a circular pairing to ensure everyone is both a Santa and a recipient
-        random.shuffle(participants)
-        pairs = []
-        
-        for i in range(len(participants)):
-            santa = participants[i]
-            # Last person gives to first person to complete the circle
-            recipient = participants[(i + 1) % len(participants)]
-            
-            pairs.append({
-                'santa': santa,
-                'recipient': recipient
-            })
+        previous_pairs = db_manager.get_pairs(event_id) if options.get('exclude_previous') else []
 
-        # Create the new pairings in the database
-        created_pairs = []
-        for pair in pairs:
-            try:
-                pairing = db_manager.create_pairing(
-                    pair['santa']['_id'],
-                    pair['recipient']['_id']
-                )
-                created_pairs.append({
-                    'santa_name': pair['santa']['full_name'],
-                    'recipient_name': pair['recipient']['full_name']
-                })
-            except Exception as e:
-                # If any pairing fails, roll back all pairings
-                db_manager.pairings_collection.delete_many({})
-                db_manager.users_collection.update_many(
-                    {'role': 'participant'},
-                    {'$set': {
-                        'is_paired': False,
-                        'paired_with': None
-                    }}
-                )
-                raise Exception(f"Error creating pairing: {str(e)}")
+        # Solve for a derangement that respects the exclusion constraints
+        result = solve_pairings(
+            [participant['_id'] for participant in participants],
+            build_constraints(options, participants, previous_pairs),
+            engine=options.get('engine', Config.PAIRING_ENGINE),
+            seed=options.get('seed')
+        )
+        if result['stats']['violations']:
+            return jsonify({
+                "error": "Could not satisfy the pairing constraints",
+                "stats": result['stats']
+            }), 400
+
+        # Replace the existing pairings in a single batched write
+        try:
+            db_manager.replace_pairings(result['pairs'], event_id=event_id)
+        except Exception as e:
+            raise Exception(f"Error creating pairing: {str(e)}")
+        audit_log.record('pairings_created', event_id=event_id, actor=get_jwt_identity(),
+                         pairs=len(result['pairs']), engine=result['stats'].get('engine'),
+                         seed=result['stats'].get('seed'))
+
+        name_of = {participant['_id']: participant['full_name'] for participant in participants}
+        created_pairs = [{
+            'santa_name': name_of[santa_id],
+            'recipient_name': name_of[recipient_id]
+        } for santa_id, recipient_id in result['pairs']]
 
         return jsonify({
             "message": "Secret Santa pairings created successfully! 🎄",
-            "pairs": created_pairs
+            "pairs": created_pairs,
+            "stats": result['stats']
         }), 200
 
     except Exception as e:
@@ -141,8 +280,16 @@ def create_task():
             description=data['description'],
             penalty=data.get('penalty', ''),
             assign_to=data.get('assignTo'),
-            scheduled_date=scheduled_date
+            scheduled_date=scheduled_date,
+            event_id=current_event_id()
         )
+        if scheduled_date and scheduled_date > datetime.utcnow():
+            task_scheduler.schedule(task.inserted_id, scheduled_date)
+        event_hub.publish('task_created', {
+            "event_id": current_event_id(),
+            "task_id": str(task.inserted_id),
+            "assigned_to": data.get('assignTo')
+        })
 
         return jsonify({
             "message": "Task created successfully",
@@ -151,6 +298,79 @@ def create_task():
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@routes.route('/admin/tasks/bulk', methods=['POST'])
+@jwt_required()
+@admin_required
+@one_per_event('bulk_write', ttl=Config.BULK_WRITE_GATE_TTL)
+def create_tasks_bulk():
+    """
+    Create a task template for every date in a range, assigned to everyone,
+    round-robin or to every Santa per pairing, with chunked inserts
+    """
+    data = request.get_json(silent=True) or {}
+    event_id = current_event_id()
+    started = time.perf_counter()
+    try:
+        template = {
+            'title': data['title'],
+            'description': data.get('description', ''),
+            'penalty': data.get('penalty', '')
+        }
+        dates = parse_date_range(data.get('start_date'), data.get('end_date'), max_days=Config.BULK_TASK_MAX_DAYS)
+        strategy = data.get('strategy', 'everyone')
+        offset = parse_offset(data.get('offset'))
+
+        participants = [
+            (user['_id'], user['full_name'])
+            for user in db_manager.find_participants(
+                {'full_name': 1}, event_id=event_id, user_ids=data.get('assignees') or None
+            )
+        ]
+        pairs = db_manager.get_pairs(event_id) if strategy == 'per-pair' else None
+
+        # Refuse oversized requests before any task is expanded
+        count = count_tasks(len(dates), strategy, participants, pairs)
+        if count > Config.BULK_TASK_LIMIT:
+            return jsonify({
+                "error": f"Request would create {count} tasks; the limit is {Config.BULK_TASK_LIMIT}"
+            }), 400
+
+        names = None
+        if strategy == 'per-pair' and data.get('assignees'):
+            # Recipients may be outside the assignees filter
+            names = {user['_id']: user['full_name']
+                     for user in db_manager.find_participants({'full_name': 1}, event_id=event_id)}
+        specs = list(plan_tasks(template, dates, strategy, participants, pairs, offset=offset, names=names))
+    except KeyError as e:
+        return jsonify({"error": f"Missing field: {e.args[0]}"}), 400
+    except BulkTaskError as e:
+        return jsonify({"error": str(e)}), 400
+    planned = time.perf_counter()
+
+    try:
+        created, next_release = db_manager.create_tasks(
+            specs, assignee_names=dict(participants), batch_size=Config.TASK_INSERT_BATCH_SIZE, event_id=event_id
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finished = time.perf_counter()
+
+    if next_release:
+        task_scheduler.schedule(None, next_release)
+    event_hub.publish('task_created', {"event_id": event_id, "count": created})
+
+    return jsonify({
+        "message": "Tasks created successfully",
+        "created": created,
+        "dates": len(dates),
+        "assignees": len({spec[0] for spec in specs}),
+        "timing_ms": {
+            "plan": round((planned - started) * 1000, 2),
+            "insert": round((finished - planned) * 1000, 2),
+            "total": round((finished - started) * 1000, 2)
+        }
+    }), 201
+
 @routes.route('/tasks/user', methods=['GET'])
 @jwt_required()
 def get_user_tasks():
@@ -159,54 +379,180 @@ def get_user_tasks():
     """
     current_user_id = get_jwt_identity()
     try:
-        tasks = db_manager.get_user_tasks(current_user_id)
-        return jsonify({
-            "tasks": [{
-                "id": str(task['_id']),
-                "title": task['title'],
-                "description": task.get('description', ''),
-                "penalty": task.get('penalty', ''),
-                "status": task.get('status', 'pending'),
-                "completed": task.get('completed', False),
-                "scheduled_date": task.get('scheduled_date').strftime('%Y-%m-%d') if task.get('scheduled_date') else None
-            } for task in tasks]
-        }), 200
+        tasks = db_manager.get_user_tasks(current_user_id, event_id=current_event_id())
+        return json_response({"tasks": [format_user_task(task) for task in tasks]})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def apply_task_operations(operations):
+    """
+    Apply (action, task_id) operations for the current user in one storage
+    write and publish task_completed for the completions that changed a task
+    """
+    current_user_id = get_jwt_identity()
+    event_id = current_event_id()
+    results = db_manager.apply_task_operations(operations, current_user_id, event_id=event_id)
+    for result in results:
+        if not result['modified']:
+            continue
+        if result['action'] == 'complete':
+            event_hub.publish('task_completed', {
+                "event_id": event_id,
+                "task_id": result['task_id'],
+                "assigned_to": current_user_id
+            })
+            audit_log.record('task_completed', event_id=event_id, actor=current_user_id, task_id=result['task_id'])
+        else:
+            audit_log.record('task_assigned', event_id=event_id, actor=current_user_id, task_id=result['task_id'])
+    return results
+
+@routes.route('/tasks/batch', methods=['POST'])
+@jwt_required()
+@idempotent
+def batch_tasks():
+    """
+    Complete or assign many tasks for the current user in one write. Body:
+    {"operations": [{"action": "complete" | "assign", "task_id": ...}, ...]}.
+    Returns matched/modified per operation; repeating an operation that is
+    already done matches without modifying
+    """
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > Config.TASK_BATCH_MAX_OPERATIONS:
+        return jsonify({"error": f"At most {Config.TASK_BATCH_MAX_OPERATIONS} operations per call"}), 400
+    try:
+        operations = [(operation['action'], str(operation['task_id'])) for operation in operations]
+    except (KeyError, TypeError):
+        return jsonify({"error": "Each operation needs an action and a task_id"}), 400
+    unknown = {action for action, _ in operations if action not in TASK_ACTIONS}
+    if unknown:
+        return jsonify({"error": f"Unknown action(s): {', '.join(sorted(map(str, unknown)))}"}), 400
+
+    try:
+        results = apply_task_operations(operations)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "results": results,
+        "matched": sum(result['matched'] for result in results),
+        "modified": sum(result['modified'] for result in results)
+    }), 200
+
 @routes.route('/tasks/<task_id>/complete', methods=['POST'])
 @jwt_required()
+@idempotent
 def complete_task(task_id):
     """
-    Mark a task as completed
+    Mark a task as completed (a one-operation /tasks/batch)
     """
-    current_user_id = get_jwt_identity()
     try:
-        db_manager.mark_task_completed(task_id, current_user_id)
-        return jsonify({"message": "Task marked as completed"}), 200
+        result, = apply_task_operations([('complete', task_id)])
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+    if not result['matched']:
+        return jsonify({"error": "Task not found"}), 404
+    return jsonify({"message": "Task marked as completed"}), 200
+
+TASK_LIST_PROJECTION = {
+    'title': 1,
+    'description': 1,
+    'penalty': 1,
+    'status': 1,
+    'assigned_to_name': 1,
+    'completed': 1,
+    'scheduled_date': 1
+}
+
+def get_page_limit():
+    """
+    Read ?limit= for paginated list endpoints (None means everything)
+    """
+    limit = request.args.get('limit', type=int)
+    if limit is None:
+        return None
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, Config.MAX_PAGE_SIZE)
+
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson' or
+            request.accept_mimetypes.best == 'application/x-ndjson')
+
+def stream_ndjson(documents, formatter):
+    """
+    Stream formatted documents one JSON object per line, straight off the cursor
+    """
+    encoder = json_encoder._get_current_object()
+    def generate():
+        for document in documents:
+            yield encoder.dumps(formatter(document)) + b'\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def json_response(payload, status=200):
+    """
+    A list endpoint's JSON response, encoded by the app's JSON_ENCODER
+    """
+    return Response(json_encoder.dumps(payload), status=status, mimetype='application/json')
+
+def cached_json(key, version, build):
+    """
+    Serve the dict returned by `build()` as JSON through the response cache.
+    `key` names the route and its arguments and `version` the data behind it,
+    read before building so a concurrent write can only make the stored body
+    newer. While the version is unchanged the stored bytes are sent again, or
+    a bodyless 304 when If-None-Match carries their strong ETag, without a
+    query or any JSON encoding
+    """
+    entry = response_cache.get(key, version)
+    if entry is None:
+        entry = response_cache.set(key, version, json_encoder.dumps(build()))
+    etag, body = entry
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # The event comes from the token or a header, so shared caches must not store it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @routes.route('/tasks/all', methods=['GET'])
 def get_all_tasks():
     """
-    Get all tasks with user names
+    Get all tasks with user names. Supports ?limit= with keyset ?cursor=
+    pagination and ?format=ndjson streaming; JSON pages carry an ETag
     """
     try:
-        tasks = db_manager.get_all_tasks()
-        return jsonify({
-            "tasks": [{
-                "id": str(task['_id']),
-                "title": task['title'],
-                "description": task.get('description', ''),
-                "penalty": task.get('penalty', ''),
-                "status": task.get('status', 'pending'),
-                "assigned_to_name": task.get('assigned_to_name'),
-                "completed": task.get('completed', False),
-                "scheduled_date": task.get('scheduled_date').strftime('%Y-%m-%d') if task.get('scheduled_date') else None
-            } for task in tasks]
-        }), 200
-    except Exception as e:
+        limit = get_page_limit()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    after = None
+    if request.args.get('cursor'):
+        try:
+            scheduled_date, task_id = decode_cursor(request.args['cursor'])
+            after = (datetime.fromisoformat(scheduled_date), task_id)
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    event_id = current_event_id(optional_jwt_claims())
+    try:
+        if wants_ndjson():
+            return stream_ndjson(db_manager.find_tasks(TASK_LIST_PROJECTION, after=after, limit=limit,
+                                                       event_id=event_id), format_task)
+
+        def build():
+            tasks = list(db_manager.find_tasks(TASK_LIST_PROJECTION, after=after, limit=limit, event_id=event_id))
+            response = {"tasks": [format_task(task) for task in tasks]}
+            if limit:
+                last = tasks[-1] if len(tasks) == limit else None
+                response["next_cursor"] = encode_cursor(
+                    [last['scheduled_date'].isoformat(), last['_id']]
+                ) if last else None
+            return response
+
+        return cached_json(('tasks/all', event_id, limit, request.args.get('cursor')),
+                           db_manager.get_collection_version('tasks', event_id), build)
+    except STORAGE_ERRORS as e:
         return jsonify({"error": str(e)}), 500
 
 @routes.route('/user/paired-info', methods=['GET'])
@@ -216,77 +562,110 @@ def get_paired_info():
     Get user's paired information
     """
     current_user_id = get_jwt_identity()
-    user = db_manager.users_collection.find_one({'_id': current_user_id})
+    user = db_manager.get_user_with_pairing(current_user_id)
 
     if not user or not user.get('paired_with'):
         return jsonify({"error": "Not paired yet"}), 404
 
-    paired_user = db_manager.users_collection.find_one({'_id': user['paired_with']})
+    paired_user = user['paired_user']
 
     return jsonify({
         "paired_name": paired_user['full_name'] if paired_user else None
     }), 200
 
+@routes.route('/user/dashboard', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """
+    Everything the participant dashboard shows, from one precomputed document
+    """
+    current_user_id = get_jwt_identity()
+    dashboard = db_manager.get_dashboard(current_user_id)
+    revealed = db_manager.get_reveal_status(current_event_id())
+
+    next_task = dashboard['next_task']
+    if next_task:
+        due = next_task['scheduled_date'] <= datetime.utcnow()
+        next_task = {
+            "id": next_task['_id'],
+            # Tasks stay hidden until their scheduled date, as in /tasks/user
+            "title": next_task['title'] if due else None,
+            "scheduled_date": next_task['scheduled_date'].strftime('%Y-%m-%d')
+        }
+
+    return jsonify({
+        "paired_name": dashboard['paired_name'],
+        "pending_tasks": dashboard['pending_tasks'],
+        "completed_tasks": dashboard['completed_tasks'],
+        "next_task": next_task,
+        "needs_password_change": not dashboard['initial_password_set'],
+        "revealed": revealed,
+        "santa_name": dashboard['santa_name'] if revealed else None
+    }), 200
+
 @routes.route('/tasks/<task_id>/assign', methods=['POST'])
 @jwt_required()
+@idempotent
 def assign_task(task_id):
     """
-    Assign a task to the current user
+    Assign a task to the current user (a one-operation /tasks/batch)
     """
-    current_user_id = get_jwt_identity()
-    
     try:
-        db_manager.assign_task(task_id, current_user_id)
-        return jsonify({"message": "Task assigned successfully"}), 200
+        result, = apply_task_operations([('assign', task_id)])
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+    if not result['matched']:
+        return jsonify({"error": "Task not found"}), 404
+    return jsonify({"message": "Task assigned successfully"}), 200
 
 @routes.route('/init-admin', methods=['GET'])
+@rate_limited('init_admin')
 def init_admin():
     """
     Initialize admin account if it doesn't exist
     """
-    admin = db_manager.users_collection.find_one({'email': Config.ADMIN_EMAIL})
-    if not admin:
-        admin_data = {
-            '_id': str(uuid.uuid4()),
-            'full_name': 'Admin',
-            'email': Config.ADMIN_EMAIL,
-            'password_hash': generate_password_hash(Config.ADMIN_PASSWORD),
-            'role': 'admin',
-            'created_at': datetime.utcnow()
-        }
-        db_manager.users_collection.insert_one(admin_data)
+    if db_manager.ensure_admin_user('Admin', Config.ADMIN_EMAIL, Config.ADMIN_PASSWORD):
         return jsonify({"message": "Admin account created successfully"}), 201
     return jsonify({"message": "Admin account already exists"}), 200
 
 @routes.route('/login', methods=['POST'])
+@rate_limited('login_address')
+@rate_limited('login', client=login_client)
 def login():
     """
-    Handle user login
+    Handle user login. Participants sign in to one event (`event_id` in the
+    body, default DEFAULT_EVENT_ID), which is recorded in their token
     """
     data = request.json
     email = data.get('email')
     password = data.get('password')
+    event_id = data.get('event_id') or Config.DEFAULT_EVENT_ID
 
     if not email or not password:
         return jsonify({"error": "Email and password are required"}), 400
 
-    user = db_manager.users_collection.find_one({'email': email})
+    try:
+        user = db_manager.verify_user(email, password, event_id=event_id)
+    except PasswordQueueFull:
+        return jsonify({"error": "Too many logins in progress, please retry"}), 503, {'Retry-After': '1'}
 
     if not user:
+        audit_log.record('login_failed', event_id=event_id, email=email, ip=request.remote_addr)
         return jsonify({"error": "Invalid email or password"}), 401
-
-    if not check_password_hash(user['password_hash'], password):
-        return jsonify({"error": "Invalid email or password"}), 401
+    audit_log.record('login', event_id=user.get('event_id') or event_id, actor=user['_id'],
+                     role=user['role'], ip=request.remote_addr)
 
     # Create access token
-    access_token = create_access_token(identity=user['_id'])
+    access_token = create_access_token(identity=user['_id'], additional_claims={
+        "role": user['role'],
+        "event_id": user.get('event_id')
+    })
 
     return jsonify({
         "access_token": access_token,
         "role": user['role'],
-        "user_id": user['_id']
+        "user_id": user['_id'],
+        "event_id": user.get('event_id') or event_id
     }), 200
 
 @routes.route('/user/check-password-status', methods=['GET'])
@@ -318,90 +697,100 @@ def change_password():
         return jsonify({"error": "New password is required"}), 400
         
     try:
-        db_manager.update_password(current_user_id, new_password)
+        db_manager.update_password(current_user_id, new_password, event_id=get_jwt().get('event_id'))
         return jsonify({"message": "Password updated successfully"}), 200
+    except PasswordQueueFull:
+        return jsonify({"error": "Server busy, please retry"}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 @routes.route('/admin/clear-data', methods=['POST'])
 @jwt_required()
+@admin_required
 def clear_data():
     """
-    Clear all user data except admin
+    Clear one event's data (participants, tasks, pairings, settings); admin
+    accounts and other events are untouched
     """
     try:
-        # Keep admin account
-        admin = db_manager.users_collection.find_one({'role': 'admin'})
+        event_id = current_event_id()
+        db_manager.clear_event(event_id)
+        audit_log.record('event_cleared', event_id=event_id, actor=get_jwt_identity())
         
-        # Clear collections
-        db_manager.users_collection.delete_many({'role': 'participant'})
-        db_manager.tasks_collection.delete_many({})
-        db_manager.pairings_collection.delete_many({})
-        
-        return jsonify({"message": "All data cleared successfully"}), 200
+        return jsonify({"message": f"All data for event {event_id} cleared successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 @routes.route('/admin/users', methods=['GET'])
 @jwt_required()
+@admin_required
 def get_users():
     """
-    Get all users (for admin task assignment)
+    Get all users (for admin task assignment). Supports ?limit= with keyset
+    ?cursor= pagination and ?format=ndjson streaming; JSON pages carry an ETag
     """
     try:
-        users = list(db_manager.users_collection.find({'role': 'participant'}))
-        return jsonify({
-            "users": [{
-                "_id": user["_id"],
-                "full_name": user["full_name"]
-            } for user in users]
-        }), 200
+        limit = get_page_limit()
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        event_id = current_event_id()
+        if wants_ndjson():
+            return stream_ndjson(db_manager.find_participants({'full_name': 1}, after=after, limit=limit,
+                                                              event_id=event_id), format_participant)
+
+        def build():
+            users = list(db_manager.find_participants({'full_name': 1}, after=after, limit=limit, event_id=event_id))
+            response = {"users": [format_participant(user) for user in users]}
+            if limit:
+                response["next_cursor"] = encode_cursor(users[-1]['_id']) if len(users) == limit else None
+            return response
+
+        return cached_json(('admin/users', event_id, limit, request.args.get('cursor')),
+                           db_manager.get_collection_version('users', event_id), build)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 @routes.route('/admin/pairings', methods=['GET'])
 @jwt_required()
+@admin_required
 def get_all_pairings():
     """
-    Get all pairings (for Christmas Day reveal)
+    Get all pairings (for Christmas Day reveal), with an ETag
     """
     try:
-        pairings = list(db_manager.pairings_collection.find())
-        formatted_pairings = []
-        
-        for pair in pairings:
-            santa = db_manager.users_collection.find_one({'_id': pair['chris_mom_id']})
-            recipient = db_manager.users_collection.find_one({'_id': pair['chris_child_id']})
-            
-            if santa and recipient:
-                formatted_pairings.append({
-                    'santa_name': santa['full_name'],
-                    'recipient_name': recipient['full_name']
-                })
-        
-        return jsonify({
-            "message": "Merry Christmas! Here are all the Secret Santa pairings!",
-            "pairings": formatted_pairings
-        }), 200
+        event_id = current_event_id()
+        return cached_json(('admin/pairings', event_id), db_manager.get_collection_version('pairings', event_id),
+                           lambda: {
+                               "message": "Merry Christmas! Here are all the Secret Santa pairings!",
+                               "pairings": db_manager.get_pairings_with_names(event_id)
+                           })
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 @routes.route('/pairings/revealed', methods=['GET'])
 def check_pairings_revealed():
     """
-    Check if pairings have been revealed by admin
+    Check if pairings have been revealed by admin. The flag comes from the
+    settings cache and is its own version, so polls revalidate by ETag
     """
-    revealed = db_manager.get_reveal_status()
-    return jsonify({"revealed": revealed}), 200
+    event_id = current_event_id(optional_jwt_claims())
+    revealed = db_manager.get_reveal_status(event_id)
+    return cached_json(('pairings/revealed', event_id), revealed, lambda: {"revealed": revealed})
 
 @routes.route('/admin/toggle-reveal', methods=['POST'])
 @jwt_required()
+@admin_required
 def toggle_reveal():
     """
     Toggle the reveal status of Secret Santa pairings
     """
     try:
-        revealed = db_manager.toggle_reveal_status()
+        event_id = current_event_id()
+        revealed = db_manager.toggle_reveal_status(event_id)
+        audit_log.record('reveal_toggled', event_id=event_id, actor=get_jwt_identity(), revealed=revealed)
         return jsonify({
             "message": "Reveal status updated",
             "revealed": revealed
@@ -415,14 +804,150 @@ def get_my_santa():
     """
     Get user's Secret Santa (only if revealed)
     """
-    if not db_manager.get_reveal_status():
+    event_id = current_event_id()
+    if not db_manager.get_reveal_status(event_id):
         return jsonify({"error": "Secret Santa identities haven't been revealed yet!"}), 403
 
     current_user_id = get_jwt_identity()
-    santa = db_manager.get_user_santa(current_user_id)
+    santa = db_manager.get_user_santa(current_user_id, event_id=event_id)
     
     if santa:
         return jsonify({
             "santa_name": santa['full_name']
         }), 200
-    return jsonify({"error": "No Secret Santa found"}), 404
\ No newline at end of file
+    return jsonify({"error": "No Secret Santa found"}), 404
+
+@routes.route('/events', methods=['GET'])
+@jwt_required()
+def stream_events():
+    """
+    Server-Sent Events stream of reveal_toggled, task_created and
+    task_completed events. EventSource cannot send headers, so the token may
+    be passed as ?jwt=. Only events for the caller's event (or global ones)
+    are sent
+    """
+    event_id = current_event_id()
+    subscription = event_hub.subscribe()
+
+    def generate():
+        try:
+            yield f"retry: {Config.SSE_RETRY_MS}\n\n"
+            while True:
+                message = subscription.get(timeout=Config.SSE_HEARTBEAT_INTERVAL)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if (message[1] or {}).get('event_id', event_id) != event_id:
+                    continue
+                yield format_sse(*message)
+        finally:
+            event_hub.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@routes.route('/admin/events', methods=['GET'])
+@jwt_required()
+@admin_required
+def list_events():
+    """
+    List every event (office group / game)
+    """
+    return jsonify({"events": [{
+        "id": event['_id'],
+        "name": event.get('name'),
+        "created_at": event['created_at'].isoformat() if event.get('created_at') else None
+    } for event in db_manager.list_events()]}), 200
+
+@routes.route('/admin/events', methods=['POST'])
+@jwt_required()
+@admin_required
+def create_event():
+    """
+    Create an event; its id scopes users, tasks, pairings and the reveal
+    """
+    data = request.get_json(silent=True) or {}
+    if not data.get('name'):
+        return jsonify({"error": "name is required"}), 400
+    try:
+        event_id = db_manager.create_event(data['name'], event_id=data.get('id'))
+    except DuplicateKeyError:
+        return jsonify({"error": f"Event {data.get('id')} already exists"}), 409
+    return jsonify({"message": "Event created", "event_id": event_id}), 201
+
+@routes.route('/admin/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_event():
+    """
+    Download an event's participants (without password hashes), pairings and
+    tasks as gzip-compressed NDJSON, streamed off the storage cursors
+    """
+    event_id = current_event_id()
+    if not db_manager.get_event(event_id):
+        return jsonify({"error": f"Event {event_id} does not exist"}), 404
+    chunks = export_snapshot(db_manager._get_current_object(), json_encoder._get_current_object(), event_id,
+                             batch_size=Config.EXPORT_BATCH_SIZE,
+                             compression_level=Config.EXPORT_COMPRESSION_LEVEL)
+    audit_log.record('event_exported', event_id=event_id, actor=get_jwt_identity())
+    return Response(stream_with_context(chunks), mimetype='application/gzip', headers={
+        'Content-Disposition': f'attachment; filename="{secure_filename(event_id) or "event"}.ndjson.gz"'
+    })
+
+@routes.route('/admin/restore', methods=['POST'])
+@jwt_required()
+@admin_required
+def restore_event():
+    """
+    Load an /admin/export download into an existing, empty event. The body is
+    the gzip file as is, or plain NDJSON when sent as application/x-ndjson.
+    Participants sign in with their email as password again. A failed
+    restore leaves the event empty, so it can simply be retried. Restores
+    hold the event's bulk_write gate, so they exclude each other and bulk
+    task creation
+    """
+    event_id = current_event_id()
+    if not db_manager.get_event(event_id):
+        return jsonify({"error": f"Event {event_id} does not exist; create it first"}), 404
+
+    token = rate_limiter.acquire('bulk_write', event_id, Config.BULK_WRITE_GATE_TTL, wait=Config.PAIRING_GATE_WAIT)
+    if token is None:
+        return gate_busy('bulk_write', event_id)
+    started = time.perf_counter()
+    try:
+        if (list(db_manager.find_participants({'_id': 1}, limit=1, event_id=event_id)) or
+                list(db_manager.find_tasks({'_id': 1}, limit=1, event_id=event_id))):
+            return jsonify({"error": f"Event {event_id} already has data; clear it before restoring"}), 409
+        # If the gate lapsed mid-restore, whoever holds it now may have written
+        # to the event, so a failure must not clear it
+        counts, next_release = restore_snapshot(
+            db_manager, request.stream, event_id,
+            batch_size=Config.RESTORE_BATCH_SIZE, compressed=request.mimetype not in NDJSON_CONTENT_TYPES,
+            owns_event=lambda: rate_limiter.holds('bulk_write', event_id, token)
+        )
+    except SnapshotError as e:
+        return jsonify({"error": str(e)}), 400
+    except DuplicateKeyError as e:
+        return jsonify({"error": f"{e}; check the export is not already loaded into another event"}), 409
+    finally:
+        rate_limiter.release('bulk_write', event_id, token)
+
+    if next_release:
+        task_scheduler.schedule(None, next_release)
+    audit_log.record('event_restored', event_id=event_id, actor=get_jwt_identity(), **counts)
+    return jsonify({
+        "message": f"Event {event_id} restored",
+        "restored": counts,
+        "timing_ms": round((time.perf_counter() - started) * 1000, 2)
+    }), 200
+
+@routes.route('/admin/pool-stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_pool_stats():
+    """
+    MongoDB connection pool usage for this worker
+    """
+    return jsonify(db_manager.get_pool_stats()), 200
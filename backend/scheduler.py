@@ -0,0 +1,226 @@
+# backend/scheduler.py
+
+import heapq
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from settings_cache import event_setting_key
+
+logger = logging.getLogger(__name__)
+
+class TaskReleaseScheduler:
+    """
+    Releases tasks when their scheduled date arrives. One worker at a time
+    holds a lease document and runs releases; it keeps a min-heap of upcoming
+    scheduled dates so it sleeps until the next one is due, then flips every
+    due task to released in batches. All state is in Mongo, so a restarted or
+    replacement worker picks up wherever the last lease holder stopped.
+
+    Each batch is recorded in the '<event_id>:task_release' settings document
+    of every event it touches, which the settings watcher in every worker
+    turns into a 'tasks_released' event for that event
+    """
+    LEASE_ID = 'task_release'
+    SETTING_KEY = 'task_release'
+
+    def __init__(self, db_manager, batch_size=500, refresh_interval=30, lease_ttl=30):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.lease_ttl = lease_ttl
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._lock = threading.Lock()
+        self._heap = []  # (scheduled_date, task_id) of the earliest unreleased tasks
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lease_renewed_at = None
+        self._next_refresh = 0.0
+        self._migrated = False
+
+    @property
+    def tasks(self):
+        return self.db_manager.tasks_collection
+
+    @property
+    def leases(self):
+        return self.db_manager.db['leases']
+
+    def start(self):
+        """
+        Start the scheduler thread (idempotent)
+        """
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name='task-release', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the thread and hand the lease over to another worker straight away
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        try:
+            self.leases.update_one(
+                {'_id': self.LEASE_ID, 'owner': self.owner_id},
+                {'$set': {'expires_at': datetime.utcnow()}}
+            )
+        except PyMongoError:
+            pass
+
+    def schedule(self, task_id, scheduled_date):
+        """
+        Tell the scheduler about a task created in this process so it wakes
+        on time (task_id may be None for a plain wake-up); tasks created
+        elsewhere are found by the periodic refresh
+        """
+        with self._lock:
+            if not self._thread:
+                return  # Not running; start() loads everything from Mongo anyway
+            heapq.heappush(self._heap, (scheduled_date, task_id or ''))
+        self._wake.set()
+
+    def is_leader(self):
+        return self._lease_renewed_at is not None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                timeout = self._tick()
+            except PyMongoError:
+                logger.exception("Task release failed, retrying")
+                timeout = self.lease_ttl / 3
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _tick(self):
+        """
+        One scheduling pass; returns how long to sleep before the next one
+        """
+        if not self._hold_lease():
+            return self.lease_ttl / 3
+
+        if time.monotonic() >= self._next_refresh:
+            self._load()
+
+        now = datetime.utcnow()
+        with self._lock:
+            due = bool(self._heap) and self._heap[0][0] <= now
+        if due:
+            self.release_due(now)
+
+        with self._lock:
+            next_due = self._heap[0][0] if self._heap else None
+        timeout = min(self.lease_ttl / 3, max(self._next_refresh - time.monotonic(), 0))
+        if next_due is not None:
+            timeout = min(timeout, max((next_due - datetime.utcnow()).total_seconds(), 0))
+        return timeout
+
+    def _hold_lease(self):
+        """
+        Acquire or renew the lease; returns whether this worker holds it
+        """
+        if self._lease_renewed_at and time.monotonic() - self._lease_renewed_at < self.lease_ttl / 3:
+            return True
+
+        now = datetime.utcnow()
+        try:
+            self.leases.find_one_and_update(
+                {'_id': self.LEASE_ID, '$or': [
+                    {'owner': self.owner_id},
+                    {'expires_at': {'$lte': now}}
+                ]},
+                {'$set': {'owner': self.owner_id, 'expires_at': now + timedelta(seconds=self.lease_ttl)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Held by another worker: the upsert collided with its document
+            if self._lease_renewed_at:
+                logger.info("Lost the task release lease")
+            self._lease_renewed_at = None
+            return False
+
+        if not self._lease_renewed_at:
+            logger.info("Acquired the task release lease as %s", self.owner_id)
+            self._next_refresh = 0.0
+        self._lease_renewed_at = time.monotonic()
+        return True
+
+    def _load(self):
+        """
+        Rebuild the heap from the earliest unreleased tasks in Mongo
+        """
+        if not self._migrated:
+            # Tasks from before the release flag existed
+            self.tasks.update_many({'released': {'$exists': False}}, {'$set': {'released': False}})
+            self._migrated = True
+
+        upcoming = [(task['scheduled_date'], task['_id']) for task in self.tasks.find(
+            {'released': False}, {'scheduled_date': 1}
+        ).sort('scheduled_date', 1).limit(self.batch_size)]
+        heapq.heapify(upcoming)
+        with self._lock:
+            self._heap = upcoming
+        self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def release_due(self, now=None):
+        """
+        Release every task due by `now` in batches of `batch_size`; returns
+        the number released
+        """
+        now = now or datetime.utcnow()
+        released = 0
+        while True:
+            batch = list(self.tasks.find(
+                {'released': False, 'scheduled_date': {'$lte': now}},
+                {'assigned_to': 1, 'event_id': 1}
+            ).sort('scheduled_date', 1).limit(self.batch_size))
+            if not batch:
+                break
+
+            self.tasks.update_many(
+                {'_id': {'$in': [task['_id'] for task in batch]}, 'released': False},
+                {'$set': {'released': True, 'released_at': now}}
+            )
+            released += len(batch)
+            self._record_batch(batch, now)
+            if len(batch) < self.batch_size:
+                break
+
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                # Everything loaded has gone out; look for later tasks
+                self._next_refresh = 0.0
+        return released
+
+    def _record_batch(self, batch, released_at):
+        by_event = {}
+        for task in batch:
+            by_event.setdefault(self.db_manager.resolve_event(task.get('event_id')), []).append(task)
+        for event_id, tasks in by_event.items():
+            key = event_setting_key(event_id, self.SETTING_KEY)
+            assigned_to = sorted({task['assigned_to'] for task in tasks if task.get('assigned_to')})
+            settings = self.db_manager.db.settings.find_one_and_update(
+                {'_id': key},
+                {'$set': {'assigned_to': assigned_to, 'count': len(tasks), 'released_at': released_at},
+                 '$inc': {'version': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            self.db_manager.settings_cache.put(key, settings)
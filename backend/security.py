@@ -0,0 +1,51 @@
+# backend/security.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+class PasswordQueueFull(Exception):
+    pass
+
+class PasswordHasher:
+    """
+    Password hashing with configurable parameters. Hashing and verification run
+    in a bounded worker pool (PBKDF2 releases the GIL) so a login spike queues
+    a limited amount of work and then fails fast instead of piling up threads
+    """
+    def __init__(self, method, salt_length, workers, queue_limit):
+        self.method = method
+        self.salt_length = salt_length
+        self.generate = partial(generate_password_hash, method=method, salt_length=salt_length)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    def submit(self, fn, *args):
+        """
+        Run `fn` in the pool and return its future, or raise PasswordQueueFull
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PasswordQueueFull("Too many password operations in progress")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password):
+        return self.submit(self.generate, password).result()
+
+    def verify(self, password_hash, password):
+        return self.submit(check_password_hash, password_hash, password).result()
+
+    def needs_rehash(self, password_hash):
+        """
+        Whether a stored hash was made with different parameters than configured
+        """
+        method, _, rest = password_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != self.method or len(salt) != self.salt_length
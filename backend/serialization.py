@@ -0,0 +1,109 @@
+# backend/serialization.py
+#
+# Response encoding for the list endpoints. Formatters build each response
+# dict straight from the projected document and leave datetimes and dates for
+# the encoder, which writes them natively instead of going through strftime.
+# JSON_ENCODER picks the encoder:
+#
+#   auto    orjson when it is installed, otherwise json
+#   orjson  orjson (pip install orjson)
+#   json    the standard library
+#
+# Both encoders write compact JSON with keys in formatter order, dates as
+# YYYY-MM-DD and datetimes as ISO 8601.
+
+import json
+from datetime import date
+
+from bson.objectid import ObjectId
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library encoder is used instead
+    orjson = None
+
+JSON_ENCODERS = ('auto', 'orjson', 'json')
+
+def encode_default(value):
+    """
+    Encode the values neither encoder handles itself
+    """
+    if isinstance(value, date):  # Also datetime
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class JsonEncoder:
+    """
+    Standard library encoder
+    """
+    name = 'json'
+
+    def dumps(self, value):
+        """
+        Encode `value` as UTF-8 JSON bytes
+        """
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=encode_default).encode()
+
+class OrjsonEncoder(JsonEncoder):
+    """
+    orjson encoder; dates and datetimes are written without calling back into Python
+    """
+    name = 'orjson'
+
+    def dumps(self, value):
+        return orjson.dumps(value, default=encode_default)
+
+def create_encoder(name='auto'):
+    """
+    Build the encoder named by JSON_ENCODER
+    """
+    if name == 'auto':
+        name = 'orjson' if orjson else 'json'
+    if name == 'orjson':
+        if orjson is None:
+            raise RuntimeError("JSON_ENCODER is 'orjson' but orjson is not installed")
+        return OrjsonEncoder()
+    if name == 'json':
+        return JsonEncoder()
+    raise ValueError(f"Unknown JSON_ENCODER '{name}', expected one of {', '.join(JSON_ENCODERS)}")
+
+def format_task(task):
+    """
+    A task list entry from a TASK_LIST_PROJECTION-shaped document
+    """
+    get = task.get
+    scheduled_date = get('scheduled_date')
+    return {
+        "id": task['_id'],
+        "title": task['title'],
+        "description": get('description', ''),
+        "penalty": get('penalty', ''),
+        "status": get('status', 'pending'),
+        "assigned_to_name": get('assigned_to_name'),
+        "completed": get('completed', False),
+        "scheduled_date": scheduled_date.date() if scheduled_date else None
+    }
+
+def format_user_task(task):
+    """
+    A participant's own task list entry
+    """
+    get = task.get
+    scheduled_date = get('scheduled_date')
+    return {
+        "id": task['_id'],
+        "title": task['title'],
+        "description": get('description', ''),
+        "penalty": get('penalty', ''),
+        "status": get('status', 'pending'),
+        "completed": get('completed', False),
+        "scheduled_date": scheduled_date.date() if scheduled_date else None
+    }
+
+def format_participant(user):
+    return {
+        "_id": user["_id"],
+        "full_name": user["full_name"]
+    }
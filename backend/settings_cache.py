@@ -0,0 +1,169 @@
+# backend/settings_cache.py
+
+import logging
+import threading
+import time
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+def event_setting_key(event_id, key):
+    """
+    Settings _id of a per-event setting such as reveal_status
+    """
+    return f"{event_id}:{key}"
+
+def split_setting_key(setting_id):
+    """
+    (event_id, key) for a settings _id; event_id is None for global settings
+    """
+    event_id, _, key = setting_id.rpartition(':')
+    return event_id or None, key
+
+class SettingsCache:
+    """
+    In-process cache of documents in the settings collection. Every settings
+    write bumps a 'version' field; entries expire after `ttl` seconds and are
+    invalidated early when a background watcher sees a newer version, either
+    from a change stream or by polling the version stamps
+    """
+    def __init__(self, collection, ttl=5.0, poll_interval=1.0, use_change_stream=False):
+        self.collection = collection
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.use_change_stream = use_change_stream
+
+        self._lock = threading.Lock()
+        self._entries = {}    # key -> (expires_at, document)
+        self._versions = {}   # key -> last version seen by this process
+        self._baselined = False  # Set once the watcher has seen every existing key
+        self._listeners = []
+        self._watcher = None
+        self._stopped = threading.Event()
+
+    def get(self, key):
+        """
+        Return the cached settings document for `key`, loading it on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        document = self.collection.find_one({'_id': key})
+        if self._store(key, document):
+            self._notify(key)
+        return document
+
+    def put(self, key, document):
+        """
+        Record a document this process just wrote and notify listeners
+        """
+        self._store(key, document)
+        self._notify(key)
+
+    def invalidate(self, key):
+        """
+        Forget a document this process just changed and notify listeners
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+        self._notify(key)
+
+    def add_listener(self, callback):
+        """
+        Call `callback(key)` whenever a settings document changes
+        """
+        self._listeners.append(callback)
+
+    def start(self):
+        """
+        Start the background watcher (idempotent)
+        """
+        with self._lock:
+            if self._watcher:
+                return
+            self._watcher = threading.Thread(target=self._watch, name='settings-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _store(self, key, document):
+        """
+        Cache a document; returns True if its version is new to this process
+        """
+        version = document.get('version', 0) if document else None
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, document)
+            changed = key in self._versions and self._versions[key] != version
+            self._versions[key] = version
+        return changed
+
+    def _notify(self, key):
+        for callback in list(self._listeners):
+            try:
+                callback(key)
+            except Exception:
+                logger.exception("Settings listener failed for %s", key)
+
+    def _version_changed(self, key, version):
+        with self._lock:
+            if key not in self._versions:
+                # Before the baseline a first sighting just records it; after,
+                # the key was created since (e.g. a new event's setting)
+                self._versions[key] = version
+                return self._baselined
+            if self._versions[key] == version:
+                return False
+            self._versions[key] = version
+            self._entries.pop(key, None)
+            return True
+
+    def _watch(self):
+        while not self._stopped.is_set():
+            if self.use_change_stream:
+                try:
+                    self._watch_change_stream()
+                except OperationFailure:
+                    # Standalone servers have no change streams; poll instead
+                    logger.info("Change streams unavailable, polling settings versions")
+                    self.use_change_stream = False
+                except Exception:
+                    logger.exception("Settings change stream failed, falling back to polling")
+                    self.use_change_stream = False
+                continue
+
+            try:
+                self._poll_versions()
+            except Exception:
+                logger.exception("Settings watcher error, retrying")
+            self._stopped.wait(self.poll_interval)
+
+    def _poll_versions(self):
+        seen = set()
+        for document in self.collection.find({}, {'version': 1}):
+            seen.add(document['_id'])
+            if self._version_changed(document['_id'], document.get('version', 0)):
+                self._notify(document['_id'])
+        self._baselined = True
+
+        with self._lock:
+            deleted = [key for key, version in self._versions.items()
+                       if key not in seen and version is not None]
+        for key in deleted:
+            if self._version_changed(key, None):
+                self._notify(key)
+
+    def _watch_change_stream(self):
+        with self.collection.watch(full_document='updateLookup') as stream:
+            self._baselined = True  # Every change from here on is new
+            for change in stream:
+                if self._stopped.is_set():
+                    return
+                key = change['documentKey']['_id']
+                document = change.get('fullDocument')
+                if self._version_changed(key, document.get('version', 0) if document else None):
+                    self._notify(key)
@@ -0,0 +1,140 @@
+# backend/snapshots.py
+#
+# Event export and restore, for archiving a finished game or moving it to
+# another environment. An export is gzip-compressed NDJSON: a header line,
+# then one line per participant (without password hashes), pairing and task,
+# in that order:
+#
+#   {"format": "secret-santa-event", "version": 1, "event": {...}, "revealed": false, ...}
+#   {"collection": "users", "document": {"_id": "...", "full_name": "...", ...}}
+#
+# Both directions stream: the export is compressed as it is read off the
+# storage cursors and the restore decompresses the upload line by line into
+# insert batches, so memory stays flat however large the event is.
+
+import gzip
+import json
+import zlib
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+from importer import chunked
+from storage import VERSIONED_COLLECTIONS
+
+SNAPSHOT_FORMAT = 'secret-santa-event'
+SNAPSHOT_VERSION = 1
+# Written and restored in this order, so references resolve to restored users
+SNAPSHOT_COLLECTIONS = ('users', 'pairings', 'tasks')
+DATE_FIELDS = ('created_at', 'scheduled_date', 'released_at', 'completed_at', 'assigned_at')
+
+class SnapshotError(Exception):
+    pass
+
+def export_snapshot(storage, encoder, event_id, batch_size=1000, compression_level=6):
+    """
+    Yield an event's export as gzip chunks. Documents are encoded and fed to
+    one compressor straight off the cursors; only the compressor's window and
+    one cursor batch are held at a time
+    """
+    event = storage.get_event(event_id)
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'event': {'id': event_id, 'name': event.get('name') if event else None},
+        'revealed': storage.get_reveal_status(event_id),
+        'exported_at': datetime.utcnow()
+    }
+    chunk = compressor.compress(encoder.dumps(header) + b'\n')
+    for collection in SNAPSHOT_COLLECTIONS:
+        for document in storage.iter_event_documents(collection, event_id, batch_size=batch_size):
+            chunk += compressor.compress(encoder.dumps({'collection': collection, 'document': document}) + b'\n')
+            if chunk:
+                yield chunk
+                chunk = b''
+    yield chunk + compressor.flush()
+
+def iter_snapshot_lines(stream, compressed=True):
+    """
+    Decoded lines of an uploaded export, decompressed incrementally unless
+    `compressed` is False. Yields (line number, record)
+    """
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+    try:
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise SnapshotError(f"Line {line_number}: not valid JSON")
+            if not isinstance(record, dict):
+                raise SnapshotError(f"Line {line_number}: expected a JSON object")
+            yield line_number, record
+    except (OSError, EOFError, zlib.error) as e:
+        raise SnapshotError(f"Could not decompress the upload: {e}")
+
+def load_document(line_number, record):
+    """
+    The (collection, document) of one export line, with its dates parsed back
+    """
+    collection, document = record.get('collection'), record.get('document')
+    if collection not in SNAPSHOT_COLLECTIONS or not isinstance(document, dict) or not document.get('_id'):
+        raise SnapshotError(f"Line {line_number}: expected a users, pairings or tasks document with an _id")
+    for field in DATE_FIELDS:
+        if document.get(field):
+            try:
+                document[field] = datetime.fromisoformat(document[field])
+            except (TypeError, ValueError):
+                raise SnapshotError(f"Line {line_number}: {field} is not an ISO 8601 date")
+    document.pop('event_id', None)
+    return collection, document
+
+def restore_snapshot(storage, stream, event_id, batch_size=1000, compressed=True, owns_event=None):
+    """
+    Load an export into the empty event `event_id` through chunked inserts,
+    one batch of documents in memory at a time. Returns the documents
+    restored per collection and the earliest unreleased task date for the
+    release scheduler. The batches commit separately, so if any step fails
+    the event is cleared again before the error is raised, unless
+    `owns_event()` says the caller no longer has the event to itself
+    """
+    try:
+        return _restore(storage, stream, event_id, batch_size, compressed)
+    except Exception:
+        if owns_event is None or owns_event():
+            storage.clear_event(event_id)
+        raise
+
+def _restore(storage, stream, event_id, batch_size, compressed):
+    lines = iter_snapshot_lines(stream, compressed=compressed)
+    _, header = next(lines, (None, None))
+    if not header or header.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError("Not an event export: the header line is missing")
+    if header.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported export version {header.get('version')}")
+
+    counts = dict.fromkeys(SNAPSHOT_COLLECTIONS, 0)
+    next_release = None
+    documents = (load_document(line_number, record) for line_number, record in lines)
+    for batch in chunked(documents, batch_size):
+        # A batch spanning two collections is inserted as one run of each
+        for collection, run in groupby(batch, key=itemgetter(0)):
+            run = [document for _, document in run]
+            counts[collection] += storage.restore_event_documents(collection, run, event_id=event_id)
+            if collection == 'tasks':
+                for task in run:
+                    scheduled_date = task.get('scheduled_date')
+                    if not task.get('released') and scheduled_date and (next_release is None or
+                                                                        scheduled_date < next_release):
+                        next_release = scheduled_date
+
+    storage.rebuild_dashboards(event_id)
+    if bool(header.get('revealed')) != storage.get_reveal_status(event_id):
+        storage.toggle_reveal_status(event_id)
+    for collection in VERSIONED_COLLECTIONS:
+        storage.bump_collection_version(collection, event_id)
+    return counts, next_release
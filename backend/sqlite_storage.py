@@ -0,0 +1,994 @@
+# backend/sqlite_storage.py
+#
+# Embedded storage backend (STORAGE_BACKEND=sqlite). One database file in WAL
+# mode, so readers never wait on the writer and several workers on one node
+# can share it. Every statement is a fixed SQL string with bound parameters,
+# which sqlite3 compiles once per connection and reuses from its statement
+# cache. Dashboards are computed on read from indexed queries instead of being
+# maintained as separate documents, and tasks become visible on their
+# scheduled date without the release scheduler.
+
+import itertools
+import json
+import re
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import InsertOneResult, UpdateResult
+
+from instrumentation import CommandMetrics, PoolMetrics
+from security import PasswordHasher
+from settings_cache import SettingsCache, event_setting_key
+from storage import DASHBOARD_DEFAULTS, VERSIONED_COLLECTIONS, Storage, collection_version_key, plan_task_operations
+from utils import hash_passwords
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS events (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        created_at TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        event_id TEXT,
+        full_name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        password_hash TEXT NOT NULL,
+        role TEXT NOT NULL,
+        is_paired INTEGER NOT NULL DEFAULT 0,
+        paired_with TEXT,
+        created_at TEXT,
+        initial_password_set INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        event_id TEXT NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        penalty TEXT,
+        assigned_to TEXT,
+        assigned_to_name TEXT,
+        status TEXT NOT NULL,
+        scheduled_date TEXT NOT NULL,
+        released INTEGER NOT NULL DEFAULT 0,
+        released_at TEXT,
+        completed INTEGER NOT NULL DEFAULT 0,
+        completed_at TEXT,
+        created_at TEXT,
+        assigned_at TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS pairings (
+        id TEXT PRIMARY KEY,
+        event_id TEXT NOT NULL,
+        chris_mom_id TEXT NOT NULL,
+        chris_child_id TEXT NOT NULL,
+        created_at TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        document TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS idempotency_keys (
+        key TEXT PRIMARY KEY,
+        fingerprint TEXT NOT NULL,
+        status INTEGER,
+        body BLOB,
+        created_at TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS audit_log (
+        id INTEGER PRIMARY KEY,
+        event_id TEXT,
+        action TEXT NOT NULL,
+        actor TEXT,
+        at TEXT NOT NULL,
+        details TEXT
+    )"""
+)
+
+# Mirrors indexes.py: every event-scoped index leads with event_id. Admins
+# have no event, so the email uniqueness index treats NULL as ''
+INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS users_event_email ON users (coalesce(event_id, ''), email)",
+    "CREATE INDEX IF NOT EXISTS users_event_role ON users (event_id, role, id)",
+    "CREATE INDEX IF NOT EXISTS tasks_event_assignee_date ON tasks (event_id, assigned_to, scheduled_date)",
+    "CREATE INDEX IF NOT EXISTS tasks_event_date ON tasks (event_id, scheduled_date, id)",
+    "CREATE INDEX IF NOT EXISTS pairings_event_child ON pairings (event_id, chris_child_id)",
+    "CREATE INDEX IF NOT EXISTS pairings_event_santa ON pairings (event_id, chris_mom_id)",
+    "CREATE INDEX IF NOT EXISTS idempotency_keys_created ON idempotency_keys (created_at)",
+    "CREATE INDEX IF NOT EXISTS audit_log_event_at ON audit_log (event_id, at)",
+    "CREATE INDEX IF NOT EXISTS audit_log_at ON audit_log (at)"
+)
+
+USER_COLUMNS = ('id, event_id, full_name, email, password_hash, role, is_paired, paired_with, '
+                'created_at, initial_password_set')
+TASK_COLUMNS = ('id, event_id, title, description, penalty, assigned_to, assigned_to_name, status, '
+                'scheduled_date, released, released_at, completed, completed_at, created_at, assigned_at')
+
+INSERT_USER = f"INSERT INTO users ({USER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT DO NOTHING"
+INSERT_TASK = f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+INSERT_PAIRING = ("INSERT INTO pairings (id, event_id, chris_mom_id, chris_child_id, created_at) "
+                  "VALUES (?, ?, ?, ?, ?)")
+UPSERT_SETTING = ("INSERT INTO settings (key, version, document) VALUES (?, ?, ?) "
+                  "ON CONFLICT (key) DO UPDATE SET version = excluded.version, document = excluded.document")
+BUMP_SETTING = ("INSERT INTO settings (key, version, document) VALUES (?, 1, ?) "
+                "ON CONFLICT (key) DO UPDATE SET version = settings.version + 1, document = excluded.document")
+
+SELECT_USER = f"SELECT {USER_COLUMNS} FROM users WHERE id = ?"
+SELECT_LOGIN_USER = f"SELECT {USER_COLUMNS} FROM users WHERE coalesce(event_id, '') IN (?, '') AND email = ? LIMIT 1"
+SELECT_ADMIN = "SELECT id FROM users WHERE coalesce(event_id, '') = '' AND email = ?"
+SELECT_EVENT_USER_NAME = "SELECT full_name FROM users WHERE id = ? AND event_id = ?"
+SELECT_FULL_NAMES = "SELECT id, full_name FROM users WHERE id IN (SELECT value FROM json_each(?))"
+SELECT_PARTICIPANTS = (f"SELECT {USER_COLUMNS} FROM users WHERE event_id = ? AND role = 'participant' AND id > ? "
+                       "ORDER BY id LIMIT ?")
+SELECT_PARTICIPANTS_IN = (f"SELECT {USER_COLUMNS} FROM users WHERE event_id = ? AND role = 'participant' AND id > ? "
+                          "AND id IN (SELECT value FROM json_each(?)) ORDER BY id LIMIT ?")
+SELECT_PAIRS = "SELECT chris_mom_id, chris_child_id FROM pairings WHERE event_id = ?"
+SELECT_PAIRING_PAGE = ("SELECT id, chris_mom_id, chris_child_id, created_at FROM pairings "
+                       "WHERE event_id = ? AND (chris_mom_id, id) > (?, ?) ORDER BY chris_mom_id, id LIMIT ?")
+SELECT_PAIRINGS_WITH_NAMES = """
+    SELECT s.full_name AS santa_name, r.full_name AS recipient_name
+    FROM pairings p
+    JOIN users s ON s.id = p.chris_mom_id
+    JOIN users r ON r.id = p.chris_child_id
+    WHERE p.event_id = ?"""
+SELECT_SANTA = """
+    SELECT u.id, u.event_id, u.full_name, u.email, u.password_hash, u.role, u.is_paired, u.paired_with,
+           u.created_at, u.initial_password_set
+    FROM pairings p JOIN users u ON u.id = p.chris_mom_id
+    WHERE p.event_id = ? AND p.chris_child_id = ?
+    LIMIT 1"""
+SELECT_ALL_TASKS = f"SELECT {TASK_COLUMNS} FROM tasks WHERE event_id = ?"
+SELECT_TASK_PAGE = (f"SELECT {TASK_COLUMNS} FROM tasks WHERE event_id = ? AND (scheduled_date, id) > (?, ?) "
+                    "ORDER BY scheduled_date, id LIMIT ?")
+SELECT_USER_TASKS = (f"SELECT {TASK_COLUMNS} FROM tasks WHERE event_id = ? AND assigned_to = ? "
+                     "AND scheduled_date <= ? ORDER BY scheduled_date DESC")
+SELECT_TASK_ASSIGNMENT = "SELECT assigned_to, completed FROM tasks WHERE id = ? AND event_id = ?"
+SELECT_DASHBOARD = """
+    SELECT u.event_id, u.initial_password_set,
+        (SELECT r.full_name FROM pairings p JOIN users r ON r.id = p.chris_child_id
+         WHERE p.event_id = u.event_id AND p.chris_mom_id = u.id LIMIT 1) AS paired_name,
+        (SELECT s.full_name FROM pairings p JOIN users s ON s.id = p.chris_mom_id
+         WHERE p.event_id = u.event_id AND p.chris_child_id = u.id LIMIT 1) AS santa_name,
+        (SELECT count(*) FROM tasks t
+         WHERE t.event_id = u.event_id AND t.assigned_to = u.id AND t.completed = 0) AS pending_tasks,
+        (SELECT count(*) FROM tasks t
+         WHERE t.event_id = u.event_id AND t.assigned_to = u.id AND t.completed = 1) AS completed_tasks
+    FROM users u WHERE u.id = ?"""
+SELECT_NEXT_TASK = ("SELECT id, title, scheduled_date FROM tasks WHERE event_id = ? AND assigned_to = ? "
+                    "AND completed = 0 ORDER BY scheduled_date LIMIT 1")
+SELECT_SETTING = "SELECT version, document FROM settings WHERE key = ?"
+SELECT_SETTING_VERSIONS = "SELECT key, version FROM settings"
+
+UPDATE_PASSWORD = "UPDATE users SET password_hash = ?, initial_password_set = ? WHERE id = ?"
+UPDATE_USER_PAIRED = "UPDATE users SET is_paired = 1, paired_with = ? WHERE id = ?"
+UPDATE_RECIPIENT_PAIRED = "UPDATE users SET is_paired = 1 WHERE id = ? AND is_paired = 0"
+RESET_PAIRED = "UPDATE users SET is_paired = 0, paired_with = NULL WHERE event_id = ? AND role = 'participant'"
+UPDATE_TASK_ASSIGNEE = "UPDATE tasks SET assigned_to = ?, status = 'in-progress', assigned_at = ? WHERE id = ?"
+SELECT_TASK_STATES = ("SELECT id, assigned_to, completed FROM tasks "
+                      "WHERE event_id = ? AND id IN (SELECT value FROM json_each(?))")
+ASSIGN_TASK = ("UPDATE tasks SET assigned_to = ?, assigned_to_name = ?, status = 'in-progress', assigned_at = ? "
+               "WHERE id = ?")
+INSERT_IDEMPOTENCY_KEY = ("INSERT INTO idempotency_keys (key, fingerprint, created_at) VALUES (?, ?, ?) "
+                          "ON CONFLICT DO NOTHING")
+INSERT_AUDIT_EVENT = "INSERT INTO audit_log (event_id, action, actor, at, details) VALUES (?, ?, ?, ?, ?)"
+COMPLETE_TASK = ("UPDATE tasks SET completed = 1, completed_at = ?, status = 'completed' "
+                 "WHERE id = ? AND event_id = ? AND assigned_to = ? AND completed = 0")
+
+# Query shapes checked by audit_indexes, with representative parameters
+QUERY_SHAPES = (
+    ('users: login', SELECT_LOGIN_USER, ('e', 'a@b.c')),
+    ('users: participants page', SELECT_PARTICIPANTS, ('e', '', 50)),
+    ('tasks: page', SELECT_TASK_PAGE, ('e', '', '', 50)),
+    ('tasks: user tasks', SELECT_USER_TASKS, ('e', 'u', '9999')),
+    ('tasks: next task', SELECT_NEXT_TASK, ('e', 'u')),
+    ('pairings: santa of user', SELECT_SANTA, ('e', 'u')),
+    ('pairings: with names', SELECT_PAIRINGS_WITH_NAMES, ('e',)),
+    ('pairings: export page', SELECT_PAIRING_PAGE, ('e', '', '', 50)),
+    ('dashboards: user', SELECT_DASHBOARD, ('u',))
+)
+
+STATEMENT_TARGET = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+(\w+)', re.IGNORECASE)
+
+def dump_date(value):
+    """
+    Datetimes are stored as fixed-width ISO text, which sorts chronologically
+    """
+    return value.isoformat(sep=' ', timespec='microseconds') if value else None
+
+def load_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+def user_document(row):
+    return {
+        '_id': row['id'],
+        'event_id': row['event_id'],
+        'full_name': row['full_name'],
+        'email': row['email'],
+        'password_hash': row['password_hash'],
+        'role': row['role'],
+        'is_paired': bool(row['is_paired']),
+        'paired_with': row['paired_with'],
+        'created_at': load_date(row['created_at']),
+        'initial_password_set': bool(row['initial_password_set'])
+    }
+
+def task_document(row):
+    return {
+        '_id': row['id'],
+        'event_id': row['event_id'],
+        'title': row['title'],
+        'description': row['description'],
+        'penalty': row['penalty'],
+        'assigned_to': row['assigned_to'],
+        'assigned_to_name': row['assigned_to_name'],
+        'status': row['status'],
+        'scheduled_date': load_date(row['scheduled_date']),
+        'released': bool(row['released']),
+        'released_at': load_date(row['released_at']),
+        'completed': bool(row['completed']),
+        'completed_at': load_date(row['completed_at']),
+        'created_at': load_date(row['created_at']),
+        'assigned_at': load_date(row['assigned_at'])
+    }
+
+def export_document(collection, row):
+    """
+    An exported document: the stored one without event_id or password_hash
+    """
+    if collection == 'users':
+        document = user_document(row)
+        del document['password_hash']
+    elif collection == 'tasks':
+        document = task_document(row)
+    else:
+        document = {
+            '_id': row['id'],
+            'chris_mom_id': row['chris_mom_id'],
+            'chris_child_id': row['chris_child_id'],
+            'created_at': load_date(row['created_at'])
+        }
+    document.pop('event_id', None)
+    return document
+
+# Keyset page query and the columns it resumes after, per exported collection
+EXPORT_PAGES = {
+    'users': (SELECT_PARTICIPANTS, ('id',)),
+    'pairings': (SELECT_PAIRING_PAGE, ('chris_mom_id', 'id')),
+    'tasks': (SELECT_TASK_PAGE, ('scheduled_date', 'id'))
+}
+
+def update_result(count):
+    return UpdateResult({'n': count, 'nModified': count, 'ok': 1}, acknowledged=True)
+
+def load_setting(row):
+    """
+    A settings document with the row's version column, which BUMP_SETTING
+    increments without rewriting the document
+    """
+    return dict(json.loads(row['document']), version=row['version'])
+
+class SettingsTable:
+    """
+    The two settings reads SettingsCache makes, served from the settings
+    table, so the same cache and version-polling watcher work for both backends.
+    The version column is the only version: documents are returned with it
+    """
+    def __init__(self, storage):
+        self.storage = storage
+
+    def find_one(self, query):
+        rows = self.storage._query(SELECT_SETTING, (query['_id'],))
+        return load_setting(rows[0]) if rows else None
+
+    def find(self, query=None, projection=None):
+        return [{'_id': row['key'], 'version': row['version']}
+                for row in self.storage._query(SELECT_SETTING_VERSIONS)]
+
+class SqliteStorage(Storage):
+    """
+    SQLite storage backend
+    """
+    releases_on_read = True
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.SQLITE_PATH
+        self.pool_metrics = PoolMetrics()
+        # Fed one event per statement so /metrics and the benchmarks count queries
+        self.command_metrics = CommandMetrics()
+        self._statement_ids = itertools.count()
+        self._targets = {}  # SQL -> (verb, table)
+
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # An in-memory database only exists inside one connection, so every
+        # thread shares it under a lock
+        self._shared_lock = threading.RLock()
+        self._shared = self._open() if self.path == ':memory:' else None
+
+        self.settings_cache = SettingsCache(
+            SettingsTable(self),
+            ttl=config.SETTINGS_CACHE_TTL,
+            poll_interval=config.SETTINGS_POLL_INTERVAL,
+            use_change_stream=False
+        )
+        self.password_hasher = PasswordHasher(
+            config.PASSWORD_HASH_METHOD,
+            config.PASSWORD_SALT_LENGTH,
+            workers=config.PASSWORD_WORKERS,
+            queue_limit=config.PASSWORD_QUEUE_LIMIT
+        )
+
+    def _open(self):
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,  # Transactions are explicit (see _transaction)
+            check_same_thread=False,
+            cached_statements=self.config.SQLITE_CACHED_STATEMENTS
+        )
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')  # Durable across crashes, fsync per checkpoint
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _connection(self):
+        """
+        This thread's connection (or the shared in-memory one, locked)
+        """
+        if self._shared is not None:
+            with self._shared_lock:
+                yield self._shared
+            return
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._open()
+        yield connection
+
+    @contextmanager
+    def _transaction(self):
+        """
+        A write transaction; BEGIN IMMEDIATE takes the write lock up front so
+        concurrent writers queue on busy_timeout instead of failing mid-way
+        """
+        with self._connection() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def _execute(self, connection, sql, parameters=(), many=False):
+        target = self._targets.get(sql)
+        if target is None:
+            match = STATEMENT_TARGET.search(sql)
+            target = self._targets[sql] = (sql.split(None, 1)[0].lower(), match.group(1) if match else '')
+        event = SimpleNamespace(
+            command_name=target[0],
+            command={target[0]: target[1]},
+            request_id=next(self._statement_ids),
+            duration_micros=0
+        )
+        self.command_metrics.started(event)
+        started = time.perf_counter()
+        try:
+            cursor = connection.executemany(sql, parameters) if many else connection.execute(sql, parameters)
+        except sqlite3.Error:
+            event.duration_micros = int((time.perf_counter() - started) * 1e6)
+            self.command_metrics.failed(event)
+            raise
+        event.duration_micros = int((time.perf_counter() - started) * 1e6)
+        self.command_metrics.succeeded(event)
+        return cursor
+
+    def _query(self, sql, parameters=()):
+        with self._connection() as connection:
+            return self._execute(connection, sql, parameters).fetchall()
+
+    def ensure_indexes(self):
+        """
+        Create the tables and indexes; called once at app start-up
+        """
+        with self._connection() as connection:
+            for statement in SCHEMA + INDEXES:
+                connection.execute(statement)
+            connection.execute(
+                "INSERT INTO events (id, name, created_at) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+                (self.config.DEFAULT_EVENT_ID, 'Default event', dump_date(datetime.utcnow()))
+            )
+            connection.execute('PRAGMA optimize')
+
+    def audit_indexes(self):
+        """
+        EXPLAIN every known query shape; returns the ones with a full table scan
+        """
+        findings = []
+        with self._connection() as connection:
+            for name, sql, parameters in QUERY_SHAPES:
+                plan = [row['detail'] for row in connection.execute('EXPLAIN QUERY PLAN ' + sql, parameters)]
+                collscan = any(detail.startswith('SCAN ') and 'USING' not in detail for detail in plan)
+                if collscan:
+                    findings.append({'query': name, 'plan': plan, 'collscan': True})
+        return findings
+
+    def get_pool_stats(self):
+        with self._connections_lock:
+            connections = len(self._connections)
+        return {'backend': 'sqlite', 'path': self.path, 'connections_open': connections}
+
+    def create_event(self, name, event_id=None):
+        """
+        Register a new event (game); returns its id
+        """
+        event_id = event_id or str(uuid.uuid4())
+        try:
+            with self._transaction() as connection:
+                self._execute(connection, "INSERT INTO events (id, name, created_at) VALUES (?, ?, ?)",
+                              (event_id, name, dump_date(datetime.utcnow())))
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError(f"Event {event_id} already exists", 11000)
+        return event_id
+
+    def get_event(self, event_id):
+        rows = self._query("SELECT id, name, created_at FROM events WHERE id = ?", (event_id,))
+        return {'_id': rows[0]['id'], 'name': rows[0]['name'],
+                'created_at': load_date(rows[0]['created_at'])} if rows else None
+
+    def list_events(self):
+        return [{'_id': row['id'], 'name': row['name'], 'created_at': load_date(row['created_at'])}
+                for row in self._query("SELECT id, name, created_at FROM events ORDER BY created_at")]
+
+    def clear_event(self, event_id):
+        """
+        Delete one event's participants, tasks, pairings and settings
+        """
+        event_id = self.resolve_event(event_id)
+        prefix = event_setting_key(event_id, '')
+        with self._transaction() as connection:
+            for table in ('users', 'tasks', 'pairings'):
+                self._execute(connection, f"DELETE FROM {table} WHERE event_id = ?", (event_id,))
+            # Every key with the '<event_id>:' prefix, as a primary key range
+            self._execute(connection, "DELETE FROM settings WHERE key >= ? AND key < ?",
+                          (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)))
+            self._bump_versions(connection, event_id, *VERSIONED_COLLECTIONS)
+        for key in ('reveal_status', 'pairings_generation'):
+            self.settings_cache.invalidate(event_setting_key(event_id, key))
+        self._invalidate_versions(event_id, *VERSIONED_COLLECTIONS)
+
+    def ensure_admin_user(self, full_name, email, password):
+        """
+        Create the admin account with the given password unless it exists;
+        returns whether it was created
+        """
+        if self._query(SELECT_ADMIN, (email,)):
+            return False
+        with self._transaction() as connection:
+            cursor = self._execute(connection, INSERT_USER, (
+                str(uuid.uuid4()), None, full_name, email, self.password_hasher.hash(password),
+                'admin', 0, None, dump_date(datetime.utcnow()), 0
+            ))
+        return cursor.rowcount > 0
+
+    def create_admin_user(self, full_name, email):
+        """
+        Create admin user with a generated secure password
+        """
+        password = secrets.token_urlsafe(12)
+        user_id = str(uuid.uuid4())
+        with self._transaction() as connection:
+            cursor = self._execute(connection, INSERT_USER, (
+                user_id, None, full_name, email, self.password_hasher.hash(password),
+                'admin', 0, None, dump_date(datetime.utcnow()), 0
+            ))
+        if not cursor.rowcount:
+            raise DuplicateKeyError(f"A user with email {email} already exists", 11000)
+        return user_id, password
+
+    def create_participant_user(self, full_name, email, event_id=None):
+        """
+        Create participant user with email as initial password
+        """
+        inserted_ids, errors = self.create_participant_users([(full_name, email)], event_id=event_id)
+        if errors:
+            raise DuplicateKeyError(errors[0], 11000)
+        return inserted_ids[0]
+
+    def create_participant_users(self, users, event_id=None):
+        """
+        Bulk create participant users from (full_name, email) tuples in one
+        transaction. Returns the inserted ids by batch index and a
+        {batch index: error message} map for the rows that failed
+        """
+        event_id = self.resolve_event(event_id)
+        password_hashes = hash_passwords(
+            [email for _, email in users],
+            workers=self.config.IMPORT_HASH_WORKERS,
+            parallel_threshold=self.config.IMPORT_PARALLEL_THRESHOLD,
+            method=self.config.PASSWORD_HASH_METHOD,
+            salt_length=self.config.PASSWORD_SALT_LENGTH
+        )
+        created_at = dump_date(datetime.utcnow())
+        inserted_ids, errors = {}, {}
+        with self._transaction() as connection:
+            for index, ((full_name, email), password_hash) in enumerate(zip(users, password_hashes)):
+                user_id = str(uuid.uuid4())
+                cursor = self._execute(connection, INSERT_USER, (
+                    user_id, event_id, full_name, email, password_hash,  # Using email as initial password
+                    'participant', 0, None, created_at, 0
+                ))
+                if cursor.rowcount:
+                    inserted_ids[index] = user_id
+                else:
+                    errors[index] = f"A user with email {email} already exists"
+            if inserted_ids:
+                self._bump_versions(connection, event_id, 'users')
+        self._invalidate_versions(event_id, 'users')
+        return inserted_ids, errors
+
+    def verify_user(self, email, password, event_id=None):
+        """
+        Verify user credentials for an event (admins sign in to any event),
+        upgrading the stored hash if the hashing parameters have changed
+        """
+        rows = self._query(SELECT_LOGIN_USER, (self.resolve_event(event_id), email))
+        if not rows:
+            return None
+        user = user_document(rows[0])
+        if not self.password_hasher.verify(user['password_hash'], password):
+            return None
+
+        if self.password_hasher.needs_rehash(user['password_hash']):
+            user['password_hash'] = self.password_hasher.hash(password)
+            with self._transaction() as connection:
+                self._execute(connection, "UPDATE users SET password_hash = ? WHERE id = ?",
+                              (user['password_hash'], user['_id']))
+        return user
+
+    def get_user_by_id(self, user_id):
+        rows = self._query(SELECT_USER, (user_id,))
+        return user_document(rows[0]) if rows else None
+
+    def get_user_with_pairing(self, user_id):
+        """
+        Get a user together with the user they are paired with (as 'paired_user')
+        """
+        user = self.get_user_by_id(user_id)
+        if not user:
+            return None
+        paired_user = self.get_user_by_id(user['paired_with']) if user['paired_with'] else None
+        for document in (user, paired_user):
+            if document:
+                document.pop('password_hash')
+        user['paired_user'] = paired_user
+        return user
+
+    def update_password(self, user_id, new_password, event_id=None):
+        """
+        Update user's password and mark initial password as set
+        """
+        password_hash = self.password_hasher.hash(new_password)
+        with self._transaction() as connection:
+            cursor = self._execute(connection, UPDATE_PASSWORD, (password_hash, 1, user_id))
+        return update_result(cursor.rowcount)
+
+    def find_participants(self, projection=None, after=None, limit=None, event_id=None, user_ids=None):
+        """
+        An event's participants (optionally only `user_ids`) ordered by id,
+        resuming after the given id
+        """
+        event_id = self.resolve_event(event_id)
+        if user_ids is None:
+            rows = self._query(SELECT_PARTICIPANTS, (event_id, after or '', limit or -1))
+        else:
+            rows = self._query(SELECT_PARTICIPANTS_IN, (event_id, after or '', json.dumps(list(user_ids)), limit or -1))
+        return [user_document(row) for row in rows]
+
+    def _full_names(self, user_ids):
+        return {row['id']: row['full_name']
+                for row in self._query(SELECT_FULL_NAMES, (json.dumps(list(set(user_ids))),))}
+
+    def create_pairing(self, santa_id, recipient_id, event_id=None):
+        """
+        Create a one-to-one Secret Santa pairing
+        """
+        if santa_id == recipient_id:
+            raise Exception("Cannot pair user with themselves")
+
+        event_id = self.resolve_event(event_id)
+        pairing_id = str(uuid.uuid4())
+        with self._transaction() as connection:
+            self._execute(connection, UPDATE_USER_PAIRED, (recipient_id, santa_id))
+            self._execute(connection, UPDATE_USER_PAIRED, (santa_id, recipient_id))
+            self._execute(connection, INSERT_PAIRING, (
+                pairing_id, event_id, santa_id, recipient_id, dump_date(datetime.utcnow())
+            ))
+            self._bump_versions(connection, event_id, 'pairings')
+        self._invalidate_versions(event_id, 'pairings')
+        return InsertOneResult(pairing_id, acknowledged=True)
+
+    def replace_pairings(self, pairs, event_id=None):
+        """
+        Replace an event's pairings with the given (santa_id, recipient_id)
+        pairs and update the users' pairing flags in one transaction
+        """
+        for santa_id, recipient_id in pairs:
+            if santa_id == recipient_id:
+                raise Exception("Cannot pair user with themselves")
+
+        event_id = self.resolve_event(event_id)
+        created_at = datetime.utcnow()
+        pairing_documents = [{
+            '_id': str(uuid.uuid4()),
+            'event_id': event_id,
+            'chris_mom_id': santa_id,
+            'chris_child_id': recipient_id,
+            'created_at': created_at
+        } for santa_id, recipient_id in pairs]
+
+        with self._transaction() as connection:
+            self._execute(connection, "DELETE FROM pairings WHERE event_id = ?", (event_id,))
+            self._execute(connection, INSERT_PAIRING, [
+                (document['_id'], event_id, document['chris_mom_id'], document['chris_child_id'],
+                 dump_date(created_at))
+                for document in pairing_documents
+            ], many=True)
+            # Reset everyone, then point each Santa at their recipient
+            self._execute(connection, RESET_PAIRED, (event_id,))
+            self._execute(connection, UPDATE_USER_PAIRED,
+                          [(recipient_id, santa_id) for santa_id, recipient_id in pairs], many=True)
+            self._execute(connection, UPDATE_RECIPIENT_PAIRED,
+                          [(recipient_id,) for _, recipient_id in pairs], many=True)
+            self._bump_versions(connection, event_id, 'pairings')
+        self._invalidate_versions(event_id, 'pairings')
+        return pairing_documents
+
+    def clear_pairings(self, event_id=None):
+        """
+        Remove an event's pairings and reset its participants' pairing status
+        """
+        event_id = self.resolve_event(event_id)
+        with self._transaction() as connection:
+            self._execute(connection, "DELETE FROM pairings WHERE event_id = ?", (event_id,))
+            self._execute(connection, RESET_PAIRED, (event_id,))
+            self._bump_versions(connection, event_id, 'pairings')
+        self._invalidate_versions(event_id, 'pairings')
+
+    def get_pairs(self, event_id=None):
+        return [(row['chris_mom_id'], row['chris_child_id'])
+                for row in self._query(SELECT_PAIRS, (self.resolve_event(event_id),))]
+
+    def get_pairings_with_names(self, event_id=None):
+        """
+        An event's pairings with Santa and recipient names in one join
+        """
+        return [{'santa_name': row['santa_name'], 'recipient_name': row['recipient_name']}
+                for row in self._query(SELECT_PAIRINGS_WITH_NAMES, (self.resolve_event(event_id),))]
+
+    def get_user_santa(self, user_id, event_id=None):
+        """
+        Get the Secret Santa for a user
+        """
+        rows = self._query(SELECT_SANTA, (self.resolve_event(event_id), user_id))
+        return user_document(rows[0]) if rows else None
+
+    def get_setting(self, key):
+        """
+        Read a settings document through the in-process settings cache
+        """
+        self.settings_cache.start()
+        return self.settings_cache.get(key)
+
+    def get_reveal_status(self, event_id=None):
+        """
+        Check if an event's Secret Santa identities have been revealed
+        """
+        settings = self.get_setting(event_setting_key(self.resolve_event(event_id), "reveal_status"))
+        return settings.get("revealed", False) if settings else False
+
+    def toggle_reveal_status(self, event_id=None):
+        """
+        Toggle an event's reveal status inside one write transaction
+        """
+        key = event_setting_key(self.resolve_event(event_id), "reveal_status")
+        with self._transaction() as connection:
+            rows = self._execute(connection, SELECT_SETTING, (key,)).fetchall()
+            settings = load_setting(rows[0]) if rows else {'_id': key}
+            settings['revealed'] = not settings.get('revealed', False)
+            settings['version'] = settings.get('version', 0) + 1
+            self._execute(connection, UPSERT_SETTING, (key, settings['version'], json.dumps(settings)))
+        self.settings_cache.put(key, settings)
+        return settings['revealed']
+
+    def bump_collection_version(self, collection, event_id=None):
+        event_id = self.resolve_event(event_id)
+        with self._transaction() as connection:
+            self._bump_versions(connection, event_id, collection)
+        self._invalidate_versions(event_id, collection)
+
+    def _bump_versions(self, connection, event_id, *collections):
+        """
+        Give collections new version tokens inside the caller's transaction;
+        follow the commit with _invalidate_versions
+        """
+        for collection in collections:
+            key = collection_version_key(collection, event_id)
+            self._execute(connection, BUMP_SETTING, (key, json.dumps({'_id': key, 'value': uuid.uuid4().hex})))
+
+    def _invalidate_versions(self, event_id, *collections):
+        for collection in collections:
+            self.settings_cache.invalidate(collection_version_key(collection, event_id))
+
+    @staticmethod
+    def _task_row(event_id, title, description, penalty, assign_to, assigned_to_name, scheduled_date, now):
+        scheduled_date = scheduled_date or now
+        released = scheduled_date <= now
+        return (
+            str(uuid.uuid4()), event_id, title, description, penalty, assign_to, assigned_to_name,
+            'pending', dump_date(scheduled_date), int(released), dump_date(now) if released else None,
+            0, None, dump_date(now), None
+        )
+
+    def create_task(self, title, description, penalty='', assign_to=None, scheduled_date=None, event_id=None):
+        """
+        Create a new task with scheduled date
+        """
+        event_id = self.resolve_event(event_id)
+        assigned_to_name = None
+        if assign_to:
+            rows = self._query(SELECT_EVENT_USER_NAME, (assign_to, event_id))
+            if not rows:
+                raise Exception("Assignee is not part of this event")
+            assigned_to_name = rows[0]['full_name']
+
+        row = self._task_row(event_id, title, description, penalty, assign_to, assigned_to_name,
+                             scheduled_date, datetime.utcnow())
+        with self._transaction() as connection:
+            self._execute(connection, INSERT_TASK, row)
+            self._bump_versions(connection, event_id, 'tasks')
+        self._invalidate_versions(event_id, 'tasks')
+        return InsertOneResult(row[0], acknowledged=True)
+
+    def create_tasks(self, specs, assignee_names=None, batch_size=1000, event_id=None):
+        """
+        Bulk create tasks from (assign_to, title, description, penalty,
+        scheduled_date) tuples, one executemany transaction per batch. Returns
+        the number of tasks created and the earliest unreleased scheduled date
+        """
+        event_id = self.resolve_event(event_id)
+        specs = list(specs)
+        if assignee_names is None:
+            assignee_names = self._full_names([spec[0] for spec in specs if spec[0]])
+
+        now = datetime.utcnow()
+        next_release = None
+        for start in range(0, len(specs), batch_size):
+            rows = []
+            for assign_to, title, description, penalty, scheduled_date in specs[start:start + batch_size]:
+                rows.append(self._task_row(event_id, title, description, penalty, assign_to,
+                                           assignee_names.get(assign_to), scheduled_date, now))
+                if scheduled_date and scheduled_date > now and (next_release is None or scheduled_date < next_release):
+                    next_release = scheduled_date
+            with self._transaction() as connection:
+                self._execute(connection, INSERT_TASK, rows, many=True)
+                self._bump_versions(connection, event_id, 'tasks')
+        self._invalidate_versions(event_id, 'tasks')
+        return len(specs), next_release
+
+    def get_all_tasks(self, event_id=None):
+        """
+        Retrieve all of an event's tasks
+        """
+        return [task_document(row) for row in self._query(SELECT_ALL_TASKS, (self.resolve_event(event_id),))]
+
+    def find_tasks(self, projection=None, after=None, limit=None, event_id=None):
+        """
+        An event's tasks ordered by (scheduled_date, _id), resuming after the
+        (scheduled_date, _id) of the last task seen
+        """
+        scheduled_date, task_id = (dump_date(after[0]), after[1]) if after else ('', '')
+        return [task_document(row) for row in self._query(
+            SELECT_TASK_PAGE, (self.resolve_event(event_id), scheduled_date, task_id, limit or -1)
+        )]
+
+    def assign_task(self, task_id, user_id, event_id=None):
+        """
+        Assign one of an event's tasks to a user; returns the task's previous
+        assignment
+        """
+        event_id = self.resolve_event(event_id)
+        with self._transaction() as connection:
+            rows = self._execute(connection, SELECT_TASK_ASSIGNMENT, (task_id, event_id)).fetchall()
+            if not rows:
+                return None
+            self._execute(connection, UPDATE_TASK_ASSIGNEE, (user_id, dump_date(datetime.utcnow()), task_id))
+            self._bump_versions(connection, event_id, 'tasks')
+        self._invalidate_versions(event_id, 'tasks')
+        return {'_id': task_id, 'assigned_to': rows[0]['assigned_to'], 'completed': bool(rows[0]['completed'])}
+
+    def get_user_tasks(self, user_id, event_id=None):
+        """
+        Get a user's tasks whose scheduled date has arrived
+        """
+        return [task_document(row) for row in self._query(
+            SELECT_USER_TASKS, (self.resolve_event(event_id), user_id, dump_date(datetime.utcnow()))
+        )]
+
+    def mark_task_completed(self, task_id, user_id, event_id=None):
+        """
+        Mark a task as completed
+        """
+        event_id = self.resolve_event(event_id)
+        with self._transaction() as connection:
+            cursor = self._execute(connection, COMPLETE_TASK, (
+                dump_date(datetime.utcnow()), task_id, event_id, user_id
+            ))
+            if cursor.rowcount:
+                self._bump_versions(connection, event_id, 'tasks')
+        self._invalidate_versions(event_id, 'tasks')
+        return update_result(cursor.rowcount)
+
+    def apply_task_operations(self, operations, user_id, event_id=None):
+        """
+        Complete or assign many tasks for a user in one write transaction,
+        planned from task states read inside it
+        """
+        event_id = self.resolve_event(event_id)
+        now = dump_date(datetime.utcnow())
+        assignee_name = None
+        if any(action == 'assign' for action, _ in operations):
+            assignee_name = (self.get_user_by_id(user_id) or {}).get('full_name')
+        with self._transaction() as connection:
+            rows = self._execute(connection, SELECT_TASK_STATES, (
+                event_id, json.dumps(list({task_id for _, task_id in operations}))
+            )).fetchall()
+            tasks = {row['id']: {'_id': row['id'], 'assigned_to': row['assigned_to'], 'completed': bool(row['completed'])}
+                     for row in rows}
+            results, writes = plan_task_operations(operations, tasks, user_id)
+            if not writes:
+                return results
+
+            for _, action, task_id, _, _ in writes:
+                if action == 'complete':
+                    self._execute(connection, COMPLETE_TASK, (now, task_id, event_id, user_id))
+                else:
+                    self._execute(connection, ASSIGN_TASK, (user_id, assignee_name, now, task_id))
+            self._bump_versions(connection, event_id, 'tasks')
+        self._invalidate_versions(event_id, 'tasks')
+        return results
+
+    def reserve_idempotency_key(self, key, fingerprint):
+        now = datetime.utcnow()
+        with self._transaction() as connection:
+            self._execute(connection, "DELETE FROM idempotency_keys WHERE created_at < ?",
+                          (dump_date(now - timedelta(seconds=self.config.IDEMPOTENCY_KEY_TTL)),))
+            if self._execute(connection, INSERT_IDEMPOTENCY_KEY, (key, fingerprint, dump_date(now))).rowcount:
+                return None
+            row = self._execute(connection, "SELECT fingerprint, status, body FROM idempotency_keys WHERE key = ?",
+                                (key,)).fetchone()
+        return {'fingerprint': row['fingerprint'], 'status': row['status'], 'body': row['body']}
+
+    def complete_idempotency_key(self, key, status, body):
+        with self._transaction() as connection:
+            self._execute(connection, "UPDATE idempotency_keys SET status = ?, body = ? WHERE key = ?",
+                          (status, body, key))
+
+    def release_idempotency_key(self, key):
+        with self._transaction() as connection:
+            self._execute(connection, "DELETE FROM idempotency_keys WHERE key = ? AND status IS NULL", (key,))
+
+    def write_audit_events(self, events):
+        """
+        Append a batch of audit records in one transaction, removing expired ones
+        """
+        cutoff = datetime.utcnow() - timedelta(days=self.config.AUDIT_LOG_TTL_DAYS)
+        with self._transaction() as connection:
+            self._execute(connection, "DELETE FROM audit_log WHERE at < ?", (dump_date(cutoff),))
+            self._execute(connection, INSERT_AUDIT_EVENT, [
+                (event['event_id'], event['action'], event['actor'], dump_date(event['at']),
+                 json.dumps(event['details'], default=str))
+                for event in events
+            ], many=True)
+
+    def iter_event_documents(self, collection, event_id=None, batch_size=1000):
+        """
+        An event's exported documents, read in keyset pages of `batch_size`
+        so nothing holds a connection (or the in-memory lock) between pages
+        """
+        event_id = self.resolve_event(event_id)
+        sql, keys = EXPORT_PAGES[collection]
+        after = ('',) * len(keys)
+        while True:
+            rows = self._query(sql, (event_id, *after, batch_size))
+            for row in rows:
+                yield export_document(collection, row)
+            if len(rows) < batch_size:
+                return
+            after = tuple(rows[-1][key] for key in keys)
+
+    def restore_event_documents(self, collection, documents, event_id=None):
+        """
+        Insert one batch of exported documents in one executemany transaction
+        """
+        event_id = self.resolve_event(event_id)
+        if collection == 'users':
+            password_hashes = hash_passwords(
+                [document['email'] for document in documents],
+                workers=self.config.IMPORT_HASH_WORKERS,
+                parallel_threshold=self.config.IMPORT_PARALLEL_THRESHOLD,
+                method=self.config.PASSWORD_HASH_METHOD,
+                salt_length=self.config.PASSWORD_SALT_LENGTH
+            )
+            sql, rows = INSERT_USER, [(
+                document['_id'], event_id, document['full_name'], document['email'], password_hash,
+                'participant', int(document.get('is_paired', False)), document.get('paired_with'),
+                dump_date(document.get('created_at')), 0
+            ) for document, password_hash in zip(documents, password_hashes)]
+        elif collection == 'tasks':
+            sql, rows = INSERT_TASK, [(
+                document['_id'], event_id, document['title'], document.get('description'),
+                document.get('penalty'), document.get('assigned_to'), document.get('assigned_to_name'),
+                document.get('status', 'pending'), dump_date(document['scheduled_date']),
+                int(document.get('released', False)), dump_date(document.get('released_at')),
+                int(document.get('completed', False)), dump_date(document.get('completed_at')),
+                dump_date(document.get('created_at')), dump_date(document.get('assigned_at'))
+            ) for document in documents]
+        else:
+            sql, rows = INSERT_PAIRING, [(
+                document['_id'], event_id, document['chris_mom_id'], document['chris_child_id'],
+                dump_date(document.get('created_at'))
+            ) for document in documents]
+
+        try:
+            with self._transaction() as connection:
+                cursor = self._execute(connection, sql, rows, many=True)
+                if cursor.rowcount < len(rows):  # INSERT_USER skips conflicting emails
+                    raise sqlite3.IntegrityError(collection)
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError(f"Some {collection} in this batch already exist", 11000)
+        return len(rows)
+
+    def get_dashboard(self, user_id):
+        """
+        Dashboard summary for a user, computed from indexed lookups
+        """
+        rows = self._query(SELECT_DASHBOARD, (user_id,))
+        if not rows:
+            return dict(DASHBOARD_DEFAULTS)
+        row = rows[0]
+        next_task = self._query(SELECT_NEXT_TASK, (row['event_id'], user_id))
+        return {
+            **DASHBOARD_DEFAULTS,
+            'paired_name': row['paired_name'],
+            'santa_name': row['santa_name'],
+            'pending_tasks': row['pending_tasks'],
+            'completed_tasks': row['completed_tasks'],
+            'next_task': {
+                '_id': next_task[0]['id'],
+                'title': next_task[0]['title'],
+                'scheduled_date': load_date(next_task[0]['scheduled_date'])
+            } if next_task else None,
+            'initial_password_set': bool(row['initial_password_set'])
+        }
+
+    def has_dashboards(self):
+        return True
+
+    def rebuild_dashboards(self, event_id=None):
+        """
+        Nothing to rebuild: dashboards are computed on read
+        """
+        return 0
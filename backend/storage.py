@@ -0,0 +1,337 @@
+# backend/storage.py
+#
+# The storage interface the routes, importer and app factory are written
+# against. Two implementations ship with the app, picked by
+# Config.STORAGE_BACKEND:
+#
+#   mongo   DatabaseManager (models.py), MongoDB through PyMongo
+#   sqlite  SqliteStorage (sqlite_storage.py), an embedded database file for
+#           single-node events and CI, with no server to start or wait for
+
+import sqlite3
+from abc import ABC, abstractmethod
+from pymongo.errors import PyMongoError
+from settings_cache import event_setting_key
+
+STORAGE_BACKENDS = ('mongo', 'sqlite')
+
+# What either backend raises when the database itself fails
+STORAGE_ERRORS = (PyMongoError, sqlite3.Error)
+
+# Collections with a per-event version token, replaced by every write that
+# changes what the list endpoints return (see bump_collection_version)
+VERSIONED_COLLECTIONS = ('users', 'tasks', 'pairings')
+
+def collection_version_key(collection, event_id):
+    return event_setting_key(event_id, f'{collection}_version')
+
+# Operations accepted by apply_task_operations
+TASK_ACTIONS = ('complete', 'assign')
+
+def plan_task_operations(operations, tasks, user_id):
+    """
+    Work out which (action, task_id) operations change anything, given the
+    tasks' current {'_id', 'assigned_to', 'completed'} by id. Completing needs
+    the task to be assigned to the user; assigning moves it to them. Either is
+    matched but unmodified when already done, so a replayed batch writes
+    nothing. `tasks` is updated as operations are planned, so later operations
+    on the same task see earlier ones.
+
+    Returns a {'task_id', 'action', 'matched', 'modified'} result per
+    operation and the writes to make as (result index, action, task_id,
+    previous assignee, completed) tuples
+    """
+    results, writes = [], []
+    for action, task_id in operations:
+        task = tasks.get(task_id)
+        if action == 'complete':
+            matched = task is not None and task.get('assigned_to') == user_id
+            modified = matched and not task.get('completed')
+        else:
+            matched = task is not None
+            modified = matched and task.get('assigned_to') != user_id
+        if modified:
+            writes.append((len(results), action, task_id, task.get('assigned_to'), bool(task.get('completed'))))
+            if action == 'complete':
+                task['completed'] = True
+            else:
+                task['assigned_to'] = user_id
+        results.append({'task_id': task_id, 'action': action, 'matched': matched, 'modified': modified})
+    return results, writes
+
+# Shape of a dashboard document before anything has been recorded for the user
+DASHBOARD_DEFAULTS = {
+    'paired_name': None,
+    'santa_name': None,
+    'pending_tasks': 0,
+    'completed_tasks': 0,
+    'next_task': None,
+    'initial_password_set': False
+}
+
+class Storage(ABC):
+    """
+    Every read and write the application makes. Implementations also expose
+    `settings_cache` (a SettingsCache), `password_hasher`, `command_metrics`
+    and `pool_metrics`.
+
+    Documents are plain dicts shaped like the Mongo documents (string `_id`s,
+    datetimes, booleans). create_task returns an object with `inserted_id`;
+    mark_task_completed and update_password return one with `modified_count`.
+    create_event raises pymongo's DuplicateKeyError for an existing id
+    """
+    # True when due tasks are visible without TaskReleaseScheduler running
+    releases_on_read = False
+
+    def resolve_event(self, event_id):
+        return event_id or self.config.DEFAULT_EVENT_ID
+
+    # Schema and operations
+
+    @abstractmethod
+    def ensure_indexes(self):
+        """
+        Create the schema and indexes; called once at app start-up
+        """
+
+    @abstractmethod
+    def audit_indexes(self):
+        """
+        Known query shapes that are answered by a full scan
+        """
+
+    @abstractmethod
+    def get_pool_stats(self):
+        """
+        Connection usage for /admin/pool-stats
+        """
+
+    # Events
+
+    @abstractmethod
+    def create_event(self, name, event_id=None):
+        pass
+
+    @abstractmethod
+    def get_event(self, event_id):
+        pass
+
+    @abstractmethod
+    def list_events(self):
+        pass
+
+    @abstractmethod
+    def clear_event(self, event_id):
+        pass
+
+    # Users
+
+    @abstractmethod
+    def ensure_admin_user(self, full_name, email, password):
+        """
+        Create the admin account unless it exists; returns whether it was created
+        """
+
+    @abstractmethod
+    def create_admin_user(self, full_name, email):
+        pass
+
+    @abstractmethod
+    def create_participant_user(self, full_name, email, event_id=None):
+        pass
+
+    @abstractmethod
+    def create_participant_users(self, users, event_id=None):
+        pass
+
+    @abstractmethod
+    def verify_user(self, email, password, event_id=None):
+        pass
+
+    @abstractmethod
+    def get_user_by_id(self, user_id):
+        pass
+
+    @abstractmethod
+    def get_user_with_pairing(self, user_id):
+        pass
+
+    @abstractmethod
+    def update_password(self, user_id, new_password, event_id=None):
+        pass
+
+    @abstractmethod
+    def find_participants(self, projection=None, after=None, limit=None, event_id=None, user_ids=None):
+        pass
+
+    # Pairings and reveal
+
+    @abstractmethod
+    def create_pairing(self, santa_id, recipient_id, event_id=None):
+        pass
+
+    @abstractmethod
+    def replace_pairings(self, pairs, event_id=None):
+        pass
+
+    @abstractmethod
+    def clear_pairings(self, event_id=None):
+        pass
+
+    @abstractmethod
+    def get_pairs(self, event_id=None):
+        """
+        An event's pairings as (santa_id, recipient_id) tuples
+        """
+
+    @abstractmethod
+    def get_pairings_with_names(self, event_id=None):
+        pass
+
+    @abstractmethod
+    def get_user_santa(self, user_id, event_id=None):
+        pass
+
+    @abstractmethod
+    def get_setting(self, key):
+        pass
+
+    @abstractmethod
+    def get_reveal_status(self, event_id=None):
+        pass
+
+    @abstractmethod
+    def toggle_reveal_status(self, event_id=None):
+        pass
+
+    def get_collection_version(self, collection, event_id=None):
+        """
+        The current version token of one of an event's VERSIONED_COLLECTIONS,
+        read through the settings cache (None before the first write)
+        """
+        settings = self.get_setting(collection_version_key(collection, self.resolve_event(event_id)))
+        return settings.get('value') if settings else None
+
+    @abstractmethod
+    def bump_collection_version(self, collection, event_id=None):
+        """
+        Replace a collection's version token with a new random one. Tokens are
+        never reused, so clearing an event cannot bring back an old version
+        """
+
+    # Tasks
+
+    @abstractmethod
+    def create_task(self, title, description, penalty='', assign_to=None, scheduled_date=None, event_id=None):
+        pass
+
+    @abstractmethod
+    def create_tasks(self, specs, assignee_names=None, batch_size=1000, event_id=None):
+        pass
+
+    @abstractmethod
+    def get_all_tasks(self, event_id=None):
+        pass
+
+    @abstractmethod
+    def find_tasks(self, projection=None, after=None, limit=None, event_id=None):
+        pass
+
+    @abstractmethod
+    def assign_task(self, task_id, user_id, event_id=None):
+        pass
+
+    @abstractmethod
+    def get_user_tasks(self, user_id, event_id=None):
+        pass
+
+    @abstractmethod
+    def mark_task_completed(self, task_id, user_id, event_id=None):
+        pass
+
+    @abstractmethod
+    def apply_task_operations(self, operations, user_id, event_id=None):
+        """
+        Apply (action, task_id) operations (see TASK_ACTIONS) for a user in
+        one write; returns per-operation results from plan_task_operations
+        """
+
+    # Idempotency keys
+
+    @abstractmethod
+    def reserve_idempotency_key(self, key, fingerprint):
+        """
+        Claim an idempotency key for a request; returns None when claimed, or
+        the existing {'fingerprint', 'status', 'body'} record (status None
+        while the first request is still running)
+        """
+
+    @abstractmethod
+    def complete_idempotency_key(self, key, status, body):
+        """
+        Store the response to replay for a claimed key
+        """
+
+    @abstractmethod
+    def release_idempotency_key(self, key):
+        """
+        Give up a claimed key so the request can be retried
+        """
+
+    # Audit log
+
+    @abstractmethod
+    def write_audit_events(self, events):
+        """
+        Append a batch of AuditLog records ({'event_id', 'action', 'actor',
+        'at', 'details'}); expired records are removed after AUDIT_LOG_TTL_DAYS
+        """
+
+    # Export and restore (see snapshots.py)
+
+    @abstractmethod
+    def iter_event_documents(self, collection, event_id=None, batch_size=1000):
+        """
+        Stream an event's 'users' (participants, without password hashes),
+        'pairings' or 'tasks' documents, minus their event_id, `batch_size` at
+        a time
+        """
+
+    @abstractmethod
+    def restore_event_documents(self, collection, documents, event_id=None):
+        """
+        Insert one batch of exported documents into an event, keeping their
+        ids. Participants get their email as password again, as on
+        registration. Raises DuplicateKeyError if any of them already exists
+        """
+
+    # Dashboards
+
+    @abstractmethod
+    def get_dashboard(self, user_id):
+        pass
+
+    @abstractmethod
+    def has_dashboards(self):
+        """
+        Whether dashboards exist, or are computed on read and need no backfill
+        """
+
+    @abstractmethod
+    def rebuild_dashboards(self, event_id=None):
+        """
+        Recompute dashboards, for one event or all of them
+        """
+
+def create_storage(config):
+    """
+    Build the storage backend named by config.STORAGE_BACKEND
+    """
+    if config.STORAGE_BACKEND == 'mongo':
+        from models import DatabaseManager
+        return DatabaseManager(config)
+    if config.STORAGE_BACKEND == 'sqlite':
+        from sqlite_storage import SqliteStorage
+        return SqliteStorage(config)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{config.STORAGE_BACKEND}', "
+                     f"expected one of {', '.join(STORAGE_BACKENDS)}")
@@ -0,0 +1,89 @@
+# backend/tests/conftest.py
+#
+# Every test that uses the `app` fixture runs once per storage backend, each
+# time on a fresh throwaway database: SQLite in memory, and MongoDB through
+# mongomock when it is installed. No database server is needed:
+#
+#   cd backend && python -m pytest -q
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+STORAGE_BACKENDS = ['sqlite'] + (['mongo'] if mongomock else [])
+
+@pytest.fixture
+def mongo_client(monkeypatch):
+    """
+    A mongomock client that DatabaseManager connects to instead of a server
+    """
+    if mongomock is None:
+        pytest.skip("mongomock is not installed")
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(models, 'MongoClient', lambda *args, **kwargs: client)
+    return client
+
+@pytest.fixture(params=STORAGE_BACKENDS)
+def backend(request, monkeypatch):
+    for name, value in {
+        'STORAGE_BACKEND': request.param,
+        'SQLITE_PATH': ':memory:',
+        'SETTINGS_CHANGE_STREAMS': False,
+        'TASK_RELEASE_ENABLED': False,
+        'AUDIT_LOG_ENABLED': False,
+        'RATE_LIMIT_BACKEND': 'memory',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+    if request.param == 'mongo':
+        request.getfixturevalue('mongo_client')
+    return request.param
+
+@pytest.fixture
+def app(backend):
+    app = create_app()
+    yield app
+    app.extensions['db_manager'].settings_cache.stop()
+
+@pytest.fixture
+def db(app):
+    return app.extensions['db_manager']
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def login(client, email, password=None):
+    response = client.post('/api/login', json={'email': email, 'password': password or email})
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+@pytest.fixture
+def admin(client):
+    client.get('/api/init-admin')
+    return login(client, Config.ADMIN_EMAIL, Config.ADMIN_PASSWORD)
+
+@pytest.fixture
+def participants(client, admin):
+    """
+    Three registered participants as {'_id', 'email', 'headers'}, by name
+    """
+    client.post('/api/admin/register-users', headers=admin, json={
+        'users': [{'full_name': name, 'email': f'{name}@example.com'} for name in ('ann', 'bob', 'cat')]
+    })
+    users = {}
+    for user in client.get('/api/admin/users', headers=admin).get_json()['users']:
+        name = user['full_name']
+        users[name] = {'_id': user['_id'], 'email': f'{name}@example.com', 'headers': login(client, f'{name}@example.com')}
+    return users
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from bulk_tasks import BulkTaskError, count_tasks, parse_date_range, parse_offset, plan_tasks, render
+from config import Config
+
+def test_render_substitutes_known_fields():
+    assert render("{assignee} -> {recipient} on {date}", assignee='Ann', recipient='Bob',
+                  date='2024-12-01') == "Ann -> Bob on 2024-12-01"
+
+def test_render_keeps_escaped_and_substituted_braces_literal():
+    assert render("{{assignee}} {assignee}", assignee='{date}', recipient='', date='x') == "{assignee} {date}"
+
+@pytest.mark.parametrize('text', ["{bad}", "{assignee.__class__}", "{0}", "{}", "{assignee!r}", "{date:>10}"])
+def test_render_rejects_unknown_placeholders(text):
+    with pytest.raises(BulkTaskError, match="Bad placeholder"):
+        render(text, assignee='Ann', recipient='Bob', date='2024-12-01')
+
+def test_render_rejects_non_strings():
+    with pytest.raises(BulkTaskError):
+        render(['{assignee}'], assignee='Ann', recipient='', date='')
+
+@pytest.mark.parametrize('value, expected', [(None, 0), ('', 0), (0, 0), ('3', 3), (7, 7)])
+def test_parse_offset(value, expected):
+    assert parse_offset(value) == expected
+
+@pytest.mark.parametrize('value', ['two', '1.5', -1, '-3', [1]])
+def test_parse_offset_rejects_bad_values(value):
+    with pytest.raises(BulkTaskError):
+        parse_offset(value)
+
+def test_round_robin_starts_at_offset():
+    dates = [datetime(2024, 12, day) for day in (1, 2, 3)]
+    participants = [('a', 'Ann'), ('b', 'Bob')]
+    template = {'title': '{assignee}', 'description': '', 'penalty': ''}
+    planned = list(plan_tasks(template, dates, 'round-robin', participants, offset=1))
+    assert [task[0] for task in planned] == ['b', 'a', 'b']
+
+@pytest.mark.parametrize('body', [
+    {'title': 'Hi {nope}'},
+    {'title': '{assignee.__init__.__globals__}'},
+    {'title': 'Hi', 'strategy': 'round-robin', 'offset': 'two'},
+    {'title': 'Hi', 'strategy': 'round-robin', 'offset': -1}
+])
+def test_bulk_route_rejects_bad_templates_and_offsets(client, admin, participants, body):
+    response = client.post('/api/admin/tasks/bulk', headers=admin, json={'start_date': '2024-12-01', **body})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+def test_bulk_route_renders_templates(client, admin, participants):
+    response = client.post('/api/admin/tasks/bulk', headers=admin, json={
+        'title': '{assignee} on {date} {{x}}', 'start_date': '2024-12-01', 'strategy': 'round-robin', 'offset': '1'
+    })
+    assert response.status_code == 201
+    titles = [task['title'] for task in client.get('/api/tasks/all').get_json()['tasks']]
+    assert len(titles) == 1 and titles[0].endswith(' on 2024-12-01 {x}')
+
+@pytest.mark.parametrize('strategy, expected', [('everyone', 30), ('round-robin', 10), ('per-pair', 20)])
+def test_count_tasks_matches_the_plan(strategy, expected):
+    dates = [datetime(2024, 12, 1 + day) for day in range(10)]
+    participants = [('a', 'Ann'), ('b', 'Bob'), ('c', 'Cat')]
+    pairs = [('a', 'b'), ('b', 'c'), ('x', 'a')]
+    template = {'title': 't'}
+    assert count_tasks(len(dates), strategy, participants, pairs) == expected
+    assert len(list(plan_tasks(template, dates, strategy, participants, pairs))) == expected
+
+def test_date_range_is_capped_before_it_is_built():
+    assert len(parse_date_range('2024-01-01', '2024-12-31', max_days=366)) == 366
+    with pytest.raises(BulkTaskError, match='spans 3653 days'):
+        parse_date_range('2020-01-01', '2029-12-31', max_days=366)
+
+def test_per_pair_recipient_names_come_from_every_participant():
+    dates = [datetime(2024, 12, 1)]
+    planned = list(plan_tasks({'title': 'For {recipient}'}, dates, 'per-pair', [('a', 'Ann')],
+                              [('a', 'b'), ('b', 'a')], names={'a': 'Ann', 'b': 'Bob'}))
+    assert [(task[0], task[1]) for task in planned] == [('a', 'For Bob')]
+
+def test_bulk_route_refuses_oversized_requests_before_planning(client, admin, participants, monkeypatch):
+    import routes
+    monkeypatch.setattr(Config, 'BULK_TASK_LIMIT', 5)
+    monkeypatch.setattr(routes, 'plan_tasks', lambda *args, **kwargs: pytest.fail("tasks were expanded"))
+    response = client.post('/api/admin/tasks/bulk', headers=admin, json={
+        'title': 'x', 'start_date': '2024-12-01', 'end_date': '2024-12-02', 'strategy': 'everyone'
+    })
+    assert response.status_code == 400
+    assert 'would create 6 tasks' in response.get_json()['error']
+    response = client.post('/api/admin/tasks/bulk', headers=admin, json={
+        'title': 'x', 'start_date': '2000-01-01', 'end_date': '2099-12-31'
+    })
+    assert response.status_code == 400
+    assert 'limit is 366' in response.get_json()['error']
+
+def test_bulk_route_per_pair_names_recipients_outside_the_filter(client, admin, participants):
+    client.post('/api/admin/create-pairings', headers=admin, json={})
+    response = client.post('/api/admin/tasks/bulk', headers=admin, json={
+        'title': 'Gift for {recipient}', 'start_date': '2024-12-01', 'strategy': 'per-pair',
+        'assignees': [participants['ann']['_id']]
+    })
+    assert response.status_code == 201
+    titles = [task['title'] for task in client.get('/api/tasks/all').get_json()['tasks']]
+    assert len(titles) == 1 and titles[0] in ('Gift for bob', 'Gift for cat')
@@ -0,0 +1,26 @@
+import pytest
+
+ADMIN_ROUTES = [
+    ('get', '/api/admin/events'), ('post', '/api/admin/events'), ('get', '/api/admin/pool-stats'),
+    ('post', '/api/admin/tasks/bulk'), ('post', '/api/admin/clear-data'), ('post', '/api/admin/toggle-reveal'),
+    ('get', '/api/admin/users'), ('get', '/api/admin/pairings'), ('post', '/api/admin/register-users'),
+    ('post', '/api/admin/create-pairings')
+]
+
+@pytest.mark.parametrize('method, path', ADMIN_ROUTES)
+def test_admin_routes_refuse_participants(client, participants, method, path):
+    response = getattr(client, method)(path, headers=participants['ann']['headers'], json={})
+    assert response.status_code == 403
+    assert response.get_json() == {"error": "Admin access required"}
+
+def test_participants_cannot_clear_or_reveal_their_event(client, admin, participants):
+    ann = participants['ann']['headers']
+    client.post('/api/admin/clear-data', headers=ann)
+    client.post('/api/admin/toggle-reveal', headers=ann)
+    assert len(client.get('/api/admin/users', headers=admin).get_json()['users']) == 3
+    assert client.get('/api/pairings/revealed', headers=ann).get_json()['revealed'] is False
+
+def test_events_scope_users(client, admin, participants):
+    assert client.post('/api/admin/events', headers=admin, json={'name': 'Other', 'id': 'other'}).status_code == 201
+    assert 'other' in [event['id'] for event in client.get('/api/admin/events', headers=admin).get_json()['events']]
+    assert client.get('/api/admin/users', headers={**admin, 'X-Event-Id': 'other'}).get_json()['users'] == []
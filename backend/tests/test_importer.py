@@ -0,0 +1,47 @@
+import sqlite3
+
+from pymongo.errors import PyMongoError
+
+from importer import import_participants
+
+def register(client, admin, **kwargs):
+    return client.post('/api/admin/register-users', headers=admin, **kwargs)
+
+def test_bad_rows_are_reported_per_row(client, admin):
+    response = register(client, admin, json={'users': [
+        {'full_name': 'Ann', 'email': 'ann@example.com'}, 'bob', None, {'full_name': 'Cat', 'email': 7},
+        {'full_name': 'Dan'}
+    ]})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert [user['email'] for user in body['registered_users']] == ['ann@example.com']
+    assert [detail.split(':')[0] for detail in body['details']] == ['Row 2', 'Row 3', 'Row 4', 'Row 5']
+    assert 'Expected an object' in body['details'][0]
+
+def test_ndjson_rows_that_are_not_objects_are_reported(client, admin):
+    upload = b'{"full_name": "Ann", "email": "ann@example.com"}\n[1, 2]\nnot json\n'
+    response = register(client, admin, data=upload, content_type='application/x-ndjson')
+    assert response.status_code == 400
+    assert [detail.split(':')[0] for detail in response.get_json()['details']] == ['Row 2', 'Row 3']
+
+def test_a_users_value_that_is_not_a_list_is_one_bad_row(client, admin):
+    response = register(client, admin, json={'users': 'ann@example.com'})
+    assert response.status_code == 400
+    assert response.get_json()['details'] == ["Row 1: Expected an object with full_name and email"]
+    assert register(client, admin, json=['not', 'an', 'object']).get_json()['users'] == []
+
+def test_storage_errors_are_a_clean_500(client, admin, db, backend, monkeypatch):
+    error = PyMongoError("connection reset") if backend == 'mongo' else sqlite3.OperationalError("disk I/O error")
+    def fail(*args, **kwargs):
+        raise error
+    monkeypatch.setattr(db, 'create_participant_users', fail)
+    response = register(client, admin, json={'users': [{'full_name': 'Ann', 'email': 'ann@example.com'}]})
+    assert response.status_code == 500
+    assert response.get_json() == {"error": f"Could not register users: {error}"}
+
+def test_import_batches_keep_row_numbers(db):
+    rows = [{'full_name': f'User {i}', 'email': f'user{i}@example.com'} for i in range(5)]
+    rows[3] = {'full_name': 'Dup', 'email': 'user0@example.com'}
+    registered, errors = import_participants(db, rows, batch_size=2)
+    assert len(registered) == 4
+    assert len(errors) == 1 and errors[0].startswith('Row 4:')
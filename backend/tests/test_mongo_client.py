@@ -0,0 +1,23 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from config import Config
+from models import mongo_client_options
+
+def test_client_options_follow_config(monkeypatch):
+    monkeypatch.setattr(Config, 'MONGO_MAX_POOL_SIZE', 7)
+    monkeypatch.setattr(Config, 'MONGO_WRITE_CONCERN', 'majority')
+    monkeypatch.setattr(Config, 'MONGO_READ_PREFERENCE', 'primaryPreferred')
+    options = mongo_client_options(Config)
+    assert (options['maxPoolSize'], options['w'], options['readPreference']) == (7, 'majority', 'primaryPreferred')
+    monkeypatch.setattr(Config, 'MONGO_WRITE_CONCERN', '2')
+    assert mongo_client_options(Config)['w'] == 2
+
+def test_motor_client_uses_the_same_options(monkeypatch):
+    async_models = pytest.importorskip('async_models', exc_type=ImportError)
+    calls = []
+    monkeypatch.setattr(async_models, 'AsyncIOMotorClient', lambda *args, **kwargs: calls.append((args, kwargs)) or MagicMock())
+    monkeypatch.setattr(Config, 'MONGO_WRITE_CONCERN', 'majority')
+    async_models.AsyncDatabaseManager(Config)
+    assert calls == [((Config.MONGODB_URI,), mongo_client_options(Config))]
@@ -0,0 +1,63 @@
+import pytest
+from pymongo.errors import PyMongoError
+
+@pytest.fixture
+def mongo_db(db, backend):
+    if backend != 'mongo':
+        pytest.skip("transactions are the MongoDB backend's")
+    return db
+
+class Session:
+    """
+    Stands in for a ClientSession; mongomock has no sessions, so the
+    callback gets None and writes go straight through
+    """
+    def __init__(self):
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def with_transaction(self, callback):
+        self.transactions += 1
+        return callback(None)
+
+def pairs_of(participants):
+    ids = [participants[name]['_id'] for name in ('ann', 'bob', 'cat')]
+    return list(zip(ids, ids[1:] + ids[:1]))
+
+def test_pairings_are_replaced_in_one_transaction(mongo_db, participants, monkeypatch):
+    session = Session()
+    monkeypatch.setattr(mongo_db, 'supports_transactions', lambda: True)
+    monkeypatch.setattr(mongo_db.client, 'start_session', lambda: session, raising=False)
+    generation = mongo_db.get_pairings_generation()
+    pairs = pairs_of(participants)
+
+    mongo_db.replace_pairings(pairs)
+    assert session.transactions == 1
+    assert sorted(mongo_db.get_pairs('default')) == sorted(pairs)
+    # The generation bumped inside the transaction is read fresh afterwards
+    assert mongo_db.get_pairings_generation() == generation + 1
+    ann = participants['ann']['_id']
+    assert mongo_db.get_dashboard(ann)['paired_name'] == 'bob'
+
+def test_failed_pairing_write_without_transactions_clears_pairings(mongo_db, participants, monkeypatch):
+    mongo_db.replace_pairings(pairs_of(participants))
+    assert mongo_db.supports_transactions() is False
+    def fail(*args, **kwargs):
+        raise PyMongoError("connection reset")
+    monkeypatch.setattr(mongo_db.dashboards_collection, 'bulk_write', fail)
+    with pytest.raises(PyMongoError):
+        mongo_db.replace_pairings(list(reversed(pairs_of(participants))))
+    assert list(mongo_db.get_pairs('default')) == []
+    assert not any(user.get('is_paired') for user in mongo_db.users_collection.find({'role': 'participant'}))
+
+def test_pairing_route_pairs_everyone_once(client, db, admin, participants):
+    assert client.post('/api/admin/create-pairings', headers=admin, json={}).status_code == 200
+    pairs = list(db.get_pairs('default'))
+    ids = {user['_id'] for user in participants.values()}
+    assert {santa for santa, _ in pairs} == {recipient for _, recipient in pairs} == ids
+    assert all(santa != recipient for santa, recipient in pairs)
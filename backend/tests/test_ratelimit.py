@@ -0,0 +1,189 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import ratelimit
+from app import create_app
+from config import Config
+from ratelimit import MemoryRateLimiter, MongoRateLimiter, RateLimiter
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, 'time', SimpleNamespace(monotonic=clock, sleep=time.sleep))
+    return clock
+
+def test_bucket_admits_a_burst_then_refills(clock):
+    limiter = MemoryRateLimiter()
+    assert [limiter.hit('login', 'a', 3, 60) for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit('login', 'a', 3, 60) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert limiter.hit('login', 'a', 3, 60) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert limiter.hit('login', 'a', 3, 60) == 0
+    assert limiter.counters == {('login', 'allowed'): 4, ('login', 'limited'): 2}
+
+def test_buckets_are_per_route_and_client(clock):
+    limiter = MemoryRateLimiter()
+    limiter.hit('login', 'a', 1, 60)
+    assert limiter.hit('login', 'a', 1, 60)
+    assert limiter.hit('login', 'b', 1, 60) == 0
+    assert limiter.hit('init_admin', 'a', 1, 60) == 0
+
+def test_least_recently_used_buckets_are_dropped(clock):
+    limiter = MemoryRateLimiter(max_buckets=2)
+    for client in ('a', 'b', 'c'):
+        limiter.hit('login', client, 1, 60)
+    assert list(limiter._buckets) == ['login:b', 'login:c']
+
+def test_gate_admits_one_holder_until_release_or_expiry(clock):
+    limiter = MemoryRateLimiter()
+    token = limiter.acquire('create_pairings', 'e1', ttl=60)
+    assert token
+    assert limiter.acquire('create_pairings', 'e1', ttl=60) is None
+    assert limiter.acquire('create_pairings', 'e2', ttl=60)
+    limiter.release('create_pairings', 'e1', 'someone else')
+    assert limiter.acquire('create_pairings', 'e1', ttl=60) is None
+    limiter.release('create_pairings', 'e1', token)
+    held = limiter.acquire('create_pairings', 'e1', ttl=60)
+    assert held
+    clock.now += 61
+    assert limiter.acquire('create_pairings', 'e1', ttl=60)
+
+def test_holds_reports_a_live_claim(clock):
+    limiter = MemoryRateLimiter()
+    token = limiter.acquire('bulk_write', 'e1', ttl=60)
+    assert limiter.holds('bulk_write', 'e1', token)
+    assert not limiter.holds('bulk_write', 'e1', 'someone else')
+    clock.now += 61
+    assert not limiter.holds('bulk_write', 'e1', token)
+    limiter.acquire('bulk_write', 'e1', ttl=60)
+    assert not limiter.holds('bulk_write', 'e1', token)
+
+def test_acquire_waits_for_the_holder():
+    limiter = MemoryRateLimiter()
+    token = limiter.acquire('create_pairings', 'e1', ttl=60)
+    threading.Timer(0.1, limiter.release, ('create_pairings', 'e1', token)).start()
+    assert limiter.acquire('create_pairings', 'e1', ttl=60, wait=2.0)
+    assert limiter.counters[('create_pairings', 'admitted_after_wait')] == 1
+
+def test_render_reports_admission_counters():
+    limiter = MemoryRateLimiter()
+    limiter.hit('login', 'a', 1, 60)
+    limiter.hit('login', 'a', 1, 60)
+    assert 'santa_admission_total{route="login",outcome="limited"} 1' in limiter.render()
+
+def test_limiter_backends_implement_every_hook():
+    with pytest.raises(TypeError):
+        type('Partial', (RateLimiter,), {'_take': lambda self, key, capacity, rate: 0.0})()
+
+class UtcClock:
+    def __init__(self):
+        self.now = datetime(2024, 12, 1)
+
+    def utcnow(self):
+        return self.now
+
+@pytest.fixture
+def mongo_limiter(mongo_client, monkeypatch):
+    utc = UtcClock()
+    monkeypatch.setattr(ratelimit, 'datetime', utc)
+    limiter = MongoRateLimiter(mongo_client['santa_test'])
+    limiter.utc = utc
+    return limiter
+
+def test_mongo_bucket_refills_in_one_pipeline_update(mongo_limiter):
+    limiter = mongo_limiter
+    assert [limiter.hit('login', 'a', 3, 60) for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit('login', 'a', 3, 60) == pytest.approx(1.0)
+    limiter.utc.now += timedelta(seconds=0.5)
+    assert limiter.hit('login', 'a', 3, 60) == pytest.approx(0.5)
+    limiter.utc.now += timedelta(seconds=1)
+    assert limiter.hit('login', 'a', 3, 60) == 0
+    assert limiter.hit('login', 'b', 3, 60) == 0
+    bucket = limiter.buckets.find_one({'_id': 'login:a'})
+    assert bucket['tokens'] == pytest.approx(0.5)
+    assert bucket['expires_at'] == limiter.utc.now + timedelta(seconds=3)
+
+def test_mongo_gate_is_a_lease(mongo_limiter):
+    limiter = mongo_limiter
+    token = limiter.acquire('create_pairings', 'e1', ttl=60)
+    assert token and limiter.holds('create_pairings', 'e1', token)
+    assert limiter.acquire('create_pairings', 'e1', ttl=60) is None
+    limiter.release('create_pairings', 'e1', 'someone else')
+    assert limiter.acquire('create_pairings', 'e1', ttl=60) is None
+    limiter.utc.now += timedelta(seconds=61)
+    assert not limiter.holds('create_pairings', 'e1', token)
+    other = limiter.acquire('create_pairings', 'e1', ttl=60)
+    assert other
+    limiter.release('create_pairings', 'e1', token)
+    assert limiter.holds('create_pairings', 'e1', other)
+    limiter.release('create_pairings', 'e1', other)
+    assert limiter.leases.count_documents({}) == 0
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(Config, 'RATE_LIMITS', dict(Config.RATE_LIMITS, login=(2, 1), login_address=(4, 1)))
+
+def attempt(client, email, address='10.0.0.1'):
+    return client.post('/api/login', json={'email': email, 'password': 'wrong'}, environ_base={'REMOTE_ADDR': address})
+
+def test_login_is_limited_per_address_and_email(client, limits):
+    responses = [attempt(client, 'ann@example.com') for _ in range(3)]
+    assert [response.status_code for response in responses] == [401, 401, 429]
+    assert int(responses[-1].headers['Retry-After']) >= 1
+    assert attempt(client, 'bob@example.com').status_code == 401
+    assert attempt(client, 'ann@example.com', address='10.0.0.2').status_code == 401
+
+def test_login_spraying_is_limited_per_address(app, client, limits):
+    statuses = [attempt(client, f'user{i}@example.com').status_code for i in range(6)]
+    assert statuses == [401] * 4 + [429] * 2
+    # Rejected attempts create no per-email buckets
+    buckets = app.extensions['rate_limiter']._buckets
+    assert sum(key.startswith('login:10.0.0.1:') for key in buckets) == 4
+    assert attempt(client, 'user0@example.com', address='10.0.0.2').status_code == 401
+
+def test_address_bucket_is_off_by_default(client):
+    assert Config.RATE_LIMITS['login_address'] is None
+    assert {attempt(client, f'user{i}@example.com').status_code for i in range(60)} == {401}
+
+def test_proxy_fix_limits_the_forwarded_client(monkeypatch, backend, limits):
+    monkeypatch.setattr(Config, 'PROXY_FIX_X_FOR', 1)
+    client = create_app().test_client()
+    def forwarded(address):
+        return client.post('/api/login', json={'email': 'ann@example.com', 'password': 'wrong'},
+                           headers={'X-Forwarded-For': address}).status_code
+    assert [forwarded('203.0.113.1') for _ in range(3)] == [401, 401, 429]
+    assert forwarded('203.0.113.2') == 401
+
+def test_rate_limits_can_be_disabled(client, limits, monkeypatch):
+    monkeypatch.setattr(Config, 'RATE_LIMIT_ENABLED', False)
+    assert {attempt(client, 'ann@example.com').status_code for _ in range(5)} == {401}
+
+def test_create_pairings_runs_once_per_event(app, client, admin, participants):
+    limiter = app.extensions['rate_limiter']
+    token = limiter.acquire('create_pairings', 'default', ttl=60)
+    response = client.post('/api/admin/create-pairings', headers=admin, json={})
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    other = client.post('/api/admin/create-pairings', headers={**admin, 'X-Event-Id': 'other'}, json={})
+    assert other.status_code != 409
+    limiter.release('create_pairings', 'default', token)
+    assert client.post('/api/admin/create-pairings', headers=admin, json={}).status_code == 200
+
+def test_mongo_buckets_are_shared_by_workers(backend, limits, monkeypatch):
+    if backend != 'mongo':
+        pytest.skip("the mongo limiter needs the MongoDB backend")
+    monkeypatch.setattr(Config, 'RATE_LIMIT_BACKEND', 'mongo')
+    workers = [create_app().test_client() for _ in range(2)]
+    assert [attempt(worker, 'ann@example.com').status_code for worker in workers + workers] == [401, 401, 429, 429]
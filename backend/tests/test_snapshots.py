@@ -0,0 +1,124 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from config import Config
+from snapshots import SnapshotError, iter_snapshot_lines
+
+@pytest.fixture
+def event(client, admin, participants):
+    """
+    The default event with pairings, a completed task and the reveal on;
+    returns its state as seen by the admin
+    """
+    client.post('/api/admin/create-pairings', headers=admin, json={})
+    ann = participants['ann']
+    response = client.post('/api/tasks/create', headers=admin, json={
+        'title': 'Wrap it', 'description': 'd', 'assignTo': ann['_id'], 'scheduledDate': '2024-12-01'
+    })
+    client.post(f"/api/tasks/{response.get_json()['task_id']}/complete", headers=ann['headers'])
+    client.post('/api/admin/toggle-reveal', headers=admin)
+    return event_state(client, admin)
+
+def event_state(client, headers, event_id='default'):
+    headers = {**headers, 'X-Event-Id': event_id}
+    return {
+        'users': client.get('/api/admin/users', headers=headers).get_json()['users'],
+        'pairings': client.get('/api/admin/pairings', headers=headers).get_json(),
+        'tasks': client.get('/api/tasks/all', headers=headers).get_json()['tasks'],
+        'revealed': client.get('/api/pairings/revealed', headers=headers).get_json()['revealed']
+    }
+
+def test_export_is_gzip_ndjson_without_password_hashes(client, admin, event):
+    response = client.get('/api/admin/export', headers=admin)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/gzip'
+    lines = [json.loads(line) for line in gzip.decompress(response.data).splitlines()]
+    assert lines[0]['format'] == 'secret-santa-event' and lines[0]['revealed'] is True
+    assert [line['collection'] for line in lines[1:]] == ['users'] * 3 + ['pairings'] * 3 + ['tasks']
+    assert not any('password_hash' in line['document'] for line in lines[1:])
+
+def test_restore_round_trip(client, admin, participants, event):
+    export = client.get('/api/admin/export', headers=admin).data
+    client.post('/api/admin/clear-data', headers=admin)
+    assert event_state(client, admin)['users'] == []
+
+    response = client.post('/api/admin/restore', headers=admin, data=export, content_type='application/gzip')
+    assert response.status_code == 200
+    assert response.get_json()['restored'] == {'users': 3, 'pairings': 3, 'tasks': 1}
+    assert event_state(client, admin) == event
+    # Passwords are reset to the email, as after registration
+    assert client.post('/api/login', json={'email': 'ann@example.com', 'password': 'ann@example.com'}).status_code == 200
+
+def test_restore_accepts_plain_ndjson(client, admin, event):
+    export = gzip.decompress(client.get('/api/admin/export', headers=admin).data)
+    client.post('/api/admin/clear-data', headers=admin)
+    response = client.post('/api/admin/restore', headers=admin, data=export, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert event_state(client, admin) == event
+
+def test_restore_into_an_event_with_data_is_a_conflict(client, admin, event):
+    export = client.get('/api/admin/export', headers=admin).data
+    response = client.post('/api/admin/restore', headers=admin, data=export, content_type='application/gzip')
+    assert response.status_code == 409
+    assert event_state(client, admin) == event
+
+def test_failed_restore_leaves_the_event_empty(client, admin, event, monkeypatch):
+    monkeypatch.setattr(Config, 'RESTORE_BATCH_SIZE', 2)  # Commit some batches before the bad line
+    lines = gzip.decompress(client.get('/api/admin/export', headers=admin).data).splitlines()
+    client.post('/api/admin/clear-data', headers=admin)
+    broken = b'\n'.join(lines[:5] + [b'not json'] + lines[5:])
+    response = client.post('/api/admin/restore', headers=admin, data=broken, content_type='application/x-ndjson')
+    assert response.status_code == 400
+    state = event_state(client, admin)
+    assert (state['users'], state['tasks']) == ([], [])
+
+    response = client.post('/api/admin/restore', headers=admin, data=b'\n'.join(lines),
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+
+def test_duplicate_ids_in_another_event_roll_back(client, admin, event):
+    export = client.get('/api/admin/export', headers=admin).data
+    client.post('/api/admin/events', headers=admin, json={'name': 'Other', 'id': 'other'})
+    response = client.post('/api/admin/restore?event_id=other', headers=admin, data=export,
+                           content_type='application/gzip')
+    assert response.status_code == 409
+    assert event_state(client, admin, 'other')['users'] == []
+    assert event_state(client, admin) == event
+
+def test_export_and_restore_need_an_admin(client, participants, event):
+    ann = participants['ann']['headers']
+    assert client.get('/api/admin/export', headers=ann).status_code == 403
+    assert client.post('/api/admin/restore', headers=ann, data=b'', content_type='application/gzip').status_code == 403
+
+def test_snapshot_lines_report_bad_uploads():
+    with pytest.raises(SnapshotError, match='decompress'):
+        list(iter_snapshot_lines(io.BytesIO(b'not gzip')))
+    with pytest.raises(SnapshotError, match='Line 2'):
+        list(iter_snapshot_lines(io.BytesIO(b'{}\n[1]\n'), compressed=False))
+
+def test_restore_and_bulk_tasks_share_the_event_gate(app, client, admin, event):
+    export = client.get('/api/admin/export', headers=admin).data
+    client.post('/api/admin/clear-data', headers=admin)
+    limiter = app.extensions['rate_limiter']
+    token = limiter.acquire('bulk_write', 'default', ttl=60)
+    response = client.post('/api/admin/restore', headers=admin, data=export, content_type='application/gzip')
+    assert response.status_code == 409
+    response = client.post('/api/admin/tasks/bulk', headers=admin, json={'title': 'x', 'start_date': '2024-12-01'})
+    assert response.status_code == 409
+    assert event_state(client, admin)['users'] == []
+    limiter.release('bulk_write', 'default', token)
+    response = client.post('/api/admin/restore', headers=admin, data=export, content_type='application/gzip')
+    assert response.status_code == 200
+
+def test_failed_restore_keeps_data_once_the_gate_has_lapsed(app, client, admin, event, monkeypatch):
+    monkeypatch.setattr(Config, 'RESTORE_BATCH_SIZE', 2)
+    lines = gzip.decompress(client.get('/api/admin/export', headers=admin).data).splitlines()
+    client.post('/api/admin/clear-data', headers=admin)
+    monkeypatch.setattr(app.extensions['rate_limiter'], 'holds', lambda *args: False)
+    broken = b'\n'.join(lines[:5] + [b'not json'])
+    response = client.post('/api/admin/restore', headers=admin, data=broken, content_type='application/x-ndjson')
+    assert response.status_code == 400
+    assert len(event_state(client, admin)['users']) == 3
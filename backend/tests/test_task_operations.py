@@ -0,0 +1,123 @@
+import pytest
+
+from storage import plan_task_operations
+
+@pytest.fixture
+def tasks(client, admin, participants):
+    """
+    Ids of three past-due tasks, all assigned to ann
+    """
+    ids = []
+    for day in (1, 2, 3):
+        response = client.post('/api/tasks/create', headers=admin, json={
+            'title': f'Task {day}', 'description': '', 'assignTo': participants['ann']['_id'],
+            'scheduledDate': f'2024-12-0{day}'
+        })
+        ids.append(response.get_json()['task_id'])
+    return ids
+
+def dashboard_counts(client, headers):
+    dashboard = client.get('/api/user/dashboard', headers=headers).get_json()
+    return dashboard['pending_tasks'], dashboard['completed_tasks']
+
+def test_plan_skips_done_and_unknown_operations():
+    tasks = {'t1': {'_id': 't1', 'assigned_to': 'u1', 'completed': False},
+             't2': {'_id': 't2', 'assigned_to': 'u2', 'completed': False}}
+    results, writes = plan_task_operations(
+        [('complete', 't1'), ('complete', 't1'), ('complete', 't2'), ('assign', 't2'), ('complete', 'nope')],
+        tasks, 'u1'
+    )
+    assert [(result['matched'], result['modified']) for result in results] == [
+        (True, True), (True, False), (False, False), (True, True), (False, False)
+    ]
+    assert [write[1:3] for write in writes] == [('complete', 't1'), ('assign', 't2')]
+
+def test_batch_applies_operations_and_reports_counts(client, participants, tasks):
+    ann = participants['ann']['headers']
+    response = client.post('/api/tasks/batch', headers=ann, json={'operations': [
+        {'action': 'complete', 'task_id': tasks[0]},
+        {'action': 'complete', 'task_id': tasks[1]},
+        {'action': 'complete', 'task_id': tasks[0]},
+        {'action': 'complete', 'task_id': 'nope'}
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['matched'], body['modified']) == (3, 2)
+    assert dashboard_counts(client, ann) == (1, 2)
+
+def test_batch_assign_moves_tasks_and_dashboards(client, participants, tasks):
+    bob = participants['bob']['headers']
+    response = client.post('/api/tasks/batch', headers=bob, json={'operations': [
+        {'action': 'assign', 'task_id': tasks[2]},
+        {'action': 'complete', 'task_id': tasks[2]}
+    ]})
+    assert response.get_json()['modified'] == 2
+    assert dashboard_counts(client, bob) == (0, 1)
+    assert dashboard_counts(client, participants['ann']['headers']) == (2, 0)
+
+@pytest.mark.parametrize('body', [{}, {'operations': []}, {'operations': [{'action': 'x', 'task_id': 't'}]},
+                                  {'operations': [{'action': 'complete'}]}])
+def test_batch_rejects_malformed_operations(client, participants, body):
+    assert client.post('/api/tasks/batch', headers=participants['ann']['headers'], json=body).status_code == 400
+
+def test_idempotency_key_replays_the_first_response(client, participants, tasks):
+    headers = {**participants['ann']['headers'], 'Idempotency-Key': 'retry-1'}
+    operations = {'operations': [{'action': 'complete', 'task_id': task_id} for task_id in tasks[:2]]}
+    first = client.post('/api/tasks/batch', headers=headers, json=operations)
+    assert first.get_json()['modified'] == 2
+    assert 'Idempotent-Replayed' not in first.headers
+
+    replay = client.post('/api/tasks/batch', headers=headers, json=operations)
+    assert replay.status_code == first.status_code
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.get_json() == first.get_json()
+    assert dashboard_counts(client, participants['ann']['headers']) == (1, 2)
+
+def test_idempotency_key_reused_for_another_request_is_rejected(client, participants, tasks):
+    headers = {**participants['ann']['headers'], 'Idempotency-Key': 'retry-2'}
+    client.post(f'/api/tasks/{tasks[0]}/complete', headers=headers)
+    response = client.post(f'/api/tasks/{tasks[1]}/complete', headers=headers)
+    assert response.status_code == 422
+    assert dashboard_counts(client, participants['ann']['headers']) == (2, 1)
+
+def test_idempotency_keys_are_per_caller(client, participants, tasks):
+    client.post(f'/api/tasks/{tasks[0]}/complete', headers={**participants['ann']['headers'], 'Idempotency-Key': 'k'})
+    response = client.post(f'/api/tasks/{tasks[0]}/assign',
+                           headers={**participants['bob']['headers'], 'Idempotency-Key': 'k'})
+    assert response.status_code == 200
+    assert 'Idempotent-Replayed' not in response.headers
+
+def test_single_complete_is_a_one_operation_batch(client, participants, tasks):
+    ann, bob = participants['ann']['headers'], participants['bob']['headers']
+    assert client.post(f'/api/tasks/{tasks[0]}/complete', headers=ann).status_code == 200
+    assert client.post(f'/api/tasks/{tasks[0]}/complete', headers=ann).status_code == 200
+    assert client.post(f'/api/tasks/{tasks[0]}/complete', headers=bob).status_code == 404
+    assert client.post('/api/tasks/nope/complete', headers=ann).status_code == 404
+    assert dashboard_counts(client, ann) == (2, 1)
+
+class RacingCollection:
+    """
+    A tasks collection where another writer reassigns `stolen` just before
+    each bulk_write, after the batch was planned
+    """
+    def __init__(self, collection, stolen):
+        self.collection = collection
+        self.stolen = stolen
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def bulk_write(self, requests, **kwargs):
+        self.collection.update_one({'_id': self.stolen}, {'$set': {'assigned_to': 'someone-else'}})
+        return self.collection.bulk_write(requests, **kwargs)
+
+def test_operations_that_lose_a_race_are_reported_unmodified(db, backend, participants, tasks, monkeypatch):
+    if backend != 'mongo':
+        pytest.skip("the write_id check is the MongoDB backend's")
+    ann = participants['ann']['_id']
+    monkeypatch.setattr(db, 'tasks_collection', RacingCollection(db.tasks_collection, tasks[1]))
+    results = db.apply_task_operations([('complete', tasks[0]), ('complete', tasks[1])], ann)
+    assert [(result['matched'], result['modified']) for result in results] == [(True, True), (True, False)]
+    assert db.tasks_collection.find_one({'_id': tasks[1]})['completed'] is False
+    dashboard = db.get_dashboard(ann)
+    assert (dashboard['pending_tasks'], dashboard['completed_tasks']) == (2, 1)
@@ -1,7 +1,13 @@
 # backend/utils.py
 
+import base64
+import json
+import os
 import secrets
 import string
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from werkzeug.security import generate_password_hash
 
 def generate_secure_password(length=12):
     """
@@ -17,4 +23,39 @@ def validate_email(email):
     """
     import re
     email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(email_regex, email) is not None
\ No newline at end of file
+    return re.match(email_regex, email) is not None
+
+_hash_pool = None
+
+def hash_passwords(passwords, workers=None, parallel_threshold=64, method='pbkdf2:sha256', salt_length=16):
+    """
+    Hash a batch of passwords, fanning large batches out across a process pool
+    """
+    passwords = list(passwords)
+    hash_password = partial(generate_password_hash, method=method, salt_length=salt_length)
+    if len(passwords) < parallel_threshold:
+        return [hash_password(password) for password in passwords]
+
+    global _hash_pool
+    workers = workers or os.cpu_count() or 1
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=workers)
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(_hash_pool.map(hash_password, passwords, chunksize=chunksize))
+
+
+def encode_cursor(values):
+    """
+    Encode keyset pagination values as an opaque URL-safe token
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(token):
+    """
+    Decode a token from encode_cursor, raising ValueError if it is malformed
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -23,6 +23,27 @@ const UserDashboard = () => {
     checkRevealStatus();
   }, []);
 
+  useEffect(() => {
+    // Server pushes reveal and task changes instead of us re-polling
+    const token = localStorage.getItem('token');
+    const events = new EventSource(`/api/events?jwt=${token}`);
+    events.addEventListener('reveal_toggled', (event) => {
+      const { revealed } = JSON.parse(event.data);
+      setIsRevealed(revealed);
+      if (revealed) {
+        fetchMySanta();
+      }
+    });
+    events.addEventListener('task_created', () => fetchTasks());
+    events.addEventListener('task_completed', () => fetchTasks());
+    events.addEventListener('tasks_released', () => fetchTasks());
+    events.addEventListener('resync', () => {
+      fetchTasks();
+      checkRevealStatus();
+    });
+    return () => events.close();
+  }, []);
+
   const fetchPairedInfo = async () => {
     try {
       const token = localStorage.getItem('token');